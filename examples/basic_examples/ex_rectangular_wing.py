@@ -37,7 +37,7 @@ geometry.plot()
 # plotting_elements = geometry.functions[9].plot(show=False, point_types=['coefficients'], plot_types=['wireframe'], additional_plotting_elements=plotting_elements)
 # plotting_elements = geometry.functions[3].plot(show=False, point_types=['evaluated_points'], plot_types=['point_cloud'], additional_plotting_elements=plotting_elements)
 # geometry.functions[9].plot(point_types=['evaluated_points'], additional_plotting_elements=plotting_elements, plot_types=['point_cloud'])
-# # geometry.refit(parallelize=False) # New API if you want to do this!
+# # geometry.refit_in_place(parallelize=False) # New API if you want to do this!
 # # geometry.plot()
 
 
@@ -24,7 +24,7 @@ camera = dict(
 t1 = time.time()
 geometry = import_geometry('lsdo_geo/splines/b_splines/sample_geometries/lift_plus_cruise_final.stp')
 t2 = time.time()
-geometry.refit(parallelize=True, fit_resolution=(100,100), num_coefficients=(30,30))
+geometry.refit_in_place(parallelize=True, fit_resolution=(100,100), num_coefficients=(30,30))
 t3 = time.time()
 # geometry.find_connections() # NOTE: This is really really slow for large geometries. Come back to this.
 t4 = time.time()
@@ -9,7 +9,7 @@ from python_csdl_backend import Simulator
 # recorder.start()
 
 geometry = import_geometry('examples/example_geometries/rectangular_wing.stp', parallelize=False)
-geometry.refit(parallelize=False, fit_resolution=(50,50))
+geometry.refit_in_place(parallelize=False, fit_resolution=(50,50))
 m3l_model = m3l.Model()
 
 # axis_origin = geometry.evaluate(geometry.project(np.array([0.5, -10., 0.5])))
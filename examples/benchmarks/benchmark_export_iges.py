@@ -0,0 +1,32 @@
+'''
+Times Geometry.export_iges against the number of surfaces by exporting the rectangular wing sample with its functions repeated.
+'''
+import time
+import numpy as np
+import csdl_alpha as csdl
+import lsdo_geo
+
+recorder = csdl.Recorder(inline=True)
+recorder.start()
+
+geometry = lsdo_geo.import_geometry(
+    "examples/example_geometries/rectangular_wing.stp",
+    parallelize=False,
+)
+geometry.refit_in_place(parallelize=False, fit_resolution=(50,50), num_coefficients=(30,30))
+
+surface_counts = [10, 100, 1000]
+
+print(f'{"surfaces":>10}{"coefficients":>14}{"export (s)":>12}')
+for surface_count in surface_counts:
+    base_functions = list(geometry.functions.values())
+    functions = {i:base_functions[i % len(base_functions)] for i in range(surface_count)}
+    large_geometry = lsdo_geo.Geometry(functions=functions, function_names={i:f'surface_{i}' for i in range(surface_count)})
+    num_coefficients = int(np.sum([function.coefficients.size for function in functions.values()]))
+
+    t1 = time.perf_counter()
+    large_geometry.export_iges('benchmark_export.igs')
+    t2 = time.perf_counter()
+    print(f'{surface_count:>10}{num_coefficients:>14}{t2-t1:>12.4f}')
+
+recorder.stop()
@@ -0,0 +1,59 @@
+'''
+Times the evaluation of a 10k-point wireframe given as a list of (function_index, parametric_coordinate) tuples (spread over the upper
+and lower surfaces, like the concatenated wireframes in ex_tbw.py) against the same points as a ParametricCoordinates object.
+For each, the number of graph nodes added, the forward (inline) evaluation time, and the derivative time are printed.
+'''
+import time
+import numpy as np
+import csdl_alpha as csdl
+import lsdo_geo
+
+recorder = csdl.Recorder(inline=True)
+recorder.start()
+
+geometry = lsdo_geo.import_geometry(
+    "examples/example_geometries/rectangular_wing.stp",
+    parallelize=False,
+)
+
+num_points = 10000
+random_number_generator = np.random.default_rng(0)
+function_indices = random_number_generator.integers(0, len(geometry.functions), num_points)
+function_indices = np.array(list(geometry.functions))[function_indices]
+parametric_coordinates_value = random_number_generator.random((num_points, 2))
+
+upper_surface_wireframe_parametric = [(int(function_index), coordinate) for function_index, coordinate
+                                      in zip(function_indices[:num_points//2], parametric_coordinates_value[:num_points//2])]
+lower_surface_wireframe_parametric = [(int(function_index), coordinate) for function_index, coordinate
+                                      in zip(function_indices[num_points//2:], parametric_coordinates_value[num_points//2:])]
+wireframe_parametric_list = upper_surface_wireframe_parametric + lower_surface_wireframe_parametric
+wireframe_parametric_array = lsdo_geo.ParametricCoordinates.from_list(upper_surface_wireframe_parametric) \
+    + lower_surface_wireframe_parametric
+
+
+def run_evaluation(parametric_coordinates):
+    num_nodes_before = recorder.active_graph.rxgraph.num_nodes()
+    t1 = time.perf_counter()
+    wireframe = geometry.evaluate(parametric_coordinates)
+    objective = csdl.sum(wireframe**2)
+    t2 = time.perf_counter()
+    num_nodes = recorder.active_graph.rxgraph.num_nodes() - num_nodes_before
+
+    coefficients = [function.coefficients for function in geometry.functions.values()]
+    t3 = time.perf_counter()
+    csdl.derivative(objective, coefficients)
+    t4 = time.perf_counter()
+    return wireframe.value, num_nodes, t2 - t1, t4 - t3
+
+
+print(f'{"input":<24}{"nodes":>8}{"forward (s)":>14}{"derivative (s)":>17}')
+list_values, num_nodes, forward_time, derivative_time = run_evaluation(wireframe_parametric_list)
+print(f'{"list of tuples":<24}{num_nodes:>8}{forward_time:>14.4f}{derivative_time:>17.4f}')
+array_values, num_nodes, forward_time, derivative_time = run_evaluation(wireframe_parametric_array)
+print(f'{"ParametricCoordinates":<24}{num_nodes:>8}{forward_time:>14.4f}{derivative_time:>17.4f}')
+
+reference_values = lsdo_geo.Geometry.__mro__[1].evaluate(geometry, wireframe_parametric_list, non_csdl=True)
+print('max difference from lsdo_function_spaces evaluate:', np.max(np.abs(array_values - reference_values)))
+print('max difference between inputs:', np.max(np.abs(array_values - list_values)))
+
+recorder.stop()
@@ -0,0 +1,55 @@
+'''
+Compares the rotation paths of lsdo_geo.rotate:
+    - rodrigues: single rotation about an arbitrary axis (one 3x3 matrix and one matmat)
+    - tensor: several rotations applied with one rotation tensor and one einsum
+    - quaternion: the Hamiltonian product applied one angle at a time (batched=False)
+For each path, the number of graph nodes added, the forward (inline) evaluation time, and the derivative time are printed.
+'''
+import time
+import numpy as np
+import csdl_alpha as csdl
+from lsdo_geo.core.geometry.geometry_functions import rotate
+
+num_points = 10000
+points_value = np.random.default_rng(0).random((num_points,3))
+axis_vector_value = np.array([0.3, 0.5, 0.8])
+
+
+def run_rotation(num_angles:int, batched:bool, csdl_axis:bool):
+    recorder = csdl.Recorder(inline=True)
+    recorder.start()
+
+    points = csdl.Variable(value=points_value, name='points')
+    axis_origin = csdl.Variable(value=np.array([0.5, 0., 0.]), name='axis_origin')
+    if csdl_axis:
+        axis_vector = csdl.Variable(value=axis_vector_value, name='axis_vector')
+    else:
+        axis_vector = axis_vector_value
+    angles = csdl.Variable(value=np.linspace(0.1, np.pi/2, num_angles), name='angles')
+
+    num_nodes_before = recorder.active_graph.rxgraph.num_nodes()
+    t1 = time.perf_counter()
+    rotated_points = rotate(points, axis_origin, axis_vector, angles, batched=batched)
+    objective = csdl.sum(rotated_points**2)
+    t2 = time.perf_counter()
+    num_nodes = recorder.active_graph.rxgraph.num_nodes() - num_nodes_before
+
+    wrts = [points, angles] + ([axis_vector] if csdl_axis else [])
+    t3 = time.perf_counter()
+    csdl.derivative(objective, wrts)
+    t4 = time.perf_counter()
+
+    recorder.stop()
+    return num_nodes, t2 - t1, t4 - t3
+
+
+print(f'{"path":<12}{"axis":<8}{"angles":>8}{"nodes":>10}{"forward (s)":>14}{"derivative (s)":>16}')
+for num_angles in [1, 4, 16, 64]:
+    for csdl_axis in [False, True]:
+        for batched in [True, False]:
+            if batched:
+                path = 'rodrigues' if num_angles == 1 else 'tensor'
+            else:
+                path = 'quaternion'
+            num_nodes, forward_time, derivative_time = run_rotation(num_angles, batched, csdl_axis)
+            print(f'{path:<12}{"csdl" if csdl_axis else "numpy":<8}{num_angles:>8}{num_nodes:>10}{forward_time:>14.4f}{derivative_time:>16.4f}')
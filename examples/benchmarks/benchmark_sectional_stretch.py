@@ -0,0 +1,35 @@
+'''
+Times the setup of sectional stretch and translation maps of a VolumeSectionalParameterization against the resolution of the
+parameterized (FFD block) points.
+'''
+import time
+import numpy as np
+import csdl_alpha as csdl
+import lsdo_geo
+
+recorder = csdl.Recorder(inline=True)
+recorder.start()
+
+resolutions = [(5,10,5), (10,40,10), (20,80,20), (40,160,40)]
+
+print(f'{"resolution":<16}{"points":>10}{"stretch (s)":>14}{"translation (s)":>18}')
+for resolution in resolutions:
+    mesh_grid_input = [np.linspace(0., 1., num_points) for num_points in resolution]
+    points_value = np.stack(np.meshgrid(*mesh_grid_input, indexing='ij'), axis=-1) * np.array([2., 10., 0.5])
+    points = csdl.Variable(value=points_value, name='ffd_block_coefficients')
+
+    parameterization = lsdo_geo.VolumeSectionalParameterization(
+        name='benchmark_sectional_parameterization',
+        parameterized_points=points,
+        principal_parametric_dimension=1,
+    )
+
+    t1 = time.perf_counter()
+    parameterization.add_sectional_stretch(name='stretch_0', axis=0)
+    t2 = time.perf_counter()
+    parameterization.add_sectional_translation(name='translation_1', axis=1)
+    t3 = time.perf_counter()
+
+    print(f'{str(resolution):<16}{np.prod(resolution):>10}{t2-t1:>14.4f}{t3-t2:>18.4f}')
+
+recorder.stop()
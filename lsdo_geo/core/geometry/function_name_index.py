@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+
+class FunctionNames(dict):
+    '''
+    The names of the functions of a function set (by function index). This is a dict with a version that is incremented by every
+    write, so an index over the names (see FunctionNameIndex) can check that it is up to date without looking at the names.
+    '''
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self.version += 1
+        return result
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+class FunctionNameIndex:
+    '''
+    A trigram index over the function names of a function set. A substring query only checks the names that contain every trigram of
+    the query (instead of every name), and the results of each query are memoized.
+
+    Parameters
+    ----------
+    function_names : FunctionNames
+        The names of the functions (by function index).
+    '''
+    def __init__(self, function_names:FunctionNames) -> None:
+        self.function_names = function_names
+        self.version = getattr(function_names, 'version', None)
+        self.function_positions = {function_index:position for position, function_index in enumerate(function_names)}
+        self.trigrams = {}
+        for function_index, function_name in function_names.items():
+            if function_name is None:
+                continue
+            for i in range(len(function_name) - 2):
+                self.trigrams.setdefault(function_name[i:i+3], set()).add(function_index)
+        self._search_results = {}
+
+    def is_valid_for(self, function_names:FunctionNames) -> bool:
+        '''
+        Checks whether the index was built for the given function names and they have not been written to since (by comparing
+        versions, so renaming a function in place is detected without looking at the names). An index over a plain dict is never valid.
+        '''
+        return (function_names is self.function_names and self.version is not None
+                and getattr(function_names, 'version', None) == self.version)
+
+    def find(self, search_string:str) -> set[int]:
+        '''
+        Returns the indices of the functions whose names contain the search string.
+        '''
+        if search_string in self._search_results:
+            return self._search_results[search_string]
+
+        if len(search_string) < 3:
+            candidates = self.function_names
+        else:
+            candidate_sets = []
+            for i in range(len(search_string) - 2):
+                trigram_function_indices = self.trigrams.get(search_string[i:i+3])
+                if trigram_function_indices is None:
+                    candidate_sets = [set()]
+                    break
+                candidate_sets.append(trigram_function_indices)
+            candidate_sets.sort(key=len)
+            candidates = set.intersection(*candidate_sets)
+
+        function_indices = set(function_index for function_index in candidates
+                               if self.function_names[function_index] is not None and search_string in self.function_names[function_index])
+        self._search_results[search_string] = function_indices
+        return function_indices
+
+    def search(self, search_strings:list[str], ignore_names:list[str]=None) -> list[int]:
+        '''
+        Returns the indices (in function order) of the functions whose names contain any of the search strings and none of the ignore names.
+        '''
+        key = (tuple(search_strings), tuple(ignore_names) if ignore_names is not None else ())
+        if key in self._search_results:
+            return list(self._search_results[key])
+
+        function_indices = set()
+        for search_string in search_strings:
+            function_indices |= self.find(search_string)
+        if ignore_names is not None:
+            for ignore_name in ignore_names:
+                function_indices -= self.find(ignore_name)
+
+        function_indices = tuple(sorted(function_indices, key=self.function_positions.__getitem__))
+        self._search_results[key] = function_indices
+        return list(function_indices)
+
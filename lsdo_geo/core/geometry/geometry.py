@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import copy
+import joblib
 import numpy as np
 import pickle
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsl
 from dataclasses import dataclass
+from typing import Union
 from pathlib import Path
 # import pickle
 import csdl_alpha as csdl
@@ -10,6 +15,10 @@ import csdl_alpha as csdl
 # from lsdo_geo.splines.b_splines.b_spline_sub_set import BSplineSubSet
 import lsdo_function_spaces as lfs
 import lsdo_geo as lg
+from lsdo_geo.core.geometry.function_name_index import FunctionNameIndex, FunctionNames
+from lsdo_geo.core.geometry.geometry_snapshot import save_geometry_snapshot, load_geometry_snapshot
+from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
+from lsdo_geo.utils import caching_functions
 
 @dataclass
 class Geometry(lfs.FunctionSet):
@@ -17,17 +26,35 @@ class Geometry(lfs.FunctionSet):
 
     def __post_init__(self):
         super().__post_init__()
+        if not isinstance(self.function_names, FunctionNames):
+            self.function_names = FunctionNames(self.function_names)
         if self.representations is None:
             self.representations = {}
 
 
-    def copy(self):
+    def copy(self, copy_coefficients:bool=False):
         '''
-        Creates a copy of the geometry
+        Creates a copy of the geometry.
+
+        By default, the copy is copy-on-write: each function is shallow copied, so the copy shares the coefficient variables and function
+        spaces of this geometry (no new CSDL variables or coefficient arrays are created). Operations like set_coefficients, rotate, and
+        refit_in_place assign new coefficients/spaces to the functions of the copy, which leaves this geometry untouched.
+        NOTE: Only rebinding is safe on a shallow copy: assigning a new variable to function.coefficients (as the operations above do)
+        only changes the copy, but writing to a shared coefficient variable in place (set_value or assigning to its value) changes both
+        geometries. Use copy_coefficients=True to modify the coefficient values of the copy in place.
+
+        Parameters
+        ----------
+        copy_coefficients : bool = False
+            If True, the coefficients of every function are copied as new CSDL variables (as lfs.FunctionSet.copy does).
         '''
-        function_set = super().copy()
-        geometry_copy = Geometry(functions=function_set.functions, function_names=function_set.function_names, name=self.name,
-                                    space=function_set.space, representations=self.representations)
+        if copy_coefficients:
+            function_set = super().copy()
+            functions = function_set.functions
+        else:
+            functions = {i:copy.copy(function) for i, function in self.functions.items()}
+        geometry_copy = Geometry(functions=functions, function_names=self.function_names.copy(), name=self.name,
+                                 representations=self.representations.copy())
         return geometry_copy
 
     
@@ -49,7 +76,7 @@ class Geometry(lfs.FunctionSet):
         self.representations[representation.name] = representation
 
     
-    def evaluate_representations(self, representations:list[lg.Mesh], plot:bool=False) -> list[csdl.Variable]:
+    def evaluate_representations(self, representations:list[lg.Mesh], plot:bool=False, batched:bool=False) -> list[csdl.Variable]:
         '''
         Evaluates a representation or a list of representations.
 
@@ -59,14 +86,21 @@ class Geometry(lfs.FunctionSet):
             The name of the representation.
         plot : bool, optional
             Whether or not to plot the representation.
+        batched : bool = False
+            If True, the parametric coordinates of all of the (plain) meshes are merged and evaluated in a single call to evaluate so each
+            function is only evaluated once. Each mesh is then given its slice of the result. Representations that overload evaluate are
+            still evaluated individually.
         '''
         if isinstance(representations, lg.Mesh):
             representations = [representations]
 
-        evaluated_representations = []
-        for representation in representations:
-            # representation = self.representations[representation.name]
-            evaluated_representations.append(representation.evaluate(self, plot=plot))
+        if batched:
+            evaluated_representations = self._evaluate_representations_batched(representations, plot=plot)
+        else:
+            evaluated_representations = []
+            for representation in representations:
+                # representation = self.representations[representation.name]
+                evaluated_representations.append(representation.evaluate(self, plot=plot))
 
         if len(evaluated_representations) == 1:
             evaluated_representation = evaluated_representations[0]
@@ -75,23 +109,238 @@ class Geometry(lfs.FunctionSet):
         return evaluated_representations
     
 
+    def _evaluate_representations_batched(self, representations:list[lg.Mesh], plot:bool=False) -> list[csdl.Variable]:
+        '''
+        Evaluates the plain meshes (meshes that don't overload evaluate) with one sparse matvec by stacking their cached evaluation matrices
+        and slices the result for each mesh.
+        '''
+        batched_representations = []
+        evaluation_matrices = []
+        for representation in representations:
+            if type(representation).evaluate is lg.Mesh.evaluate and len(representation.parametric_coordinates) > 0:
+                batched_representations.append(representation)
+                evaluation_matrices.append(representation.get_evaluation_matrix(self))
+
+        evaluated_representations = {}
+        if len(batched_representations) > 0:
+            evaluation_matrix, function_indices = _stack_evaluation_matrices(evaluation_matrices,
+                {i:function.coefficients.size for i, function in self.functions.items()})
+            merged_values = self.evaluate_with_evaluation_matrix(evaluation_matrix, function_indices)
+            num_physical_dimensions = self.functions[function_indices[0]].num_physical_dimensions
+            merged_values = merged_values.reshape((evaluation_matrix.shape[0]//num_physical_dimensions, num_physical_dimensions))
+
+            offset = 0
+            for representation, (representation_evaluation_matrix, _) in zip(batched_representations, evaluation_matrices):
+                num_points = representation_evaluation_matrix.shape[0]//num_physical_dimensions
+                representation.geometry = self
+                values = merged_values[offset:offset+num_points]
+                if num_points == 1 or num_physical_dimensions == 1:
+                    values = values.reshape((-1,))
+                evaluated_representations[id(representation)] = values
+                offset += num_points
+
+            if plot:
+                merged_parametric_coordinates = []
+                for representation in batched_representations:
+                    merged_parametric_coordinates = merged_parametric_coordinates + \
+                        ParametricCoordinates.from_list(representation.parametric_coordinates)
+                self.evaluate(merged_parametric_coordinates, plot=plot, non_csdl=True)
+
+        return [evaluated_representations[id(representation)] if id(representation) in evaluated_representations
+                else representation.evaluate(self, plot=plot) for representation in representations]
+
+
+    def evaluate(self, parametric_coordinates:Union[ParametricCoordinates,list[tuple[int,np.ndarray]]], parametric_derivative_orders:tuple=None,
+                 plot:bool=False, non_csdl:bool=False) -> csdl.Variable:
+        '''
+        Evaluates the geometry. The points are grouped by function (with one sort), each function's basis is evaluated once for all of
+        its points, and the rows of the assembled evaluation matrix are ordered like the given points, so the result is computed with a
+        single sparse matvec and no per-point or per-function CSDL operations.
+
+        Parameters
+        ----------
+        parametric_coordinates : Union[ParametricCoordinates, list[tuple[int, np.ndarray]]]
+            The coordinates at which to evaluate the geometry. This is either a ParametricCoordinates object or a list of
+            (function index, parametric coordinate) tuples.
+        parametric_derivative_orders : tuple = None
+            The order of the parametric derivatives to evaluate. If None, the function itself is evaluated.
+        plot : bool = False
+            Whether or not to plot the geometry with the evaluated points.
+        non_csdl : bool = False
+            If true, will run numpy computations instead of csdl computations, and return a numpy array.
+
+        Returns
+        -------
+        function_values : csdl.Variable
+            The geometry evaluated at the given coordinates.
+        '''
+        evaluation_matrix, function_indices = self.compute_evaluation_matrix(parametric_coordinates, parametric_derivative_orders)
+        function_values = self.evaluate_with_evaluation_matrix(evaluation_matrix, function_indices, non_csdl=non_csdl)
+
+        if plot:
+            plotting_elements = self.plot(opacity=0.8, show=False)
+            if non_csdl:
+                value = function_values
+            else:
+                value = function_values.value
+            lfs.plot_points(value, color='#C69214', size=10, additional_plotting_elements=plotting_elements)
+
+        return function_values
+
+
+    def compute_evaluation_matrix(self, parametric_coordinates:Union[ParametricCoordinates,list[tuple[int,np.ndarray]]],
+                                  parametric_derivative_orders:tuple=None) -> tuple[sps.csr_matrix, list[int]]:
+        '''
+        Assembles the sparse matrix that maps the stacked and flattened coefficients of the functions that the points lie on to the
+        flattened values at the points (in the order that the points are given).
+
+        Parameters
+        ----------
+        parametric_coordinates : Union[ParametricCoordinates, list[tuple[int, np.ndarray]]]
+            The (function index, parametric coordinate) pair of each point.
+        parametric_derivative_orders : tuple = None
+            The order of the parametric derivatives to evaluate. If None, the function itself is evaluated.
+
+        Returns
+        -------
+        evaluation_matrix : sps.csr_matrix
+            The evaluation matrix. Its columns correspond to the flattened coefficients of the functions in function_indices (stacked).
+        function_indices : list[int]
+            The indices of the functions whose coefficients the evaluation matrix multiplies.
+        '''
+        parametric_coordinates = ParametricCoordinates.from_list(parametric_coordinates)
+        if len(parametric_coordinates) == 0:
+            raise ValueError("No points were evaluated.")
+        point_indices_per_function = parametric_coordinates.group_by_function()
+        function_indices = list(point_indices_per_function)
+        num_physical_dimensions = self.functions[function_indices[0]].num_physical_dimensions
+
+        rows = []
+        columns = []
+        data = []
+        column_offset = 0
+        for function_index, point_indices in point_indices_per_function.items():
+            function = self.functions[function_index]
+            function_parametric_coordinates = parametric_coordinates.parametric_coordinates[point_indices]
+            function_parametric_coordinates = function_parametric_coordinates.reshape((-1, function.space.num_parametric_dimensions))
+            basis_matrix = sps.coo_matrix(function.space.compute_basis_matrix(function_parametric_coordinates,
+                                                                              parametric_derivative_orders))
+            rows.append(point_indices[basis_matrix.row])
+            columns.append(basis_matrix.col + column_offset)
+            data.append(basis_matrix.data)
+            column_offset += basis_matrix.shape[1]
+
+        basis_matrix = sps.coo_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(columns))),
+                                      shape=(len(parametric_coordinates), column_offset))
+        evaluation_matrix = sps.kron(basis_matrix, sps.eye(num_physical_dimensions), format='csr')
+        return evaluation_matrix, function_indices
+
+
+    def evaluate_with_evaluation_matrix(self, evaluation_matrix:sps.csr_matrix, function_indices:list[int],
+                                        non_csdl:bool=False) -> csdl.Variable:
+        '''
+        Evaluates the geometry using a precomputed evaluation matrix (see compute_evaluation_matrix) with a single sparse matvec.
+
+        Parameters
+        ----------
+        evaluation_matrix : sps.csr_matrix
+            The evaluation matrix.
+        function_indices : list[int]
+            The indices of the functions whose coefficients the evaluation matrix multiplies.
+        non_csdl : bool = False
+            If true, will run numpy computations instead of csdl computations, and return a numpy array.
+        '''
+        num_physical_dimensions = self.functions[function_indices[0]].num_physical_dimensions
+        coefficients = []
+        for function_index in function_indices:
+            function_coefficients = self.functions[function_index].coefficients
+            if non_csdl and isinstance(function_coefficients, csdl.Variable):
+                function_coefficients = function_coefficients.value
+            coefficients.append(function_coefficients.reshape((-1, num_physical_dimensions)))
+
+        if non_csdl:
+            values = evaluation_matrix @ np.vstack(coefficients).reshape((-1,))
+        else:
+            if len(coefficients) == 1:
+                coefficients = coefficients[0]
+            else:
+                coefficients = csdl.vstack(coefficients)
+            values = csdl.sparse.matvec(evaluation_matrix, coefficients.reshape((coefficients.size, 1)))
+
+        num_points = evaluation_matrix.shape[0]//num_physical_dimensions
+        if num_points == 1 or num_physical_dimensions == 1:
+            return values.reshape((evaluation_matrix.shape[0],))
+        return values.reshape((num_points, num_physical_dimensions))
+
+
+    def search_for_function_indices(self, search_strings:list[str], ignore_names:list[str]=None) -> list[int]:
+        '''
+        Searches for the indices of the functions whose names include any of the search strings (and none of the ignore names).
+        The search uses a trigram index of the function names that is built on the first search and memoizes the results, so repeated
+        component declarations don't scan every function name. The index is rebuilt after the function names are written to (see
+        FunctionNames).
+
+        Parameters
+        ----------
+        search_strings : str | list[str]
+            The strings to search for in the function names.
+        ignore_names : list[str] = None
+            Functions whose names include any of these strings are excluded.
+
+        Returns
+        -------
+        function_indices : list[int]
+            The indices of the functions in the geometry with the given search strings.
+        '''
+        if isinstance(search_strings, str):
+            search_strings = [search_strings]
+        if isinstance(ignore_names, str):
+            ignore_names = [ignore_names]
+
+        if not isinstance(self.function_names, FunctionNames):
+            self.function_names = FunctionNames(self.function_names)
+        function_name_index = getattr(self, '_function_name_index', None)
+        if function_name_index is None or not function_name_index.is_valid_for(self.function_names):
+            function_name_index = FunctionNameIndex(self.function_names)
+            self._function_name_index = function_name_index
+        return function_name_index.search(search_strings, ignore_names)
+
+
     def declare_component(self, function_indices:list[int]=None, function_search_names:list[str]=None, ignore_names:list[str]=[], name:str=None) -> lg.Geometry:
         '''
-        Declares a component. This component will point to a sub-set of the entire geometry.
+        Declares a component. This component will point to a sub-set of the entire geometry (it shares the functions of this geometry).
+        Components are cached, so declaring the same component again returns the same geometry as long as its functions and their names
+        have not been replaced in this geometry.
 
         Parameters
         ----------
-        function_names : list[str]
-            The names of the functions that make up the component.
+        function_indices : list[int], optional
+            The indices of the functions that make up the component.
         function_search_names : list[str], optional
             The names of the functions to search for. Names of functions will be returned for each B-spline that INCLUDES the search name.
+        ignore_names : list[str], optional
+            Functions whose names include any of these strings are not found by the search.
         name : str
             The name of the component.
         '''
-        function_set = self.create_subset(function_indices=function_indices, function_search_names=function_search_names, ignore_names=ignore_names, name=name)
-
-        component = lg.Geometry(functions=function_set.functions, function_names=function_set.function_names, name=name, 
-                                space=function_set.space)
+        component_function_indices = [] if function_indices is None else list(function_indices)
+        if function_search_names is not None:
+            component_function_indices += self.search_for_function_indices(function_search_names, ignore_names=ignore_names)
+        component_function_indices = list(dict.fromkeys(component_function_indices))
+
+        components = getattr(self, '_components', None)
+        if components is None:
+            components = self._components = {}
+        component_key = (tuple(component_function_indices), name)
+        component = components.get(component_key)
+        if component is not None and len(component.functions) == len(component_function_indices) \
+            and all(component.functions.get(i) is self.functions[i] and component.function_names.get(i) == self.function_names[i]
+                    for i in component_function_indices):
+            return component
+
+        component = lg.Geometry(functions={i:self.functions[i] for i in component_function_indices},
+                                function_names={i:self.function_names[i] for i in component_function_indices}, name=name)
+        components[component_key] = component
         return component
     
     def create_component_copy(self, function_indices:list[int]=None, function_search_names:list[str]=None, name:str=None) -> lg.Geometry:
@@ -107,10 +356,192 @@ class Geometry(lfs.FunctionSet):
         name : str
             The name of the component.
         '''
-        component = self.create_subset(function_indices=function_indices, function_search_names=function_search_names, name=name)
+        component = self.declare_component(function_indices=function_indices, function_search_names=function_search_names, name=name)
         component_copy = component.copy()
         return component_copy
     
+    def project(self, points:np.ndarray, direction:np.ndarray=None, grid_search_density_parameter:int=1, max_newton_iterations:int=100,
+                newton_tolerance:float=1e-6, plot:bool=False, force_reproject:bool=False, use_cache:bool=True, compact:bool=False,
+                **kwargs) -> Union[list[tuple[int,np.ndarray]],ParametricCoordinates]:
+        '''
+        Projects points onto the geometry. The results are stored in lsdo_geo.PROJECTIONS_FOLDER under a hash of the function coefficients
+        and spaces (including the knots), the points, and the projection parameters, so repeating a projection onto an unchanged geometry skips the grid search and Newton iterations.
+
+        Parameters
+        ----------
+        points : np.ndarray -- shape=(num_points, num_physical_dimensions)
+            The points to project onto the geometry.
+        direction : Union[np.ndarray, csdl.Variable] = None -- shape=(num_physical_dimensions,)
+            The direction of the projection. If None, the closest points are found.
+        grid_search_density_parameter : int = 1
+            The density of the grid search used to find the initial guess for the Newton iterations.
+        max_newton_iterations : int = 100
+            The maximum number of Newton iterations.
+        newton_tolerance : float = 1e-6
+            The tolerance of the Newton iterations.
+        plot : bool = False
+            Whether or not to plot the projection.
+        force_reproject : bool = False
+            Whether or not to ignore a stored projection.
+        use_cache : bool = True
+            Whether or not to load from/store to the projection cache.
+        compact : bool = False
+            If True, the result is returned as a ParametricCoordinates object instead of a list of tuples.
+        kwargs
+            Additional arguments passed to lfs.FunctionSet.project.
+
+        Returns
+        -------
+        Union[list[tuple[int,np.ndarray]], ParametricCoordinates]
+            The parametric coordinates of the projected points.
+        '''
+        # NOTE: The projection itself does not depend on the direction as a CSDL variable, so only its value is used.
+        direction = direction.value if isinstance(direction, csdl.Variable) else direction
+        if not use_cache:
+            parametric_coordinates = super().project(points=points, direction=direction,
+                                                     grid_search_density_parameter=grid_search_density_parameter,
+                                                     max_newton_iterations=max_newton_iterations, newton_tolerance=newton_tolerance,
+                                                     plot=plot, **kwargs)
+            if compact:
+                return ParametricCoordinates.from_list(parametric_coordinates)
+            return parametric_coordinates
+
+        points_value = points.value if isinstance(points, csdl.Variable) else np.asarray(points)
+        cache_key = caching_functions.hash_data(
+            {i:(function.coefficients.value, _get_space_data(function.space)) for i, function in self.functions.items()},
+            points_value, direction, grid_search_density_parameter, max_newton_iterations, newton_tolerance, kwargs)
+        cache_file = lg.PROJECTIONS_FOLDER / f'{cache_key}_projection.pickle'
+
+        parametric_coordinates = None
+        if not force_reproject:
+            parametric_coordinates = caching_functions.load_pickle(cache_file)
+        caching_functions.record_cache_access('projections', hit=parametric_coordinates is not None)
+
+        if parametric_coordinates is None:
+            parametric_coordinates = super().project(points=points, direction=direction,
+                                                     grid_search_density_parameter=grid_search_density_parameter,
+                                                     max_newton_iterations=max_newton_iterations, newton_tolerance=newton_tolerance,
+                                                     plot=plot, **kwargs)
+            parametric_coordinates = ParametricCoordinates.from_list(parametric_coordinates)
+            # NOTE: The compact form is stored since pickling one small array per point is slow for large point sets.
+            caching_functions.save_pickle(cache_file, parametric_coordinates)
+            caching_functions.evict_cache_entries(lg.PROJECTIONS_FOLDER, lg.PROJECTIONS_CACHE_MAX_SIZE, cache_name='projections')
+        elif plot:
+            projection_results = self.evaluate(parametric_coordinates, non_csdl=True)
+            plotting_elements = lfs.plot_points(points_value.reshape((-1, projection_results.shape[-1])), color='#00ff00', size=10,
+                                                opacity=0.6, show=False)
+            plotting_elements = lfs.plot_points(projection_results, color='#ff0000', size=5, show=False,
+                                                additional_plotting_elements=plotting_elements)
+            self.plot(opacity=0.3, additional_plotting_elements=plotting_elements, show=True)
+
+        if compact:
+            return ParametricCoordinates.from_list(parametric_coordinates)
+        if isinstance(parametric_coordinates, ParametricCoordinates):
+            return parametric_coordinates.to_list()
+        return parametric_coordinates
+
+    def refit_in_place(self, fit_resolution:Union[tuple,dict[int,tuple]]=(25,25), num_coefficients:Union[tuple,dict[int,tuple]]=(25,25),
+                       degree:Union[tuple,dict[int,tuple]]=(3,3), parallelize:bool=False, regularization_parameter:float=None,
+                       use_cache:bool=True, force_refit:bool=False):
+        '''
+        Refits every function of the geometry onto a B-spline space with the given number of coefficients and degree. Unlike refit (which
+        returns a new function set), the geometry is modified in place. The refit coefficients of each function are stored in
+        lsdo_geo.REFIT_FOLDER under a hash of the source coefficients, the source space, and the refit parameters, so repeating a refit is a
+        disk read and editing one function only invalidates its own entry.
+
+        The functions are grouped by their number of parametric dimensions. All of the functions in a group are fit against the same basis
+        matrix, so the normal equations are factorized once per group and solved for every function in the group at once.
+
+        Parameters
+        ----------
+        fit_resolution : Union[tuple, dict[int,tuple]] = (25,25)
+            The resolution of the parametric grid that the functions are evaluated on for the fit. To refit functions with different numbers
+            of parametric dimensions, pass a dictionary keyed by the number of parametric dimensions (and likewise for num_coefficients
+            and degree).
+        num_coefficients : Union[tuple, dict[int,tuple]] = (25,25)
+            The number of coefficients along each parametric dimension of the new spaces.
+        degree : Union[tuple, dict[int,tuple]] = (3,3)
+            The degree along each parametric dimension of the new spaces.
+        parallelize : bool = False
+            Whether or not to evaluate the functions on the fitting grid in parallel (with a thread pool).
+        regularization_parameter : float = None
+            If not None, this multiple of the identity is added to the normal equations.
+        use_cache : bool = True
+            Whether or not to load from/store to the refit cache.
+        force_refit : bool = False
+            Whether or not to ignore stored refits.
+        '''
+        function_groups = {}
+        for i, function in self.functions.items():
+            function_groups.setdefault(function.space.num_parametric_dimensions, []).append(i)
+
+        for num_parametric_dimensions, function_indices in function_groups.items():
+            group_fit_resolution = _get_refit_parameter(fit_resolution, num_parametric_dimensions, 'fit_resolution')
+            group_num_coefficients = _get_refit_parameter(num_coefficients, num_parametric_dimensions, 'num_coefficients')
+            group_degree = _get_refit_parameter(degree, num_parametric_dimensions, 'degree')
+            self._refit_function_group(function_indices, group_fit_resolution, group_num_coefficients, group_degree, parallelize,
+                                       regularization_parameter, use_cache, force_refit)
+
+        if use_cache:
+            caching_functions.evict_cache_entries(lg.REFIT_FOLDER, lg.REFIT_CACHE_MAX_SIZE, cache_name='refits')
+
+
+    def _refit_function_group(self, function_indices:list[int], fit_resolution:tuple, num_coefficients:tuple, degree:tuple,
+                              parallelize:bool, regularization_parameter:float, use_cache:bool, force_refit:bool):
+        '''
+        Refits (in place) functions that have the same number of parametric dimensions onto one new B-spline space.
+        '''
+        new_space = lfs.BSplineSpace(num_parametric_dimensions=len(num_coefficients), degree=degree, coefficients_shape=num_coefficients)
+
+        refit_coefficients = {}
+        cache_keys = {}
+        for i in function_indices:
+            function = self.functions[i]
+            if use_cache:
+                cache_keys[i] = caching_functions.hash_data(function.coefficients.value, _get_space_data(function.space),
+                                                            fit_resolution, num_coefficients, degree, regularization_parameter)
+                if not force_refit:
+                    coefficients = caching_functions.load_array(lg.REFIT_FOLDER / f'{cache_keys[i]}_refit.npy', mmap=False)
+                    caching_functions.record_cache_access('refits', hit=coefficients is not None)
+                    if coefficients is not None:
+                        refit_coefficients[i] = coefficients
+
+        functions_to_fit = [i for i in function_indices if i not in refit_coefficients]
+        if functions_to_fit:
+            parametric_grid = new_space.generate_parametric_grid(fit_resolution)
+            basis_matrix = sps.csc_matrix(new_space.compute_basis_matrix(parametric_grid))
+            normal_matrix = (basis_matrix.T @ basis_matrix).tocsc()
+            if regularization_parameter is not None:
+                normal_matrix = (normal_matrix + regularization_parameter*sps.eye(normal_matrix.shape[0])).tocsc()
+            normal_matrix_factorization = spsl.splu(normal_matrix)
+
+            def evaluate_on_grid(function:lfs.Function) -> np.ndarray:
+                values = function.evaluate(parametric_grid, non_csdl=True)
+                return np.asarray(values).reshape((parametric_grid.shape[0], -1))
+
+            if parallelize:
+                fitting_values = joblib.Parallel(n_jobs=-1, prefer='threads')(
+                    joblib.delayed(evaluate_on_grid)(self.functions[i]) for i in functions_to_fit)
+            else:
+                fitting_values = [evaluate_on_grid(self.functions[i]) for i in functions_to_fit]
+            stacked_values = np.hstack(fitting_values)
+            stacked_coefficients = normal_matrix_factorization.solve(np.asarray(basis_matrix.T @ stacked_values))
+
+            column_counter = 0
+            for i, values in zip(functions_to_fit, fitting_values):
+                num_physical_dimensions = values.shape[1]
+                coefficients = stacked_coefficients[:,column_counter:column_counter+num_physical_dimensions]
+                refit_coefficients[i] = coefficients.reshape(num_coefficients + (num_physical_dimensions,))
+                column_counter += num_physical_dimensions
+                if use_cache:
+                    caching_functions.save_array(lg.REFIT_FOLDER / f'{cache_keys[i]}_refit.npy', refit_coefficients[i])
+
+        for i in function_indices:
+            function = self.functions[i]
+            function.space = new_space
+            function.coefficients = csdl.Variable(value=np.array(refit_coefficients[i]))
+            self.space.spaces[i] = new_space
+
     # def copy(self) -> lg.Geometry:
     #     '''
     #     Copies the function set.
@@ -145,24 +576,30 @@ class Geometry(lfs.FunctionSet):
 
 
     def rotate(self, axis_origin:csdl.Variable, axis_vector:csdl.Variable, angles:csdl.Variable, function_indices:list[int]=None,
-                units:str='radians'):
+                units:str='radians', batched:bool=True):
         '''
         Rotates the B-spline set about an axis.
 
+        Several rotations can be applied in one call by giving one axis origin, axis vector, and/or angle per rotation and a list of
+        function indices per rotation. The rotation matrices are then computed together (see geometry_functions.compute_rotation_tensor).
+
         Parameters
         -----------
-        axis_origin : csdl.Variable
+        axis_origin : csdl.Variable -- shape=(3,) or (num_rotations,3)
             The origin of the axis of rotation.
-        axis_vector : csdl.Variable
+        axis_vector : csdl.Variable -- shape=(3,) or (num_rotations,3)
             The vector of the axis of rotation.
-        angles : csdl.Variable
+        angles : csdl.Variable -- shape=(1,) or (num_rotations,)
             The angle of rotation.
-        function_indices : list[int]
-            The indices of the functions to rotate.
+        function_indices : list[int] | list[list[int]]
+            The indices of the functions to rotate. For several rotations, the indices of the functions to rotate with each rotation.
         units : str
             The units of the angle of rotation. {degrees, radians}
+        batched : bool = True
+            Whether or not to use the batched rotation matrices instead of the quaternion product (see geometry_functions.rotate).
+            Several rotations are always batched.
         '''
-        from lsdo_geo.core.geometry.geometry_functions import rotate as rotate_function
+        from lsdo_geo.core.geometry.geometry_functions import rotate as rotate_function, compute_rotation_tensor
         if units == 'degrees':
             angles = angles * np.pi / 180.
             units = 'radians'
@@ -185,6 +622,34 @@ class Geometry(lfs.FunctionSet):
         if type(angles) is np.ndarray:
             angles = csdl.Variable(shape=angles.shape, value=angles)
 
+        if len(function_indices) > 0 and isinstance(function_indices[0], list):
+            num_rotations = len(function_indices)
+            rotation_tensor = compute_rotation_tensor(axis_vector=axis_vector, angles=angles, units=units)
+            if rotation_tensor.shape[0] != num_rotations:
+                raise ValueError(f'The number of function index lists ({num_rotations}) does not match the number of rotations ' +
+                                 f'({rotation_tensor.shape[0]}).')
+            if axis_origin.size != 3 and axis_origin.size != 3*num_rotations:
+                raise ValueError(f'The number of axis origins ({axis_origin.size//3}) does not match the number of rotations ({num_rotations}).')
+            axis_origins = axis_origin.reshape((axis_origin.size//3, 3))
+            for i, rotation_function_indices in enumerate(function_indices):
+                rotation_matrix = rotation_tensor[i].reshape((3,3))
+                rotation_axis_origin = axis_origins[i if axis_origins.shape[0] > 1 else 0].reshape((3,))
+                def rotate_points(points:csdl.Variable, rotation_matrix=rotation_matrix, rotation_axis_origin=rotation_axis_origin):
+                    origin_expanded = csdl.expand(rotation_axis_origin, points.shape, 'i->ji')
+                    return csdl.matmat(points - origin_expanded, rotation_matrix.T()) + origin_expanded
+                self._transform_coefficients(rotation_function_indices, rotate_points)
+            return
+
+        self._transform_coefficients(function_indices, lambda points: rotate_function(points=points, axis_origin=axis_origin,
+                                                                                     axis_vector=axis_vector, angles=angles, units=units,
+                                                                                     batched=batched))
+
+
+    def _transform_coefficients(self, function_indices:list[int], transform) -> None:
+        '''
+        Applies a transformation of points (num_points,num_physical_dimensions) to the coefficients of the given functions. The
+        coefficients of all of the functions are stacked so the transformation is applied once.
+        '''
         # # Unvectorized:
         # for function_index in function_indices:
         #     function = self.functions[function_index]
@@ -197,9 +662,8 @@ class Geometry(lfs.FunctionSet):
         # Vectorized:
         if len(function_indices) == 1:
             function = self.functions[function_indices[0]]
-            rotated_coefficients = rotate_function(
-                points=function.coefficients.reshape((function.coefficients.size // function.coefficients.shape[-1], function.coefficients.shape[-1])), 
-                axis_origin=axis_origin, axis_vector=axis_vector, angles=angles, units=units
+            rotated_coefficients = transform(
+                function.coefficients.reshape((function.coefficients.size // function.coefficients.shape[-1], function.coefficients.shape[-1]))
             )
             function.coefficients = rotated_coefficients.reshape(function.coefficients.shape)
         else:
@@ -209,10 +673,7 @@ class Geometry(lfs.FunctionSet):
                 stacked_coefficients.append(function.coefficients.reshape((function.coefficients.size // function.coefficients.shape[-1], function.coefficients.shape[-1])))
             stacked_coefficients = csdl.vstack(stacked_coefficients)
 
-            rotated_coefficients = rotate_function(
-                points=stacked_coefficients, 
-                axis_origin=axis_origin, axis_vector=axis_vector, angles=angles, units=units
-            )
+            rotated_coefficients = transform(stacked_coefficients)
 
             counter = 0
             for i, function_index in enumerate(function_indices):
@@ -226,7 +687,7 @@ class Geometry(lfs.FunctionSet):
                 mesh_color_map='jet', mesh_line_width:float=3.,
                 function_indices:list[str]=None, function_plot_types:list[str]=['function'], function_opacity:float=0.25, function_color:str='#00629B',
                 function_color_map:str='jet', function_surface_texture:str="",
-                additional_plotting_elements:list=[], camera:dict=None, show:bool=True):
+                additional_plotting_elements:list=[], camera:dict=None, show:bool=True, offscreen:bool=False, screenshot:str=None):
         '''
         Plots a mesh over the geometry.
 
@@ -263,6 +724,10 @@ class Geometry(lfs.FunctionSet):
             A dictionary of camera parameters. see Vedo documentation for more information.
         show : bool, optional
             Whether or not to show the plot.
+        offscreen : bool, optional = False
+            If True, the plot is rendered without opening a window (for headless rendering, use with screenshot).
+        screenshot : str, optional = None
+            The name of an image file to save the rendered plot to.
 
         Returns
         -------
@@ -317,35 +782,27 @@ class Geometry(lfs.FunctionSet):
                 continue
 
             if ('surface' in mesh_plot_types or 'wireframe' in mesh_plot_types) and len(points.shape) == 3: # If it's a surface
-                num_points_u = points.shape[0]
-                num_points_v = points.shape[1]
-                num_points = num_points_u*num_points_v
-                vertices = []
-                faces = []
-                for u_index in range(num_points_u):
-                    for v_index in range(num_points_v):
-                        vertex = tuple(points[u_index,v_index,:])
-                        vertices.append(vertex)
-                        if u_index != 0 and v_index != 0:
-                            face = tuple((
-                                (u_index-1)*num_points_v+(v_index-1),
-                                (u_index-1)*num_points_v+(v_index),
-                                (u_index)*num_points_v+(v_index),
-                                (u_index)*num_points_v+(v_index-1),
-                            ))
-                            faces.append(face)
-
-                plotting_mesh = vedo.Mesh([vertices, faces]).opacity(mesh_opacity).color('lightblue')
-            if 'surface' in mesh_plot_types:
-                plotting_elements.append(plotting_mesh)
-            if 'wireframe' in mesh_plot_types:
-                # plotting_mesh = vedo.Mesh([vertices, faces]).opacity(mesh_opacity).color('blue')
-                plotting_mesh = vedo.Mesh([vertices, faces]).opacity(mesh_opacity).color(mesh_color) # Default is UCSD Sand
-                plotting_elements.append(plotting_mesh.wireframe().linewidth(mesh_line_width))
+                vertices = points.reshape((points.shape[0]*points.shape[1], -1))
+                faces = _compute_grid_quad_faces(points.shape[0], points.shape[1])
+
+                # One mesh is built, and cloned if it is plotted both as a surface and as a wireframe
+                plotting_mesh = vedo.Mesh([vertices, faces]).opacity(mesh_opacity)
+                if 'surface' in mesh_plot_types:
+                    surface_mesh = plotting_mesh.clone() if 'wireframe' in mesh_plot_types else plotting_mesh
+                    plotting_elements.append(surface_mesh.color('lightblue'))
+                if 'wireframe' in mesh_plot_types:
+                    plotting_mesh.color(mesh_color) # Default is UCSD Sand
+                    plotting_elements.append(plotting_mesh.wireframe().linewidth(mesh_line_width))
             
-        if show:
-            plotter = vedo.Plotter()
-            plotter.show(plotting_elements, 'Meshes', axes=1, viewup="z", interactive=True, camera=camera)
+        if show or screenshot is not None:
+            plotter = vedo.Plotter(offscreen=offscreen)
+            plotter.show(plotting_elements, 'Meshes', axes=1, viewup="z", interactive=(screenshot is None and not offscreen), camera=camera)
+            if screenshot is not None:
+                plotter.screenshot(screenshot)
+                if show and not offscreen:
+                    plotter.interactive()
+            if offscreen or screenshot is not None:
+                plotter.close()
 
         return plotting_elements
     
@@ -353,135 +810,268 @@ class Geometry(lfs.FunctionSet):
     def plot_2d_mesh(self, mesh):
         pass
 
-    def export_iges(self, file_name:str):
+    def save(self, file_name:Union[str,Path]):
         '''
-        Exports the geometry to an IGES file.
+        Saves the geometry (function names, spaces, and coefficients) to a single flat binary snapshot file.
+        NOTE: Representations are not saved.
 
         Parameters
         ----------
-        file_name : str
-            The name of the file to export to.
+        file_name : Union[str, Path]
+            The name of the file to save to.
+        '''
+        save_geometry_snapshot(file_name, functions=self.functions, function_names=self.function_names, name=self.name)
+
+
+    @classmethod
+    def load(cls, file_name:Union[str,Path], mmap:bool=True) -> Geometry:
+        '''
+        Loads a geometry saved with save.
+
+        Parameters
+        ----------
+        file_name : Union[str, Path]
+            The name of the file to load.
+        mmap : bool = True
+            If True, the snapshot is memory-mapped and the coefficients of a function are only read (and turned into a CSDL variable)
+            when they are first accessed, so loading does not depend on the size of the geometry.
         '''
-        """
-        Write the surface to IGES format
+        functions, function_names, name = load_geometry_snapshot(file_name, mmap=mmap)
+        return cls(functions=functions, function_names=function_names, name=name)
+
+
+    def export_iges(self, file_name:str):
+        '''
+        Exports the geometry to an IGES file (each function as a rational B-spline surface entity, type 128).
+        The parameter data of each surface is formatted as one block with NumPy/string formatting and written one surface at a time.
+
         Parameters
         ----------
-        fileName : str
-            File name of iges file. Should have .igs extension.
-        """
-        f = open(file_name, 'w')
+        file_name : str
+            The name of the file to export to. Should have .igs extension.
+        '''
         print('Exporting', file_name)
-        #TODO Change to correct information
-        f.write('                                                                        S      1\n')
-        f.write('1H,,1H;,7H128-000,11H128-000.IGS,9H{unknown},9H{unknown},16,6,15,13,15, G      1\n')
-        f.write('7H128-000,1.,6,1HM,8,0.016,15H19970830.165254, 0.0001,0.,               G      2\n')
-        f.write('21Hdennette@wiz-worx.com,23HLegacy PDD AP Committee,11,3,               G      3\n')
-        f.write('13H920717.080000,23HMIL-PRF-28000B0,CLASS 1;                            G      4\n')
-        Dcount = 1
-        Pcount = 1
-        for surf in self.functions.values():
-            space = surf.space
-            paraEntries = 13 + (len(space.knot_indices[0])) + (len(space.knot_indices[1])) + space.coefficients_shape[0] * space.coefficients_shape[1] + 3 * space.coefficients_shape[0] * space.coefficients_shape[1] + 1
-            paraLines = (paraEntries - 10) // 3 + 2
-            if np.mod(paraEntries - 10, 3) != 0:
-                paraLines += 1
-            f.write("     128%8d       0       0       1       0       0       000000001D%7d\n" % (Pcount, Dcount))
-            f.write(
-            "     128       0       2%8d       0                               0D%7d\n" % (paraLines, Dcount + 1)
-            )
-            Dcount += 2
-            Pcount += paraLines
-        Pcount  = 1
-        counter = 1
-        for surf in self.functions.values():
-            space = surf.space
-            f.write(
-                "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n"
-                % (128, space.coefficients_shape[0] - 1, space.coefficients_shape[1] - 1, space.degree[0], space.degree[1], Pcount, counter)
-            )
-            counter += 1
-            f.write("%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (0, 0, 1, 0, 0, Pcount, counter))
-
-            counter += 1
-            pos_counter = 0
-            knots_u = space.knots[space.knot_indices[0]]
-            knots_v = space.knots[space.knot_indices[1]]
-            for i in range(len(knots_u)):
-                pos_counter += 1
-                f.write("%20.12g," % (np.real(knots_u[i])))
-                if np.mod(pos_counter, 3) == 0:
-                    f.write("  %7dP%7d\n" % (Pcount, counter))
-                    counter += 1
-                    pos_counter = 0
-
-            for i in range(len(knots_v)):
-                pos_counter += 1
-                f.write("%20.12g," % (np.real(knots_v[i])))
-                if np.mod(pos_counter, 3) == 0:
-                    f.write("  %7dP%7d\n" % (Pcount, counter))
-                    counter += 1
-                    pos_counter = 0
-
-            for i in range(space.coefficients_shape[0] * space.coefficients_shape[1]):
-                pos_counter += 1
-                f.write("%20.12g," % (1.0))
-                if np.mod(pos_counter, 3) == 0:
-                    f.write("  %7dP%7d\n" % (Pcount, counter))
-                    counter += 1
-                    pos_counter = 0
-
-            for j in range(space.coefficients_shape[1]):
-                for i in range(space.coefficients_shape[0]):
-                    for idim in range(3):
-                        pos_counter += 1
-                        if isinstance(surf.coefficients, csdl.Variable):
-                            coefficients = surf.coefficients.value
-                        else:
-                            coefficients = surf.coefficients
-                        cntrl_pts = np.reshape(coefficients, (space.coefficients_shape[0], space.coefficients_shape[1],3))
-                        f.write("%20.12g," % (np.real(cntrl_pts[i, j, idim])))
-                        if np.mod(pos_counter, 3) == 0:
-                            f.write("  %7dP%7d\n" % (Pcount, counter))
-                            counter += 1
-                            pos_counter = 0
-
-            for i in range(4):
-                pos_counter += 1
-                if i == 0:
-                    f.write("%20.12g," % (np.real(knots_u[0])))
-                if i == 1:
-                    f.write("%20.12g," % (np.real(knots_u[1])))
-                if i == 2:
-                    f.write("%20.12g," % (np.real(knots_v[0])))
-                if i == 3:
-                    f.write("%20.12g;" % (np.real(knots_v[1])))
-                if np.mod(pos_counter, 3) == 0:
-                    f.write("  %7dP%7d\n" % (Pcount, counter))
-                    counter += 1
-                    pos_counter = 0
-                else:  
-                    if i == 3:
-                        for j in range(3 - pos_counter):
-                            f.write("%21s" % (" "))
-                        pos_counter = 0
-                        f.write("  %7dP%7d\n" % (Pcount, counter))
-                        counter += 1
-
-            Pcount += 2 
-        f.write('S%7dG%7dD%7dP%7d%40sT%6s1\n'%(1, 4, Dcount-1, counter-1, ' ', ' '))
-        f.close()  
+        with open(file_name, 'w', buffering=2**20) as f:
+            #TODO Change to correct information
+            f.write('                                                                        S      1\n')
+            f.write('1H,,1H;,7H128-000,11H128-000.IGS,9H{unknown},9H{unknown},16,6,15,13,15, G      1\n')
+            f.write('7H128-000,1.,6,1HM,8,0.016,15H19970830.165254, 0.0001,0.,               G      2\n')
+            f.write('21Hdennette@wiz-worx.com,23HLegacy PDD AP Committee,11,3,               G      3\n')
+            f.write('13H920717.080000,23HMIL-PRF-28000B0,CLASS 1;                            G      4\n')
+
+            # Directory entry section
+            directory_entry_lines = []
+            Dcount = 1
+            Pcount = 1
+            for surf in self.functions.values():
+                space = surf.space
+                num_coefficients = space.coefficients_shape[0] * space.coefficients_shape[1]
+                paraEntries = 13 + (len(space.knot_indices[0])) + (len(space.knot_indices[1])) + num_coefficients + 3 * num_coefficients + 1
+                paraLines = (paraEntries - 10) // 3 + 2
+                if np.mod(paraEntries - 10, 3) != 0:
+                    paraLines += 1
+                directory_entry_lines.append(
+                    "     128%8d       0       0       1       0       0       000000001D%7d\n" % (Pcount, Dcount))
+                directory_entry_lines.append(
+                    "     128       0       2%8d       0                               0D%7d\n" % (paraLines, Dcount + 1))
+                Dcount += 2
+                Pcount += paraLines
+            f.write(''.join(directory_entry_lines))
+
+            # Parameter data section
+            Pcount = 1
+            counter = 1
+            for surf in self.functions.values():
+                surface_lines, num_lines = _format_iges_surface_parameter_data(surf, Pcount, counter)
+                f.write(surface_lines)
+                counter += num_lines
+                Pcount += 2
+            f.write('S%7dG%7dD%7dP%7d%40sT%6s1\n'%(1, 4, Dcount-1, counter-1, ' ', ' '))
         print('Complete export')
 
-    def export_obj(self, file_name:str):
+    def export_obj(self, file_name:str, grid_resolution:tuple=(25,25), triangulate:bool=False, max_vertices_per_chunk:int=2**20):
         '''
-        Exports the geometry to an OBJ file.
+        Exports the geometry to an OBJ file as a (quad or triangle) mesh of each function evaluated on a parametric grid.
+        The functions are processed in chunks: the grids of all of the functions in a chunk are evaluated in one batched evaluation, the
+        connectivity is built with index arithmetic, and the vertices and faces of the chunk are formatted and written in bulk, so the
+        text of the whole file is never held in memory.
 
         Parameters
         ----------
         file_name : str
-            The name of the file to export to.
+            The name of the file to export to. Should have .obj extension.
+        grid_resolution : tuple = (25,25)
+            The number of grid points along each parametric direction of each function.
+        triangulate : bool = False
+            If True, each grid cell is split into two triangles. If False, quads are written.
+        max_vertices_per_chunk : int = 2**20
+            The (approximate) maximum number of vertices evaluated and formatted at a time.
         '''
-        
+        if isinstance(grid_resolution, int):
+            grid_resolution = (grid_resolution, grid_resolution)
+        num_u, num_v = grid_resolution
+        if num_u < 2 or num_v < 2:
+            raise ValueError(f'The grid resolution must be at least 2 in each direction, received {grid_resolution}.')
+        for function_index, function in self.functions.items():
+            if function.space.num_parametric_dimensions != 2:
+                raise ValueError(f'Only surfaces can be exported to OBJ, but function {function_index} has ' +
+                                 f'{function.space.num_parametric_dimensions} parametric dimensions.')
+
+        mesh_grid_u, mesh_grid_v = np.meshgrid(np.linspace(0., 1., num_u), np.linspace(0., 1., num_v), indexing='ij')
+        grid_parametric_coordinates = np.column_stack((mesh_grid_u.reshape((-1,)), mesh_grid_v.reshape((-1,))))
+        num_grid_points = num_u*num_v
+
+        # Connectivity of one grid (0-based), offset by the first vertex of each function when written
+        grid_indices = np.arange(num_grid_points).reshape((num_u, num_v))
+        quads = np.column_stack((grid_indices[:-1,:-1].reshape((-1,)), grid_indices[1:,:-1].reshape((-1,)),
+                                 grid_indices[1:,1:].reshape((-1,)), grid_indices[:-1,1:].reshape((-1,))))
+        if triangulate:
+            grid_faces = np.vstack((quads[:,[0,1,2]], quads[:,[0,2,3]]))
+            face_format = 'f %d %d %d\n'
+        else:
+            grid_faces = quads
+            face_format = 'f %d %d %d %d\n'
+
+        function_indices = list(self.functions.keys())
+        num_functions_per_chunk = max(1, max_vertices_per_chunk // num_grid_points)
+
+        print('Exporting', file_name)
+        vertex_offset = 1   # OBJ indices are 1-based
+        with open(file_name, 'w', buffering=2**20) as f:
+            f.write(f'# {self.name if self.name is not None else "geometry"}: {len(function_indices)} surfaces, ' +
+                    f'{num_u}x{num_v} vertices per surface\n')
+            for chunk_start in range(0, len(function_indices), num_functions_per_chunk):
+                chunk_function_indices = function_indices[chunk_start:chunk_start+num_functions_per_chunk]
+                parametric_coordinates = ParametricCoordinates(
+                    function_indices=np.repeat(chunk_function_indices, num_grid_points),
+                    parametric_coordinates=np.tile(grid_parametric_coordinates, (len(chunk_function_indices), 1)))
+                vertices = self.evaluate(parametric_coordinates, non_csdl=True).reshape((-1, 3))
+
+                f.write(('v %.12g %.12g %.12g\n' * vertices.shape[0]) % tuple(vertices.reshape((-1,)).tolist()))
+                for function_index in chunk_function_indices:
+                    function_name = self.function_names.get(function_index)
+                    function_name = '_'.join(str(function_name if function_name is not None else function_index).split())
+                    f.write(f'g {function_name}\n')
+                    faces = grid_faces + vertex_offset
+                    f.write((face_format * faces.shape[0]) % tuple(faces.reshape((-1,)).tolist()))
+                    vertex_offset += num_grid_points
+        print('Complete export')
+
+
+def _compute_grid_quad_faces(num_points_u:int, num_points_v:int) -> np.ndarray:
+    '''
+    Computes the quad faces (vertex indices) of a structured grid of vertices that is flattened in row-major (u, v) order.
+
+    Parameters
+    ----------
+    num_points_u : int
+        The number of vertices along the first grid direction.
+    num_points_v : int
+        The number of vertices along the second grid direction.
+
+    Returns
+    -------
+    faces : np.ndarray -- shape=((num_points_u-1)*(num_points_v-1), 4)
+        The vertex indices of each face, ordered by cell (u major).
+    '''
+    grid_indices = np.arange(num_points_u*num_points_v).reshape((num_points_u, num_points_v))
+    return np.column_stack((grid_indices[:-1,:-1].reshape((-1,)), grid_indices[:-1,1:].reshape((-1,)),
+                            grid_indices[1:,1:].reshape((-1,)), grid_indices[1:,:-1].reshape((-1,))))
+
+
+def _format_iges_surface_parameter_data(surf:lfs.Function, Pcount:int, counter:int) -> tuple[str, int]:
+    '''
+    Formats the parameter data lines of one IGES rational B-spline surface entity.
+
+    Parameters
+    ----------
+    surf : lfs.Function
+        The (B-spline surface) function.
+    Pcount : int
+        The directory entry pointer written on each line.
+    counter : int
+        The sequence number of the first line.
+
+    Returns
+    -------
+    surface_lines : str
+        The formatted lines.
+    num_lines : int
+        The number of lines.
+    '''
+    space = surf.space
+    coefficients = surf.coefficients.value if isinstance(surf.coefficients, csdl.Variable) else surf.coefficients
+    cntrl_pts = np.reshape(coefficients, (space.coefficients_shape[0], space.coefficients_shape[1], 3))
+    knots_u = space.knots[space.knot_indices[0]]
+    knots_v = space.knots[space.knot_indices[1]]
+
+    header_lines = "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (
+        128, space.coefficients_shape[0] - 1, space.coefficients_shape[1] - 1, space.degree[0], space.degree[1], Pcount, counter)
+    header_lines += "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (0, 0, 1, 0, 0, Pcount, counter + 1)
+    counter += 2
+
+    # Knots, weights, control points (v index outermost), and the parametric bounds, 3 entries of 21 characters per line.
+    values = np.real(np.concatenate((
+        knots_u, knots_v, np.ones(space.coefficients_shape[0] * space.coefficients_shape[1]),
+        np.transpose(cntrl_pts, (1, 0, 2)).reshape((-1,)), knots_u[:2], knots_v[:2]))).astype(float)
+    entries = (("%20.12g," * (values.size - 1)) + "%20.12g;") % tuple(values.tolist())
+    num_lines = -(-values.size // 3)
+    entries = entries.ljust(num_lines * 63)
+
+    line_data = []
+    for i in range(num_lines):
+        line_data += [entries[i*63:(i+1)*63], Pcount, counter + i]
+    parameter_lines = ("%s  %7dP%7d\n" * num_lines) % tuple(line_data)
+    return header_lines + parameter_lines, num_lines + 2
+
+
+def _get_refit_parameter(parameter:Union[tuple,dict[int,tuple]], num_parametric_dimensions:int, parameter_name:str) -> tuple:
+    '''
+    Returns the refit parameter (fit resolution, number of coefficients, or degree) for functions with the given number of parametric
+    dimensions.
+    '''
+    if isinstance(parameter, dict):
+        if num_parametric_dimensions not in parameter:
+            raise ValueError(f'The geometry has functions with {num_parametric_dimensions} parametric dimensions, but {parameter_name} ' +
+                             f'is only given for {sorted(parameter)} parametric dimensions.')
+        parameter = parameter[num_parametric_dimensions]
+    parameter = tuple(parameter)
+    if len(parameter) != num_parametric_dimensions:
+        raise ValueError(f'{parameter_name} has {len(parameter)} entries, but the geometry has functions with {num_parametric_dimensions} ' +
+                         f'parametric dimensions. Pass a dictionary keyed by the number of parametric dimensions to refit ' +
+                         'functions with different numbers of parametric dimensions.')
+    return parameter
+
+
+def _stack_evaluation_matrices(evaluation_matrices:list[tuple[sps.csr_matrix,list[int]]],
+                               coefficients_sizes:dict[int,int]) -> tuple[sps.csr_matrix,list[int]]:
+    '''
+    Stacks evaluation matrices (see Geometry.compute_evaluation_matrix) that multiply the coefficients of different sets of functions.
+    The columns of each matrix are moved to the columns of its functions in the union of the function indices.
+    '''
+    function_indices = list(dict.fromkeys(function_index for _, matrix_function_indices in evaluation_matrices
+                                          for function_index in matrix_function_indices))
+    column_offsets = dict(zip(function_indices, np.cumsum([0] + [coefficients_sizes[i] for i in function_indices[:-1]])))
+
+    stacked_matrices = []
+    for evaluation_matrix, matrix_function_indices in evaluation_matrices:
+        column_map = np.concatenate([np.arange(column_offsets[i], column_offsets[i] + coefficients_sizes[i])
+                                     for i in matrix_function_indices])
+        evaluation_matrix = evaluation_matrix.tocoo()
+        stacked_matrices.append(sps.coo_matrix((evaluation_matrix.data, (evaluation_matrix.row, column_map[evaluation_matrix.col])),
+                                               shape=(evaluation_matrix.shape[0], sum(coefficients_sizes[i] for i in function_indices))))
+    return sps.vstack(stacked_matrices, format='csr'), function_indices
+
+
+def _get_space_data(space:lfs.FunctionSpace) -> tuple:
+    '''
+    Returns the data that defines a function space (used for hashing).
+    '''
+    if isinstance(space, lfs.BSplineSpace):
+        knots = np.hstack(space.knots) if isinstance(space.knots, (tuple, list)) else np.asarray(space.knots)
+        return (type(space).__name__, tuple(space.degree), tuple(space.coefficients_shape), knots)
+    return (type(space).__name__, vars(space))
+
 
 # if __name__ == "__main__":
 #     from lsdo_geo.core.geometry.geometry_functions import import_geometry
@@ -503,7 +1093,7 @@ class Geometry(lfs.FunctionSet):
 #     geometry = import_geometry('lsdo_geo/splines/b_splines/sample_geometries/rectangular_wing.stp', parallelize=False)
 #     # geometry = import_geometry('lsdo_geo/splines/b_splines/sample_geometries/lift_plus_cruise_final.stp')
 #     t2 = time.time()
-#     geometry.refit(parallelize=False, fit_resolution=(50,50))
+#     geometry.refit_in_place(parallelize=False, fit_resolution=(50,50))
 #     t3 = time.time()
 #     # geometry.find_connections() # NOTE: This is really really slow for large geometries. Come back to this.
 #     t4 = time.time()
@@ -981,4 +1571,5 @@ class Geometry(lfs.FunctionSet):
 #     '''
 
 
-#     print('hi')
\ No newline at end of file
+#     print('hi')
+
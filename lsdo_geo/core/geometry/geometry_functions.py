@@ -2,27 +2,152 @@ import lsdo_geo
 import csdl_alpha as csdl
 import numpy as np
 import lsdo_function_spaces as lfs
+from lsdo_geo.utils import caching_functions
 
 
-def import_geometry(file_name:str, name:str='geometry', parallelize:bool=False, scale:int=1.0) -> lsdo_geo.Geometry:
+def import_geometry(file_name:str, name:str='geometry', parallelize:bool=False, scale:int=1.0, use_cache:bool=True,
+                    max_cache_size:int=None) -> lsdo_geo.Geometry:
     '''
     Imports geometry from a file.
 
+    The parsed geometry is stored in lsdo_geo.IMPORT_FOLDER under a hash of the file contents and the scale, so re-importing an
+    unchanged file skips the parsing step. Cache hits and misses are counted by lsdo_geo.get_cache_statistics('imports').
+
     Parameters
     ----------
     file_name : str
         The name of the file (with path) that containts the geometric information.
+    name : str = 'geometry'
+        The name of the geometry.
+    parallelize : bool = False
+        Whether or not to parallelize the import (only used if the file is parsed).
+    scale : float = 1.0
+        The factor that the coefficients are scaled by.
+    use_cache : bool = True
+        Whether or not to load from/store to the import cache.
+    max_cache_size : int = None
+        The maximum size of the import cache in bytes. Least recently used entries are evicted past this size.
+        If None, lsdo_geo.IMPORT_CACHE_MAX_SIZE is used.
     '''
-    
+    if use_cache:
+        cache_key = caching_functions.hash_data(caching_functions.hash_file(file_name), float(scale))
+        geometry = _load_cached_import(cache_key, name=name)
+        caching_functions.record_cache_access('imports', hit=geometry is not None)
+        if geometry is not None:
+            return geometry
+
     function_set = lfs.import_file(file_name, parallelize=parallelize)
     if scale != 1.0:
         for function in function_set.functions.values():
             function.coefficients = csdl.Variable(value=function.coefficients.value * scale)
     geometry = lsdo_geo.Geometry(functions=function_set.functions, function_names=function_set.function_names, name=name, space=function_set.space)
+
+    if use_cache:
+        _store_cached_import(cache_key, geometry)
+        if max_cache_size is None:
+            max_cache_size = lsdo_geo.IMPORT_CACHE_MAX_SIZE
+        caching_functions.evict_cache_entries(lsdo_geo.IMPORT_FOLDER, max_cache_size, cache_name='imports')
     return geometry
 
 
-def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Variable, angles:csdl.Variable, units:str='radians') -> csdl.Variable:
+def _store_cached_import(cache_key:str, geometry:lsdo_geo.Geometry):
+    '''
+    Stores the spaces, knot vectors, and coefficients of an imported geometry as a small header and two flat .npy arrays.
+    '''
+    header = []
+    coefficients = []
+    knots = []
+    coefficients_offset = 0
+    knots_offset = 0
+    for i, function in geometry.functions.items():
+        space = function.space
+        if not isinstance(space, lfs.BSplineSpace):
+            return  # Only B-spline spaces are cached.
+        function_coefficients = function.coefficients.value.reshape((-1,))
+        if isinstance(space.knots, (tuple, list)):
+            knot_vectors = [np.asarray(knot_vector) for knot_vector in space.knots]
+        else:
+            knot_vectors = [np.asarray(space.knots[space.knot_indices[j]]) for j in range(space.num_parametric_dimensions)]
+        header.append({
+            'index':i,
+            'name':geometry.function_names[i],
+            'degree':tuple(space.degree),
+            'coefficients_shape':tuple(space.coefficients_shape),
+            'shape':function.coefficients.shape,
+            'coefficients_slice':(coefficients_offset, coefficients_offset + function_coefficients.size),
+            'knots_slices':[(knots_offset + sum(len(k) for k in knot_vectors[:j]),
+                             knots_offset + sum(len(k) for k in knot_vectors[:j+1])) for j in range(len(knot_vectors))],
+        })
+        coefficients.append(function_coefficients)
+        knots.extend(knot_vectors)
+        coefficients_offset += function_coefficients.size
+        knots_offset += sum(len(k) for k in knot_vectors)
+
+    caching_functions.save_array(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_coefficients.npy', np.hstack(coefficients))
+    caching_functions.save_array(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_knots.npy', np.hstack(knots))
+    caching_functions.save_pickle(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_header.pickle', header)   # written last: marks the entry complete
+
+
+def _load_cached_import(cache_key:str, name:str) -> lsdo_geo.Geometry:
+    '''
+    Loads a geometry stored by _store_cached_import. Returns None if the entry does not exist.
+    '''
+    header = caching_functions.load_pickle(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_header.pickle')
+    if header is None:
+        return None
+    coefficients = caching_functions.load_array(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_coefficients.npy', mmap=True)
+    knots = caching_functions.load_array(lsdo_geo.IMPORT_FOLDER / f'{cache_key}_knots.npy', mmap=True)
+    if coefficients is None or knots is None:
+        return None
+
+    spaces = {}     # Surfaces with identical knot vectors share a space, as in lfs.import_file
+    functions = {}
+    function_names = {}
+    for entry in header:
+        space_knots = np.hstack([knots[start:end] for start, end in entry['knots_slices']])
+        space_key = (entry['degree'], entry['coefficients_shape'], space_knots.tobytes())
+        if space_key not in spaces:
+            spaces[space_key] = lfs.BSplineSpace(num_parametric_dimensions=len(entry['degree']), degree=entry['degree'],
+                                                 coefficients_shape=entry['coefficients_shape'], knots=space_knots)
+        start, end = entry['coefficients_slice']
+        function_coefficients = csdl.Variable(value=np.array(coefficients[start:end]).reshape(entry['shape']))
+        functions[entry['index']] = lfs.Function(space=spaces[space_key], coefficients=function_coefficients, name=entry['name'])
+        function_names[entry['index']] = entry['name']
+
+    function_set = lfs.FunctionSet(functions=functions, function_names=function_names, name=name)
+    return lsdo_geo.Geometry(functions=function_set.functions, function_names=function_set.function_names, name=name, space=function_set.space)
+
+
+def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Variable, angles:csdl.Variable, units:str='radians',
+           batched:bool=True) -> csdl.Variable:
+    '''
+    Rotates points about an axis.
+
+    Parameters
+    ----------
+    points : csdl.Variable -- shape=(num_points,3)
+        The points to rotate.
+    axis_origin : csdl.Variable -- shape=(3,) or (num_rotations,3)
+        The origin of the axis of rotation.
+    axis_vector : csdl.Variable -- shape=(3,) or (num_rotations,3)
+        The vector of the axis of rotation. Several axes can be given to rotate about each of them in the same call.
+    angles : csdl.Variable -- shape=(1,) or (num_rotations,)
+        The angles of rotation.
+    units : str = 'radians'
+        The units of the angles. {degrees, radians} The units apply to every path, including the axis-aligned rotation matrices.
+    batched : bool = True
+        If True, all of the rotations are applied with a single rotation tensor (see compute_rotation_tensor), or with a single rotation
+        matrix (see compute_rotation_matrix) for one rotation, so the size of the graph does not grow with the number of rotations. If
+        False, the quaternion product is applied one angle at a time.
+        NOTE: The paths only differ for an axis vector that is not a unit vector. The batched path normalizes the axis vector, so it
+            rotates by exactly the given angle. The quaternion product normalizes the quaternion instead, which changes the angle of
+            the rotation.
+
+    Returns
+    -------
+    csdl.Variable -- shape=(num_points,3) or (num_rotations,num_points,3)
+        The rotated points.
+    '''
     points_out_shape = None
     if len(points.shape) == 1:
         # print("Rotating points is in vector format, so rotation is assuming 3d and reshaping into (-1,3)")
@@ -38,7 +163,11 @@ def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Var
         axis_origin = csdl.Variable(shape=axis_origin.shape, value=axis_origin)
     
     # If axis vector is aligned with x, y, or z axis, then instead using rotation matrix (more efficient)
-    if isinstance(axis_vector, np.ndarray):
+    if isinstance(axis_vector, np.ndarray) and axis_vector.size == 3 and np.size(angles) == 1:
+        axis_vector = axis_vector.reshape((3,))
+        if units == 'degrees':
+            angles = angles * np.pi / 180
+            units = 'radians'
         origin_expanded = csdl.expand(axis_origin, points.shape, 'i->ji')
         if np.allclose(axis_vector, np.array([1,0,0])) or np.allclose(axis_vector, np.array([-1,0,0])):
             if np.allclose(axis_vector, np.array([-1,0,0])):
@@ -79,7 +208,7 @@ def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Var
             rotated_points = rotated_points + origin_expanded
             return rotated_points
         elif np.allclose(axis_vector, np.array([0,0,1])) or np.allclose(axis_vector, np.array([0,0,-1])):
-            if np.allclose(axis_vector, np.array([0,-1,0])):
+            if np.allclose(axis_vector, np.array([0,0,-1])):
                 angles = -angles
             # rotation_matrix = np.array([[np.cos(angles), -np.sin(angles), 0],
             #                             [np.sin(angles), np.cos(angles), 0],
@@ -99,6 +228,40 @@ def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Var
             return rotated_points
 
 
+    if batched and np.size(angles) == 1 and np.size(axis_vector) == 3 and axis_origin.size == 3:
+        # Single rotation about an arbitrary axis: Rodrigues' formula gives the matrix directly
+        rotation_matrix = compute_rotation_matrix(axis_vector=axis_vector, angle=angles, units=units)
+        origin_expanded = csdl.expand(axis_origin.reshape((3,)), points.shape, 'i->ji')
+        rotated_points = csdl.matmat(points - origin_expanded, rotation_matrix.T())
+        rotated_points = rotated_points + origin_expanded
+        if points_out_shape is not None:
+            rotated_points = rotated_points.reshape(points_out_shape)
+        return rotated_points
+
+    if batched:
+        rotation_tensor = compute_rotation_tensor(axis_vector=axis_vector, angles=angles, units=units)
+        num_rotations = rotation_tensor.shape[0]
+        if axis_origin.size == 3:
+            points_wrt_axis = points - csdl.expand(axis_origin.reshape((3,)), points.shape, 'i->ji')
+            rotated_points = csdl.einsum(points_wrt_axis, rotation_tensor, action='pj,kij->kpi')
+            rotated_points = rotated_points + csdl.expand(axis_origin.reshape((3,)), rotated_points.shape, 'i->kpi')
+        else:
+            axis_origin = axis_origin.reshape((axis_origin.size//3, 3))
+            if axis_origin.shape[0] != num_rotations:
+                raise ValueError(f'The number of axis origins ({axis_origin.shape[0]}) does not match the number of rotations ({num_rotations}).')
+            expanded_points = csdl.expand(points, (num_rotations,) + points.shape, 'pi->kpi')
+            expanded_origins = csdl.expand(axis_origin, expanded_points.shape, 'ki->kpi')
+            rotated_points = csdl.einsum(expanded_points - expanded_origins, rotation_tensor, action='kpj,kij->kpi')
+            rotated_points = rotated_points + expanded_origins
+
+        if num_rotations == 1:
+            rotated_points = rotated_points.reshape(points.shape)
+            if points_out_shape is not None:
+                rotated_points = rotated_points.reshape(points_out_shape)
+        elif points_out_shape is not None:
+            rotated_points = rotated_points.reshape((num_rotations,) + points_out_shape)
+        return rotated_points
+
     if isinstance(axis_vector, np.ndarray):
         axis_vector = csdl.Variable(shape=axis_vector.shape, value=axis_vector)
 
@@ -174,6 +337,119 @@ def rotate(points:csdl.Variable, axis_origin:csdl.Variable, axis_vector:csdl.Var
     return rotated_points
 
 
+def compute_rotation_matrix(axis_vector:csdl.Variable, angle:csdl.Variable, units:str='radians') -> csdl.Variable:
+    '''
+    Computes the matrix of a rotation about an arbitrary axis using Rodrigues' formula:
+    R = cos(angle)*I + sin(angle)*K + (1 - cos(angle))*a*a^T, where a is the unit axis vector and K is its cross product matrix.
+
+    Parameters
+    ----------
+    axis_vector : csdl.Variable -- shape=(3,)
+        The vector of the axis of rotation (it does not need to be normalized). If it is a NumPy array, K and a*a^T are constants.
+    angle : csdl.Variable -- shape=(1,)
+        The angle of rotation.
+    units : str = 'radians'
+        The units of the angle. {degrees, radians}
+
+    Returns
+    -------
+    csdl.Variable -- shape=(3,3)
+        The rotation matrix. rotation_matrix @ point rotates a point about the axis.
+    '''
+    if isinstance(angle, (float, int)):
+        angle = csdl.Variable(shape=(1,), value=angle)
+    elif isinstance(angle, np.ndarray):
+        angle = csdl.Variable(shape=angle.shape, value=angle)
+    angle = angle.reshape((1,))
+    if units == 'degrees':
+        angle = angle * np.pi / 180
+    elif units != 'radians':
+        raise ValueError(f'Invalid units {units}.')
+
+    cos_angle = csdl.cos(angle)
+    sin_angle = csdl.sin(angle)
+
+    if isinstance(axis_vector, np.ndarray):
+        unit_axis_vector = axis_vector.reshape((3,)) / np.linalg.norm(axis_vector)
+        cross_product_matrix = np.einsum('ijk,k->ij', _LEVI_CIVITA_MATRIX.reshape((3,3,3)), -unit_axis_vector)
+        outer_product = np.outer(unit_axis_vector, unit_axis_vector)
+        rotation_matrix = cos_angle*(np.eye(3) - outer_product) + sin_angle*cross_product_matrix + outer_product
+    else:
+        axis_vector = axis_vector.reshape((3,))
+        unit_axis_vector = axis_vector / csdl.norm(axis_vector)
+        cross_product_matrix = csdl.matvec(csdl.Variable(value=-_LEVI_CIVITA_MATRIX), unit_axis_vector).reshape((3,3))
+        outer_product = csdl.expand(unit_axis_vector, (3,3), 'i->ij') * csdl.expand(unit_axis_vector, (3,3), 'j->ij')
+        rotation_matrix = cos_angle*(-outer_product + np.eye(3)) + sin_angle*cross_product_matrix + outer_product
+    return rotation_matrix
+
+
+_LEVI_CIVITA_MATRIX = np.zeros((9,3))    # Levi-Civita symbol reshaped so that (matrix @ a)[3*i+j] = eps_ijk*a_k
+for _i, _j, _k in [(0,1,2), (1,2,0), (2,0,1)]:
+    _LEVI_CIVITA_MATRIX[3*_i+_j, _k] = 1.
+    _LEVI_CIVITA_MATRIX[3*_j+_i, _k] = -1.
+
+
+def compute_rotation_tensor(axis_vector:csdl.Variable, angles:csdl.Variable, units:str='radians') -> csdl.Variable:
+    '''
+    Computes the rotation matrices for a set of axes and angles from the components of the corresponding unit quaternions. The number of
+    operations does not depend on the number of rotations.
+
+    Parameters
+    ----------
+    axis_vector : csdl.Variable -- shape=(3,) or (num_rotations,3)
+        The vectors of the axes of rotation (they do not need to be normalized).
+    angles : csdl.Variable -- shape=(1,) or (num_rotations,)
+        The angles of rotation. A single angle is applied about every axis, and a single axis is used for every angle.
+    units : str = 'radians'
+        The units of the angles. {degrees, radians}
+
+    Returns
+    -------
+    csdl.Variable -- shape=(num_rotations,3,3)
+        The rotation matrices. rotation_tensor[k] @ point rotates a point about the k-th axis by the k-th angle.
+    '''
+    if isinstance(angles, (float, int)):
+        angles = csdl.Variable(shape=(1,), value=angles)
+    elif isinstance(angles, np.ndarray):
+        angles = csdl.Variable(shape=angles.shape, value=angles)
+    angles = angles.reshape((angles.size,))
+    if units == 'degrees':
+        angles = angles * np.pi / 180
+    elif units != 'radians':
+        raise ValueError(f'Invalid units {units}.')
+
+    if isinstance(axis_vector, np.ndarray):
+        axis_vector = csdl.Variable(shape=axis_vector.shape, value=axis_vector)
+    axis_vector = axis_vector.reshape((axis_vector.size//3, 3))
+
+    num_axes = axis_vector.shape[0]
+    num_angles = angles.shape[0]
+    if num_axes != num_angles and num_axes != 1 and num_angles != 1:
+        raise ValueError(f'The number of axes ({num_axes}) and the number of angles ({num_angles}) must be equal or one of them must be 1.')
+    num_rotations = max(num_axes, num_angles)
+    if num_angles != num_rotations:
+        angles = csdl.expand(angles, (num_rotations, 1), 'i->ji').reshape((num_rotations,))
+    if num_axes != num_rotations:
+        axis_vector = csdl.expand(axis_vector.reshape((3,)), (num_rotations, 3), 'i->ji')
+
+    unit_axis_vector = axis_vector / csdl.expand(csdl.norm(axis_vector, axes=(1,)), axis_vector.shape, 'i->ij')
+
+    half_angles = angles / 2
+    sin_half_angles = csdl.sin(half_angles)
+    w = csdl.cos(half_angles)
+    x = sin_half_angles * unit_axis_vector[:,0]
+    y = sin_half_angles * unit_axis_vector[:,1]
+    z = sin_half_angles * unit_axis_vector[:,2]
+
+    rotation_tensor = csdl.vstack((
+        1 - 2*(y*y + z*z), 2*(x*y - z*w), 2*(x*z + y*w),
+        2*(x*y + z*w), 1 - 2*(x*x + z*z), 2*(y*z - x*w),
+        2*(x*z - y*w), 2*(y*z + x*w), 1 - 2*(x*x + y*y)
+    ))
+    rotation_tensor = rotation_tensor.T().reshape((num_rotations, 3, 3))
+    return rotation_tensor
+
+
 def vectorized_hamiltonion_product_1(q1:csdl.Variable, q2:csdl.Variable) -> csdl.Variable:
     # q1 = q1.reshape((4,))
     # q2 = q2.reshape((4,))
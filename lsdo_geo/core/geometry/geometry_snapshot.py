@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import csdl_alpha as csdl
+import lsdo_function_spaces as lfs
+
+
+SNAPSHOT_MAGIC = b'LSDOGEO\x00'
+SNAPSHOT_VERSION = 1
+_DATA_ALIGNMENT = 64    # bytes
+
+
+class MemoryMappedFunction(lfs.Function):
+    '''
+    A function whose coefficients are read from a geometry snapshot only when they are first accessed.
+    Until then, the coefficients are a (read-only, memory-mapped) view of the snapshot file and no CSDL variable is created.
+    The function is materialized (lfs.Function.__init__ is run with the coefficients as a new CSDL variable, so it becomes a regular
+    function) the first time the coefficients or any other attribute that lfs.Function.__init__ sets are accessed, or when new
+    coefficients are assigned. The CSDL variable is created in the graph of the recorder that was active when the snapshot was loaded, so
+    the coefficients must be first accessed while that recorder is active.
+
+    Parameters
+    ----------
+    space : lfs.FunctionSpace
+        The function space in which the function resides.
+    coefficients_data : np.ndarray -- shape=coefficients_shape
+        The (memory-mapped) coefficients.
+    name : str = None
+        The name of the function.
+    '''
+    def __init__(self, space:lfs.FunctionSpace, coefficients_data:np.ndarray, name:str=None):
+        # NOTE: lfs.Function.__init__ turns the coefficients into a CSDL variable, so it is deferred until the function is materialized.
+        self.space = space
+        self.name = name
+        self.coefficients_data = coefficients_data
+        self._coefficients = None
+        self._recorder = csdl.get_current_recorder()
+
+    def _materialize(self, coefficients:csdl.Variable=None):
+        if coefficients is None:
+            if csdl.get_current_recorder() is not self._recorder:
+                raise RuntimeError(f'The coefficients of function {self.name} must be first accessed while the recorder that was active ' +
+                                   'when the geometry snapshot was loaded is active (or load the snapshot with mmap=False).')
+            coefficients = csdl.Variable(value=np.array(self.coefficients_data))
+        self._coefficients = coefficients   # Marks the function as materialized, so the coefficients setter only assigns from here on
+        lfs.Function.__init__(self, space=self.space, coefficients=coefficients, name=self.name)
+
+    def __getattr__(self, name:str):
+        # Only called for attributes that are not set. Before the function is materialized, these are the ones lfs.Function.__init__ sets.
+        if name.startswith('__') or self.__dict__.get('_coefficients', True) is not None:
+            raise AttributeError(f'{type(self).__name__} object has no attribute {name}')
+        self._materialize()
+        return getattr(self, name)
+
+    @property
+    def coefficients(self) -> csdl.Variable:
+        if self._coefficients is None:
+            self._materialize()
+        return self._coefficients
+
+    @coefficients.setter
+    def coefficients(self, coefficients:csdl.Variable):
+        if self._coefficients is None:
+            self._materialize(coefficients)
+        else:
+            self._coefficients = coefficients
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._coefficients is not None
+
+
+def save_geometry_snapshot(file_name:Union[str,Path], functions:dict[int,lfs.Function], function_names:dict[int,str], name:str=None):
+    '''
+    Saves the functions of a geometry to a single flat binary file: a magic string, the size of a JSON header (function names, degrees,
+    coefficient shapes, and the offsets of the knots and coefficients), the header, and then the knots and coefficients as little-endian
+    float64 arrays that each start on a 64 byte boundary. The file is written (and synced) to a temporary file in the same folder first
+    and then moved into place, so readers never see a partially written snapshot.
+
+    Parameters
+    ----------
+    file_name : Union[str, Path]
+        The name of the file (with path).
+    functions : dict[int,lfs.Function]
+        The functions to save. Only B-spline functions are supported.
+    function_names : dict[int,str]
+        The names of the functions.
+    name : str = None
+        The name of the geometry.
+    '''
+    entries = []
+    arrays = []
+    offset = 0
+    for function_index, function in functions.items():
+        space = function.space
+        if not isinstance(space, lfs.BSplineSpace):
+            raise ValueError(f'Only B-spline functions can be saved to a geometry snapshot, but function {function_index} is in a ' +
+                             f'{type(space).__name__}.')
+        knots = np.hstack(space.knots) if isinstance(space.knots, (tuple, list)) else np.asarray(space.knots)
+        if isinstance(function, MemoryMappedFunction) and not function.is_materialized:
+            coefficients = function.coefficients_data
+        else:
+            coefficients = function.coefficients.value if isinstance(function.coefficients, csdl.Variable) else function.coefficients
+        knots = np.asarray(knots, dtype='<f8').reshape((-1,))
+        coefficients = np.asarray(coefficients, dtype='<f8')
+
+        knots_offset = offset
+        coefficients_offset = knots_offset + _get_padded_size(knots.size)
+        offset = coefficients_offset + _get_padded_size(coefficients.size)
+        entries.append({
+            'index':int(function_index),
+            'name':function_names.get(function_index, function.name),
+            'degree':[int(degree) for degree in space.degree],
+            'coefficients_shape':[int(size) for size in space.coefficients_shape],
+            'knots':[knots_offset, knots.size],
+            'coefficients':[coefficients_offset, list(coefficients.shape)],
+        })
+        arrays += [knots, coefficients]
+
+    header = json.dumps({'version':SNAPSHOT_VERSION, 'name':name, 'functions':entries}).encode('utf-8')
+    data_offset = len(SNAPSHOT_MAGIC) + 8 + len(header)
+    padding = (-data_offset) % _DATA_ALIGNMENT
+
+    file_path = Path(file_name)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=file_path.parent, prefix=file_path.name, suffix='.tmp', delete=False) as f:
+        try:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(np.array(len(header) + padding, dtype='<u8').tobytes())
+            f.write(header + b' '*padding)
+            for array in arrays:
+                f.write(np.ascontiguousarray(array).tobytes())
+                f.write(bytes(_get_padded_size(array.size)*8 - array.nbytes))
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, file_path)
+
+
+def _get_padded_size(size:int) -> int:
+    '''
+    Returns the number of float64 entries that an array of the given size takes up in a snapshot (so that every array starts on a
+    _DATA_ALIGNMENT byte boundary).
+    '''
+    entries_per_alignment = _DATA_ALIGNMENT//8
+    return -(-size//entries_per_alignment)*entries_per_alignment
+
+
+def load_geometry_snapshot(file_name:Union[str,Path], mmap:bool=True) -> tuple[dict[int,lfs.Function], dict[int,str], str]:
+    '''
+    Loads the functions saved by save_geometry_snapshot.
+
+    Parameters
+    ----------
+    file_name : Union[str, Path]
+        The name of the file (with path).
+    mmap : bool = True
+        If True, the data is memory-mapped and the coefficients of each function are only read (and turned into a CSDL variable) when
+        they are first accessed. If False, the data is read into memory and every function's coefficients are created immediately.
+
+    Returns
+    -------
+    functions : dict[int,lfs.Function]
+        The functions.
+    function_names : dict[int,str]
+        The names of the functions.
+    name : str
+        The name of the geometry.
+    '''
+    with open(file_name, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f'{file_name} is not a geometry snapshot.')
+        header_size = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    if header['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported geometry snapshot version {header["version"]} (expected {SNAPSHOT_VERSION}).')
+
+    data_offset = len(SNAPSHOT_MAGIC) + 8 + header_size
+    if os.path.getsize(file_name) == data_offset:     # An empty geometry has no data (and a zero-length memory map is not allowed)
+        data = np.zeros((0,), dtype='<f8')
+    elif mmap:
+        data = np.memmap(file_name, dtype='<f8', mode='r', offset=data_offset)
+    else:
+        data = np.fromfile(file_name, dtype='<f8', offset=data_offset)
+
+    spaces = {}     # Functions with identical knot vectors share a space, as in import_geometry
+    functions = {}
+    function_names = {}
+    for entry in header['functions']:
+        knots_offset, num_knots = entry['knots']
+        knots = np.array(data[knots_offset:knots_offset+num_knots])
+        degree = tuple(entry['degree'])
+        coefficients_shape = tuple(entry['coefficients_shape'])
+        space_key = (degree, coefficients_shape, knots.tobytes())
+        if space_key not in spaces:
+            spaces[space_key] = lfs.BSplineSpace(num_parametric_dimensions=len(degree), degree=degree,
+                                                 coefficients_shape=coefficients_shape, knots=knots)
+
+        coefficients_offset, shape = entry['coefficients']
+        coefficients_data = data[coefficients_offset:coefficients_offset+int(np.prod(shape))].reshape(shape)
+        if mmap:
+            function = MemoryMappedFunction(space=spaces[space_key], coefficients_data=coefficients_data, name=entry['name'])
+        else:
+            function = lfs.Function(space=spaces[space_key], coefficients=csdl.Variable(value=coefficients_data), name=entry['name'])
+        functions[entry['index']] = function
+        function_names[entry['index']] = entry['name']
+
+    return functions, function_names, header['name']
@@ -1,13 +1,15 @@
 from dataclasses import dataclass
+from typing import Union
 
 import numpy as np
 import lsdo_geo
+from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
 
 
 @dataclass
 class Mesh:
     geometry : lsdo_geo.Geometry
-    parametric_coordinates: list[tuple[int,np.ndarray]]
+    parametric_coordinates: Union[list[tuple[int,np.ndarray]],ParametricCoordinates]
     mesh_counter = 0
     name : str = None
 
@@ -16,6 +18,48 @@ class Mesh:
             self.name = f'mesh_{Mesh.mesh_counter}'
             Mesh.mesh_counter += 1
 
+        self.evaluation_matrix = None
+        self.evaluation_function_indices = None
+        self._evaluation_matrix_spaces = None
+
+    def __setattr__(self, name, value):
+        if name == 'parametric_coordinates':
+            # NOTE: Reassigning the parametric coordinates marks the evaluation matrix as out of date.
+            object.__setattr__(self, '_evaluation_matrix_dirty', True)
+        object.__setattr__(self, name, value)
+
+    def invalidate_evaluation_matrix(self):
+        '''
+        Marks the evaluation matrix as out of date. This must be called after modifying the parametric coordinates in place (reassigning
+        them is detected automatically).
+        '''
+        self._evaluation_matrix_dirty = True
+
+    def get_evaluation_matrix(self, geometry:lsdo_geo.Geometry):
+        '''
+        Returns the sparse matrix that maps the (stacked, flattened) geometry coefficients to the flattened mesh points.
+        The matrix is assembled the first time it is needed and is only reassembled if the parametric coordinates are reassigned (or
+        invalidate_evaluation_matrix is called after modifying them in place), or if a function they lie on is given a new space (for
+        instance by refit_in_place). The spaces are compared by identity, so checking the matrix does not depend on the number of points.
+
+        Parameters
+        ----------
+        geometry : lsdo_geo.Geometry
+            The geometry object that the mesh will be evaluated on.
+        '''
+        if self.evaluation_matrix is None or self._evaluation_matrix_dirty or not self._spaces_are_unchanged(geometry):
+            self.evaluation_matrix, self.evaluation_function_indices = geometry.compute_evaluation_matrix(self.parametric_coordinates)
+            self._evaluation_matrix_spaces = [(i, geometry.functions[i].space) for i in self.evaluation_function_indices]
+            self._evaluation_matrix_dirty = False
+        return self.evaluation_matrix, self.evaluation_function_indices
+
+    def _spaces_are_unchanged(self, geometry:lsdo_geo.Geometry) -> bool:
+        for i, space in self._evaluation_matrix_spaces:
+            function = geometry.functions.get(i)
+            if function is None or function.space is not space:
+                return False
+        return True
+
     def evaluate(self, geometry:lsdo_geo.Geometry, plot:bool=False):
         '''
         Overload this method with the process to generate the mesh from the parametric coordinates.
@@ -33,5 +77,8 @@ class Mesh:
             The mesh generated from the parametric coordinates.        
         '''
         self.geometry = geometry
-        mesh = self.geometry.evaluate(self.parametric_coordinates, plot=plot)
+        evaluation_matrix, function_indices = self.get_evaluation_matrix(geometry)
+        mesh = self.geometry.evaluate_with_evaluation_matrix(evaluation_matrix, function_indices)
+        if plot:
+            self.geometry.evaluate(self.parametric_coordinates, plot=plot, non_csdl=True)
         return mesh
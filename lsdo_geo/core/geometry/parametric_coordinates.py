@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+
+@dataclass(eq=False)
+class ParametricCoordinates:
+    '''
+    A compact (structure of arrays) container of parametric coordinates on a function set.
+    This stores the same information as a list of (function_index, parametric_coordinate) tuples, but as one array of function indices
+    and one array of parametric coordinates. It can be used anywhere a list of tuples is accepted (indexing a single point and iterating
+    give (function_index, parametric_coordinate) tuples).
+
+    Parameters
+    ----------
+    function_indices : np.ndarray -- shape=(num_points,), dtype=np.int32
+        The index of the function that each point lies on.
+    parametric_coordinates : np.ndarray -- shape=(num_points, num_parametric_dimensions)
+        The parametric coordinates of each point on its function.
+    '''
+    function_indices : np.ndarray
+    parametric_coordinates : np.ndarray
+
+    def __post_init__(self):
+        self.function_indices = np.asarray(self.function_indices, dtype=np.int32).reshape((-1,))
+        self.parametric_coordinates = np.asarray(self.parametric_coordinates, dtype=float)
+        if len(self.parametric_coordinates.shape) == 1:
+            self.parametric_coordinates = self.parametric_coordinates.reshape((len(self.function_indices), -1))
+        if self.parametric_coordinates.shape[0] != self.function_indices.shape[0]:
+            raise ValueError(f'The number of function indices ({self.function_indices.shape[0]}) does not match the number of ' +
+                             f'parametric coordinates ({self.parametric_coordinates.shape[0]}).')
+
+    @classmethod
+    def from_list(cls, parametric_coordinates:list[tuple[int,np.ndarray]],
+                  num_parametric_dimensions:int=None) -> ParametricCoordinates:
+        '''
+        Creates the container from a list of (function_index, parametric_coordinate) tuples (or a single tuple).
+
+        Parameters
+        ----------
+        parametric_coordinates : list[tuple[int, np.ndarray]]
+            The (function index, parametric coordinate) pair of each point.
+        num_parametric_dimensions : int = None
+            The number of parametric dimensions of the coordinates. This is required if the list is empty (it can not be inferred).
+            If given for a non-empty list, the coordinates are checked against it.
+        '''
+        if isinstance(parametric_coordinates, ParametricCoordinates):
+            return parametric_coordinates
+        if isinstance(parametric_coordinates, tuple):
+            parametric_coordinates = [parametric_coordinates]
+        function_indices = np.array([parametric_coordinate[0] for parametric_coordinate in parametric_coordinates], dtype=np.int32)
+        if len(parametric_coordinates) == 0:
+            if num_parametric_dimensions is None:
+                raise ValueError('num_parametric_dimensions must be given to create parametric coordinates from an empty list.')
+            return cls(function_indices=function_indices, parametric_coordinates=np.zeros((0, num_parametric_dimensions)))
+        coordinates = np.vstack([np.asarray(parametric_coordinate[1], dtype=float).reshape((1,-1))
+                                 for parametric_coordinate in parametric_coordinates])
+        if num_parametric_dimensions is not None and coordinates.shape[1] != num_parametric_dimensions:
+            raise ValueError(f'The parametric coordinates have {coordinates.shape[1]} parametric dimensions, ' +
+                             f'but num_parametric_dimensions is {num_parametric_dimensions}.')
+        return cls(function_indices=function_indices, parametric_coordinates=coordinates)
+
+    def to_list(self) -> list[tuple[int,np.ndarray]]:
+        '''
+        Returns the parametric coordinates as a list of (function_index, parametric_coordinate) tuples.
+        '''
+        return [(int(function_index), coordinate) for function_index, coordinate in zip(self.function_indices, self.parametric_coordinates)]
+
+    def group_by_function(self) -> dict[int,np.ndarray]:
+        '''
+        Returns the indices of the points that lie on each function (in their original order) using one stable sort.
+        '''
+        order = np.argsort(self.function_indices, kind='stable')
+        function_indices, starts, counts = np.unique(self.function_indices[order], return_index=True, return_counts=True)
+        return {int(function_index):order[start:start+count] for function_index, start, count in zip(function_indices, starts, counts)}
+
+    def save(self, file_name:Union[str,Path]):
+        '''
+        Saves the parametric coordinates to an (uncompressed) .npz file so that they can be memory-mapped when loaded.
+
+        Parameters
+        ----------
+        file_name : Union[str, Path]
+            The name of the file (with path).
+        '''
+        with open(file_name, 'wb') as f:
+            np.savez(f, function_indices=self.function_indices, parametric_coordinates=self.parametric_coordinates)
+
+    @classmethod
+    def load(cls, file_name:Union[str,Path], mmap:bool=False) -> ParametricCoordinates:
+        '''
+        Loads parametric coordinates saved with save.
+
+        Parameters
+        ----------
+        file_name : Union[str, Path]
+            The name of the file (with path).
+        mmap : bool = False
+            If True, the arrays are memory-mapped (read-only) instead of read into memory.
+        '''
+        if mmap:
+            return cls(function_indices=_memory_map_npz_array(file_name, 'function_indices'),
+                       parametric_coordinates=_memory_map_npz_array(file_name, 'parametric_coordinates'))
+        with np.load(file_name) as data:
+            return cls(function_indices=data['function_indices'], parametric_coordinates=data['parametric_coordinates'])
+
+    def __len__(self) -> int:
+        return self.function_indices.shape[0]
+
+    def __getitem__(self, key) -> Union[tuple[int,np.ndarray],ParametricCoordinates]:
+        if isinstance(key, (int, np.integer)):
+            return (int(self.function_indices[key]), self.parametric_coordinates[key])
+        return ParametricCoordinates(function_indices=self.function_indices[key], parametric_coordinates=self.parametric_coordinates[key])
+
+    def __iter__(self):
+        for function_index, coordinate in zip(self.function_indices, self.parametric_coordinates):
+            yield (int(function_index), coordinate)
+
+    def __add__(self, other:ParametricCoordinates|list) -> ParametricCoordinates:
+        other = ParametricCoordinates.from_list(other, num_parametric_dimensions=self.parametric_coordinates.shape[1])
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        return ParametricCoordinates(function_indices=np.concatenate((self.function_indices, other.function_indices)),
+                                     parametric_coordinates=np.vstack((self.parametric_coordinates, other.parametric_coordinates)))
+
+    def __radd__(self, other:list) -> ParametricCoordinates:
+        return ParametricCoordinates.from_list(other, num_parametric_dimensions=self.parametric_coordinates.shape[1]) + self
+
+
+def _memory_map_npz_array(file_name:Union[str,Path], array_name:str) -> np.memmap:
+    '''
+    Memory-maps an array stored (uncompressed) in an .npz file.
+    '''
+    with zipfile.ZipFile(file_name) as zip_file:
+        info = zip_file.getinfo(f'{array_name}.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f'Array {array_name} in {file_name} is compressed and can not be memory-mapped.')
+    with open(file_name, 'rb') as f:
+        # NOTE: The local file header is 30 bytes followed by the file name and an extra field, then the .npy data.
+        f.seek(info.header_offset + 26)
+        file_name_length, extra_field_length = np.frombuffer(f.read(4), dtype='<u2')
+        f.seek(info.header_offset + 30 + int(file_name_length) + int(extra_field_length))
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(file_name, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
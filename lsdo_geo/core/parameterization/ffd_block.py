@@ -28,21 +28,24 @@ class FFDBlock(lfs.Function):
         The entities to be embedded within (parameterized by) the FFD block.
     embedded_entity_parametric_coordinates : list[np.ndarray] -- list_length=len(embedded_entities), array_shape=(num_points, num_parametric_dimensions)
         The parametric coordinates for each of the embedded entities.
+    batch_projections : bool = False
+        If True, the points of all embedded entities are projected onto the FFD block in a single call instead of one call per point set.
     '''
 
     def __init__(self, space:lfs.FunctionSpace, coefficients:csdl.Variable=None, name:str=None,
                     embedded_entities:list[Union[csdl.Variable,Geometry,lfs.Function,lfs.FunctionSet]]=None,
-                    embedded_entity_parametric_coordinates:list[np.ndarray]=None):
+                    embedded_entity_parametric_coordinates:list[np.ndarray]=None, batch_projections:bool=False):
 
         super().__init__(space=space, coefficients=coefficients, name=name)
         self.embedded_entities = embedded_entities
         self.embedded_entity_parametric_coordinates = embedded_entity_parametric_coordinates
+        self.batch_projections = batch_projections
 
         if not isinstance(self.embedded_entities, list):
             self.embedded_entities = [self.embedded_entities]
 
-        # self.basis_matrices = []
         self.embed_entities(entities=self.embedded_entities)
+        self.assemble_embedded_basis_matrix()
         
 
     def embed_entities(self, entities:list[csdl.Variable,np.ndarray,Geometry,lfs.Function,lfs.FunctionSet]):
@@ -53,7 +56,9 @@ class FFDBlock(lfs.Function):
             return
         else:
             self.embedded_entity_parametric_coordinates = []
+        self._linear_inverse_map = self._compute_linear_inverse_map()
         
+        entity_embedded_points = []     # Only used when batching projections
         for entity in entities:
             if isinstance(entity, np.ndarray):
                 embedded_points = entity
@@ -68,21 +73,168 @@ class FFDBlock(lfs.Function):
             else:
                 raise ValueError(f'Unsupported entity type: {type(entity)}')
 
+            if self.batch_projections:
+                entity_embedded_points.append(embedded_points)
+                continue
+
             if not isinstance(embedded_points, list):
-                embedded_points_parametric_coordinates = self.project(points=embedded_points, projection_tolerance=1e-4, force_reproject=False)
+                embedded_points_parametric_coordinates = self.embed_points(points=embedded_points)
                 self.embedded_entity_parametric_coordinates.append(embedded_points_parametric_coordinates)
                 # entity_basis_matrix = self.space.compute_basis_matrix(parametric_coordinates=embedded_points_parametric_coordinates)
                 # self.basis_matrices.append(entity_basis_matrix)
             else:
                 entity_parametric_coordinates = []
                 for points in embedded_points:
-                    embedded_points_parametric_coordinates = self.project(points=points, projection_tolerance=1e-4)
+                    embedded_points_parametric_coordinates = self.embed_points(points=points)
                     entity_parametric_coordinates.append(embedded_points_parametric_coordinates)
                 self.embedded_entity_parametric_coordinates.append(entity_parametric_coordinates)
                 #     entity_basis_matrix = self.space.compute_basis_matrix(parametric_coordinates=embedded_points_parametric_coordinates)
                 #     entity_basis_matrices.append(entity_basis_matrix)
                 # self.basis_matrices.append(entity_basis_matrices)
 
+        if self.batch_projections:
+            self._project_embedded_points_in_batch(entity_embedded_points)
+
+
+    def embed_points(self, points:np.ndarray) -> np.ndarray:
+        '''
+        Finds the parametric coordinates of points inside the FFD block. Degree-1 blocks are inverted directly: affine blocks in closed form,
+        and trilinear (2x2x2) blocks with a vectorized Newton solve over all points. Otherwise (or for points where the Newton solve
+        does not converge), the general projection is used.
+
+        Parameters
+        ----------
+        points : np.ndarray -- shape=(num_points, num_physical_dimensions)
+            The points to embed.
+
+        Returns
+        -------
+        np.ndarray -- shape=(num_points, num_parametric_dimensions)
+            The parametric coordinates of the points.
+        '''
+        if not hasattr(self, '_linear_inverse_map'):
+            self._linear_inverse_map = self._compute_linear_inverse_map()
+
+        if self._linear_inverse_map is None:
+            return self.project(points=points, projection_tolerance=1e-4, force_reproject=False)
+
+        points = np.asarray(points).reshape((-1, self.num_physical_dimensions))
+        map_type, map_data = self._linear_inverse_map
+        if map_type == 'affine':
+            origin, inverse_jacobian = map_data
+            parametric_coordinates = (points - origin).dot(inverse_jacobian.T)
+            converged = np.all((parametric_coordinates >= -1e-10) & (parametric_coordinates <= 1. + 1e-10), axis=1)
+            parametric_coordinates = np.clip(parametric_coordinates, 0., 1.)
+        else:
+            parametric_coordinates, converged = _invert_trilinear_map(corners=map_data, points=points)
+
+        if not np.all(converged):   # Points outside of the block (or not converged) are projected onto it
+            projected_parametric_coordinates = self.project(points=points[~converged], projection_tolerance=1e-4, force_reproject=False)
+            if isinstance(projected_parametric_coordinates, csdl.Variable):
+                projected_parametric_coordinates = projected_parametric_coordinates.value
+            parametric_coordinates[~converged] = np.asarray(projected_parametric_coordinates).reshape((-1, parametric_coordinates.shape[1]))
+        return parametric_coordinates
+
+
+    def _compute_linear_inverse_map(self):
+        '''
+        Determines whether the FFD block can be inverted directly. Returns ('affine', (origin, inverse_jacobian)) if the block is an affine map
+        of the unit cube, ('trilinear', corners) if it is a 2x2x2 trilinear hexahedron, and None otherwise.
+        '''
+        space = self.space
+        if not isinstance(space, lfs.BSplineSpace) or np.any(np.array(space.degree) != 1):
+            return None
+        num_parametric_dimensions = space.num_parametric_dimensions
+        if num_parametric_dimensions != self.num_physical_dimensions:
+            return None
+
+        coefficients = self.coefficients.value.reshape(tuple(space.coefficients_shape) + (self.num_physical_dimensions,))
+
+        # For degree 1, each coefficient sits at its Greville point (the interior knots), so the block is affine
+        # exactly when the coefficients are an affine image of the Greville grid.
+        if isinstance(space.knots, (tuple, list)):
+            knot_vectors = [np.asarray(knot_vector) for knot_vector in space.knots]
+        else:
+            knot_vectors = [np.asarray(space.knots[space.knot_indices[i]]) for i in range(num_parametric_dimensions)]
+        greville_points = [knot_vector[1:-1] for knot_vector in knot_vectors]
+        greville_grid = np.stack(np.meshgrid(*greville_points, indexing='ij'), axis=-1).reshape((-1, num_parametric_dimensions))
+
+        flat_coefficients = coefficients.reshape((-1, self.num_physical_dimensions))
+        fitting_matrix = np.hstack((np.ones((greville_grid.shape[0], 1)), greville_grid))
+        affine_map = np.linalg.lstsq(fitting_matrix, flat_coefficients, rcond=None)[0]
+        origin = affine_map[0]
+        jacobian = affine_map[1:].T
+        block_size = np.linalg.norm(np.ptp(flat_coefficients, axis=0))
+        if np.allclose(fitting_matrix.dot(affine_map), flat_coefficients, rtol=0., atol=1e-10*block_size) \
+                and abs(np.linalg.det(jacobian)) > 1e-12*block_size**num_parametric_dimensions:
+            return ('affine', (origin, np.linalg.inv(jacobian)))
+
+        if tuple(space.coefficients_shape) == (2,)*num_parametric_dimensions and num_parametric_dimensions == 3 \
+                and all(np.allclose(knot_vector, [0., 0., 1., 1.]) for knot_vector in knot_vectors):
+            return ('trilinear', coefficients)
+
+        return None
+
+
+    def _project_embedded_points_in_batch(self, entity_embedded_points:list[Union[np.ndarray,list[np.ndarray]]]):
+        '''
+        Projects the points of every embedded entity onto the FFD block with a single call and splits the result back per point set.
+        Each point is projected independently, so the result is the same as projecting each point set separately.
+        '''
+        point_sets = []
+        for embedded_points in entity_embedded_points:
+            if isinstance(embedded_points, list):
+                point_sets.extend(embedded_points)
+            else:
+                point_sets.append(embedded_points)
+        point_sets = [points.reshape((-1, points.shape[-1])) for points in point_sets]
+
+        parametric_coordinates = self.embed_points(points=np.vstack(point_sets))
+        if isinstance(parametric_coordinates, csdl.Variable):
+            parametric_coordinates = parametric_coordinates.value
+        parametric_coordinates = np.asarray(parametric_coordinates).reshape((-1, self.space.num_parametric_dimensions))
+
+        counter = 0
+        for embedded_points in entity_embedded_points:
+            if isinstance(embedded_points, list):
+                entity_parametric_coordinates = []
+                for points in embedded_points:
+                    num_points = points.size // points.shape[-1]
+                    entity_parametric_coordinates.append(parametric_coordinates[counter:counter+num_points])
+                    counter += num_points
+                self.embedded_entity_parametric_coordinates.append(entity_parametric_coordinates)
+            else:
+                num_points = embedded_points.size // embedded_points.shape[-1]
+                self.embedded_entity_parametric_coordinates.append(parametric_coordinates[counter:counter+num_points])
+                counter += num_points
+
+
+    def assemble_embedded_basis_matrix(self):
+        '''
+        Assembles one sparse matrix that maps the flattened FFD coefficients to the flattened points of every embedded entity.
+        The parametric coordinates of the embedded entities do not change after embedding, so this is only done once.
+        '''
+        basis_matrices = []
+        self.embedded_point_slices = []
+        num_points = 0
+        for entity_parametric_coordinates in self.embedded_entity_parametric_coordinates:
+            is_list = isinstance(entity_parametric_coordinates, list)
+            if not is_list:
+                entity_parametric_coordinates = [entity_parametric_coordinates]
+            entity_slices = []
+            for parametric_coordinates in entity_parametric_coordinates:
+                if isinstance(parametric_coordinates, csdl.Variable):
+                    parametric_coordinates = parametric_coordinates.value
+                parametric_coordinates = np.asarray(parametric_coordinates).reshape((-1, self.space.num_parametric_dimensions))
+                basis_matrices.append(sps.csr_matrix(self.space.compute_basis_matrix(parametric_coordinates)))
+                entity_slices.append((num_points, num_points + parametric_coordinates.shape[0]))
+                num_points += parametric_coordinates.shape[0]
+            self.embedded_point_slices.append(entity_slices if is_list else entity_slices[0])
+
+        basis_matrix = sps.vstack(basis_matrices)
+        # Act on all physical dimensions of the flattened coefficients at once
+        self.embedded_basis_matrix = sps.kron(basis_matrix, sps.eye(self.num_physical_dimensions), format='csc')
+
 
     def evaluate(self, coefficients:csdl.Variable=None, parametric_coordinates:np.ndarray=None, parametric_derivative_orders:list[tuple]=None,
                  plot:bool=False, non_csdl=False) -> csdl.Variable:
@@ -108,12 +260,36 @@ class FFDBlock(lfs.Function):
             The function evaluated at the given coordinates.
         '''
         if parametric_coordinates is None:  # Perform FFD Evaluation
+            if coefficients is None:
+                coefficients = self.coefficients
             self.coefficients = coefficients
             if self.embedded_entity_parametric_coordinates is None:
                 raise ValueError('No parametric coordinates provided for evaluation.')
             parametric_coordinates = self.embedded_entity_parametric_coordinates
 
             outputs = []
+            if parametric_derivative_orders is None:
+                # Fast path: one sparse product with the precomputed basis matrix, then slice out each entity.
+                if non_csdl:
+                    coefficients_value = coefficients.value if isinstance(coefficients, csdl.Variable) else coefficients
+                    points = self.embedded_basis_matrix.dot(np.asarray(coefficients_value).reshape((-1,)))
+                else:
+                    if isinstance(coefficients, np.ndarray):
+                        coefficients = csdl.Variable(value=coefficients)
+                    points = csdl.sparse.matvec(self.embedded_basis_matrix, coefficients.reshape((coefficients.size, 1)))
+                    points = points.reshape((points.size,))
+
+                for entity_slices in self.embedded_point_slices:
+                    if not isinstance(entity_slices, list):
+                        outputs.append(self._get_embedded_points(points, entity_slices))
+                    else:
+                        entity_outputs = [self._get_embedded_points(points, entity_slice) for entity_slice in entity_slices]
+                        if len(entity_outputs) == 1:
+                            outputs.append(entity_outputs[0])
+                        else:
+                            outputs.append(entity_outputs)
+                parametric_coordinates = []
+
             for entity_parametric_coordinates in parametric_coordinates:
                 if not isinstance(entity_parametric_coordinates, list):
                     entity_parametric_coordinates = [entity_parametric_coordinates]
@@ -153,6 +329,18 @@ class FFDBlock(lfs.Function):
             
 
 
+    def _get_embedded_points(self, points:csdl.Variable, point_slice:tuple[int,int]) -> csdl.Variable:
+        '''
+        Extracts the points of one embedded point set from the flattened points of all embedded entities.
+        '''
+        start, end = point_slice
+        num_physical_dimensions = self.num_physical_dimensions
+        entity_points = points[start*num_physical_dimensions:end*num_physical_dimensions]
+        if num_physical_dimensions == 1:    # Match lfs: scalar-valued functions are returned as vectors
+            return entity_points.reshape((end - start,))
+        return entity_points.reshape((end - start, num_physical_dimensions))
+
+
     def evaluate_ffd(self, coefficients:csdl.Variable, plot:bool=False) -> csdl.Variable:
         '''
         Takes in the FFD block coefficients and evaluates the embedded points.
@@ -292,6 +480,91 @@ class FFDBlock(lfs.Function):
     
 
 
+def _invert_trilinear_map(corners:np.ndarray, points:np.ndarray, max_iterations:int=25, tolerance:float=1e-12) -> tuple[np.ndarray,np.ndarray]:
+    '''
+    Inverts the trilinear map x(u,v,w) = sum_ijk corners[i,j,k]*B_i(u)*B_j(v)*B_k(w) for every point at once using Newton's method.
+
+    Parameters
+    ----------
+    corners : np.ndarray -- shape=(2,2,2,3)
+        The corners of the trilinear hexahedron.
+    points : np.ndarray -- shape=(num_points,3)
+        The points to invert.
+
+    Returns
+    -------
+    parametric_coordinates : np.ndarray -- shape=(num_points,3)
+        The parametric coordinates of the points (clipped to the unit cube).
+    converged : np.ndarray -- shape=(num_points,)
+        Whether or not the Newton iterations converged (to a point inside the block) for each point.
+    '''
+    # Monomial form: x = a + b*u + c*v + d*w + e*u*v + f*u*w + g*v*w + h*u*v*w
+    a = corners[0,0,0]
+    b = corners[1,0,0] - a
+    c = corners[0,1,0] - a
+    d = corners[0,0,1] - a
+    e = corners[1,1,0] - corners[1,0,0] - corners[0,1,0] + a
+    f = corners[1,0,1] - corners[1,0,0] - corners[0,0,1] + a
+    g = corners[0,1,1] - corners[0,1,0] - corners[0,0,1] + a
+    h = corners[1,1,1] - corners[1,1,0] - corners[1,0,1] - corners[0,1,1] + corners[1,0,0] + corners[0,1,0] + corners[0,0,1] - a
+    monomial_coefficients = np.vstack((b, c, d, e, f, g, h))    # shape=(7,3)
+
+    scale = np.linalg.norm(np.column_stack((b, c, d)))
+    try:
+        # Initial guess from the affine part of the map
+        parametric_coordinates = np.linalg.solve(np.column_stack((b, c, d)), (points - a).T).T
+    except np.linalg.LinAlgError:   # Degenerate block: leave every point to the general projection
+        return np.full(points.shape, 0.5), np.zeros(points.shape[0], dtype=bool)
+
+    converged = np.zeros(points.shape[0], dtype=bool)
+    active = np.arange(points.shape[0])     # Only the points that have not converged are updated
+    active_points = points - a
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iterations):
+            u, v, w = parametric_coordinates[active].T
+            ones = np.ones_like(u)
+            zeros = np.zeros_like(u)
+            residual = np.column_stack((u, v, w, u*v, u*w, v*w, u*v*w)).dot(monomial_coefficients) - active_points
+            active_converged = np.einsum('ij,ij->i', residual, residual) <= (tolerance*scale)**2
+            converged[active[active_converged]] = True
+            if np.all(active_converged):
+                break
+            not_converged = ~active_converged
+            active = active[not_converged]
+            active_points = active_points[not_converged]
+            residual = residual[not_converged]
+            u, v, w, ones, zeros = u[not_converged], v[not_converged], w[not_converged], ones[not_converged], zeros[not_converged]
+
+            # Solve the 3x3 Newton systems with Cramer's rule
+            jacobian_u = np.column_stack((ones, zeros, zeros, v, w, zeros, v*w)).dot(monomial_coefficients)
+            jacobian_v = np.column_stack((zeros, ones, zeros, u, zeros, w, u*w)).dot(monomial_coefficients)
+            jacobian_w = np.column_stack((zeros, zeros, ones, zeros, u, v, u*v)).dot(monomial_coefficients)
+            v_cross_w = _cross(jacobian_v, jacobian_w)
+            determinant = np.einsum('ij,ij->i', jacobian_u, v_cross_w)
+            step = np.column_stack((
+                np.einsum('ij,ij->i', residual, v_cross_w),
+                np.einsum('ij,ij->i', jacobian_u, _cross(residual, jacobian_w)),
+                np.einsum('ij,ij->i', jacobian_u, _cross(jacobian_v, residual)),
+            )) / determinant[:,np.newaxis]
+            parametric_coordinates[active] -= step
+
+    outside = np.any((parametric_coordinates < -1e-10) | (parametric_coordinates > 1. + 1e-10), axis=1)
+    converged = converged & ~outside & np.all(np.isfinite(parametric_coordinates), axis=1)
+    parametric_coordinates = np.clip(np.nan_to_num(parametric_coordinates, nan=0.5), 0., 1.)
+    return parametric_coordinates, converged
+
+
+def _cross(x:np.ndarray, y:np.ndarray) -> np.ndarray:
+    '''
+    Row-wise cross product of two (num_points,3) arrays (faster than np.cross for many short vectors).
+    '''
+    return np.column_stack((
+        x[:,1]*y[:,2] - x[:,2]*y[:,1],
+        x[:,2]*y[:,0] - x[:,0]*y[:,2],
+        x[:,0]*y[:,1] - x[:,1]*y[:,0],
+    ))
+
+
 if __name__ == "__main__":
     pass
 
@@ -7,7 +7,8 @@ import csdl_alpha as csdl
 from lsdo_geo.core.geometry.geometry import Geometry
 
 def construct_ffd_block_around_entities(entities:list[Union[np.ndarray, csdl.Variable, lfs.Function, lfs.FunctionSet]],
-                                        num_coefficients:tuple[int]=2, degree:tuple[int]=1, name:str='ffd_block') -> FFDBlock:
+                                        num_coefficients:tuple[int]=2, degree:tuple[int]=1, name:str='ffd_block',
+                                        batch_projections:bool=False) -> FFDBlock:
     '''
     Constructs an FFD block around the given entities and embeds them within.
 
@@ -21,6 +22,8 @@ def construct_ffd_block_around_entities(entities:list[Union[np.ndarray, csdl.Var
         Degree of the FFD block, by default 2.
     name : str, optional = 'ffd_block'
         Name of the FFD block, by default 'ffd_block'.
+    batch_projections : bool, optional = False
+        If True, the points of all entities are embedded with a single projection call.
 
     Returns
     -------
@@ -58,14 +61,16 @@ def construct_ffd_block_around_entities(entities:list[Union[np.ndarray, csdl.Var
                                                              num_parametric_dimensions=num_physical_dimensions,
                                                              name='b_spline_hyper_volume')
     b_spline_hyper_volume.coefficients.add_name(f'{name}_coefficients')
-    ffd_block = FFDBlock(space=b_spline_hyper_volume.space, coefficients=b_spline_hyper_volume.coefficients, name=name, embedded_entities=entities)
+    ffd_block = FFDBlock(space=b_spline_hyper_volume.space, coefficients=b_spline_hyper_volume.coefficients, name=name, embedded_entities=entities,
+                         batch_projections=batch_projections)
     
     return ffd_block
 
 
 def construct_ffd_block_from_corners(entities:list[Union[np.ndarray, csdl.Variable, lfs.Function, lfs.FunctionSet, Geometry]],
                                      corners:np.ndarray,
-                                        num_coefficients:tuple[int]=2, degree:tuple[int]=1, name:str='ffd_block') -> FFDBlock:
+                                        num_coefficients:tuple[int]=2, degree:tuple[int]=1, name:str='ffd_block',
+                                        batch_projections:bool=False) -> FFDBlock:
     '''
     Constructs an FFD block around the given entities and embeds them within.
     '''
@@ -76,13 +81,14 @@ def construct_ffd_block_from_corners(entities:list[Union[np.ndarray, csdl.Variab
                                                              name='b_spline_hyper_volume_for_ffd_block')
     # Just piggybacks on the Function to make the FFD Block
     ffd_block = FFDBlock(space=b_spline_hyper_volume.space, coefficients=b_spline_hyper_volume.coefficients,
-                         name=name, embedded_entities=entities)
+                         name=name, embedded_entities=entities, batch_projections=batch_projections)
     
     return ffd_block
 
 
 def construct_tight_fit_ffd_block(entities:list[Union[np.ndarray, csdl.Variable, lfs.Function, lfs.FunctionSet, Geometry]],
-                                        num_coefficients:tuple[int]=5, degree:tuple[int]=2, name:str='ffd_block') -> FFDBlock:
+                                        num_coefficients:tuple[int]=5, degree:tuple[int]=2, name:str='ffd_block',
+                                        batch_projections:bool=False) -> FFDBlock:
     '''
     Constructs an FFD block around the given entities and embeds them within.
     '''
@@ -95,7 +101,7 @@ def construct_tight_fit_ffd_block(entities:list[Union[np.ndarray, csdl.Variable,
     # Steps for currently non-standard FFD blocks
     # 0) Cartesian enclosure volume (line 39) 
     enclosure_ffd_block = construct_ffd_block_around_entities(entities=entities, num_coefficients=num_coefficients,
-                                                              degree=(1,1,1), name='helper_volume')
+                                                              degree=(1,1,1), name='helper_volume', batch_projections=batch_projections)
 
     # b_spline_hyper_volume.plot()
     
@@ -183,7 +189,8 @@ def construct_tight_fit_ffd_block(entities:list[Union[np.ndarray, csdl.Variable,
         w = int(index[2])
         corners[u,v,w,:] = corner_point.reshape((3,))
 
-    ffd_block = construct_ffd_block_from_corners(entities=entities, corners=corners, num_coefficients=num_coefficients, degree=degree, name=name)
+    ffd_block = construct_ffd_block_from_corners(entities=entities, corners=corners, num_coefficients=num_coefficients, degree=degree, name=name,
+                                                 batch_projections=batch_projections)
     
     
     return ffd_block
\ No newline at end of file
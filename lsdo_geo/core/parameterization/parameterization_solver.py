@@ -1,6 +1,7 @@
 from lsdo_geo.csdl.optimization import Optimization, NewtonOptimizer
 import csdl_alpha as csdl
 import numpy as np
+import scipy.sparse as sps
 from dataclasses import dataclass
 from typing import Union
 
@@ -14,30 +15,61 @@ class GeometricVariables:
     '''
     computed_values : list[csdl.Variable] = None
     desired_values : list[csdl.Variable] = None
+    jacobian_sparsity_patterns : list[sps.spmatrix] = None
 
     def __post_init__(self):
         if self.computed_values is None:
             self.computed_values = []
         if self.desired_values is None:
             self.desired_values = []
+        if self.jacobian_sparsity_patterns is None:
+            self.jacobian_sparsity_patterns = [None]*len(self.computed_values)
 
-    def add_variable(self, computed_value:csdl.Variable, desired_value:csdl.Variable):
+    def add_variable(self, computed_value:csdl.Variable, desired_value:csdl.Variable, jacobian_sparsity_pattern:sps.spmatrix=None):
         self.computed_values.append(computed_value)
         self.desired_values.append(desired_value)
+        self.jacobian_sparsity_patterns.append(jacobian_sparsity_pattern)
 
 
 class ParameterizationSolver:
     '''
     The ParameterizationSolver class is used to solve geometric parameterization problems.
     '''
-    def __init__(self) -> None:
+    def __init__(self, reuse_jacobian:bool=False, direct_qp_solve:bool=False, warm_start:bool=False, extrapolate:bool=False,
+                 count_iterations:bool=False, check_constant_kkt_matrix:bool=False) -> None:
+        '''
+        Parameters
+        ----------
+        reuse_jacobian : bool = False
+            If True, the KKT matrix is factorized once and reused across iterations and evaluations (see NewtonOptimizer).
+        direct_qp_solve : bool = False
+            If True, every geometric variable is assumed to be affine in the parameters (the problem is a quadratic program), so the
+            parameters are computed directly with a single KKT factorization instead of Newton iterations (see NewtonOptimizer).
+        warm_start : bool = False
+            If True, every solve (every evaluation of the model, for instance by the outer optimizer) starts from the last converged
+            parameters and lagrange multipliers. This is done in the graph (see NewtonOptimizer), so it does not require calling run
+            again.
+        extrapolate : bool = False
+            If True (and warm_start is True), the initial guess is extrapolated from the last two solutions along the change in the
+            desired values instead of reusing the last solution.
+        count_iterations : bool = False
+            If True, the number of iterations of every solve is recorded so the iterations saved by warm starting can be reported
+            (see get_iteration_report).
+        check_constant_kkt_matrix : bool = False
+            If True (and direct_qp_solve is True), the problem is checked for being a quadratic program during setup, and the regular
+            solver is used if it is not (see NewtonOptimizer).
+        '''
         self.optimization = Optimization()
-        self.optimizer = NewtonOptimizer()
+        self.optimizer = NewtonOptimizer(reuse_jacobian=reuse_jacobian, direct_qp_solve=direct_qp_solve, warm_start=warm_start,
+                                         extrapolate=extrapolate, count_iterations=count_iterations,
+                                         check_constant_kkt_matrix=check_constant_kkt_matrix)
         self.parameters = []
         self.parameter_costs = []
+        self.desired_values = []
 
 
-    def add_variable(self, computed_value:csdl.Variable, desired_value:csdl.Variable, penalty:Union[float,np.ndarray,csdl.Variable]=None):
+    def add_variable(self, computed_value:csdl.Variable, desired_value:csdl.Variable, penalty:Union[float,np.ndarray,csdl.Variable]=None,
+                     jacobian_sparsity_pattern:sps.spmatrix=None):
         '''
         Add/declare a geometric variable to the parameterization problem.
 
@@ -52,8 +84,13 @@ class ParameterizationSolver:
         penalty : Union[float,np.ndarray,csdl.Variable], optional
             The penalty to be applied to the constraint, by default None. If None, lagrange multipliers are used.
             If not None, the penalty is the scaling factor for a quadratic constraint penalty term.
+        jacobian_sparsity_pattern : sps.spmatrix, optional
+            Which parameters (concatenated in the order they are added) each entry of the computed value depends on, by default None
+            (dense). For instance, a chord only depends on the parameters of the sections around it. Giving the pattern lets the KKT
+            matrix be computed and factorized sparsely (see Optimization.compute_kkt_blocks).
         '''
-        self.optimization.add_constraint(computed_value - desired_value, penalty=penalty)
+        self.optimization.add_constraint(computed_value - desired_value, penalty=penalty, jacobian_sparsity_pattern=jacobian_sparsity_pattern)
+        self.desired_values.append(desired_value)
 
 
     def add_parameter(self, parameter:csdl.Variable, cost:Union[float,np.ndarray,csdl.Variable]=1.):
@@ -76,8 +113,13 @@ class ParameterizationSolver:
         objective = 0
         for parameter, cost in zip(self.parameters, self.parameter_costs):
             objective = objective + csdl.vdot(parameter, cost*parameter)
-        self.optimization.add_objective(objective)
+        # NOTE: The cost is applied elementwise, so the hessian of the objective is diagonal.
+        num_parameters = sum(parameter.size for parameter in self.parameters)
+        self.optimization.add_objective(objective, hessian_sparsity_pattern=sps.identity(num_parameters, format='csr'))
         self.optimizer.add_optimization(self.optimization)
+        if self.optimizer.warm_start:
+            self.optimizer.add_warm_start_inputs([desired_value for desired_value in self.desired_values
+                                                  if isinstance(desired_value, csdl.Variable)])
 
 
     def evaluate(self, geometric_variables:GeometricVariables) -> list[csdl.Variable]:
@@ -97,15 +139,46 @@ class ParameterizationSolver:
             The computed values of the geometric variables. 
             NOTE: This will return the exact same parameter variables that were added because CSDL updates the state variables in place.
         '''
-        for computed_value, desired_value in zip(geometric_variables.computed_values, geometric_variables.desired_values):
-            self.add_variable(computed_value, desired_value)
+        for computed_value, desired_value, jacobian_sparsity_pattern in zip(geometric_variables.computed_values,
+                                                                            geometric_variables.desired_values,
+                                                                            geometric_variables.jacobian_sparsity_patterns):
+            self.add_variable(computed_value, desired_value, jacobian_sparsity_pattern=jacobian_sparsity_pattern)
 
         self.setup()
-        self.optimizer.run()
+        self.run()
         
         # NOTE: Because the solver updates the state variables, the user doesn't actually need to use these outputs
         outputs = []
         for computed_value in geometric_variables.computed_values:
             outputs.append(computed_value.value)
         return outputs
-    
\ No newline at end of file
+
+
+    def run(self):
+        '''
+        Runs the solver (adds it to the graph). Later evaluations of the model resolve the parameterization problem, warm started
+        if warm_start is True.
+        '''
+        self.optimizer.run()
+
+
+    def get_states(self) -> list[csdl.Variable]:
+        '''
+        Returns the states of the parameterization problem (the lagrange multipliers and the parameters).
+        '''
+        states, _ = self.optimization.get_states_and_residuals()
+        return states
+
+
+    def get_iteration_report(self) -> dict:
+        '''
+        Returns the number of iterations of each solve (recorded when count_iterations is True) and the number of iterations saved by
+        warm starting, relative to the first (cold) run.
+        '''
+        iteration_counts = list(self.optimizer.iteration_counts)
+        if len(iteration_counts) == 0:
+            return {'iteration_counts':[], 'iterations_saved':[], 'total_iterations_saved':0}
+        iterations_saved = [iteration_counts[0] - iteration_count for iteration_count in iteration_counts[1:]]
+        return {'iteration_counts':iteration_counts, 'iterations_saved':iterations_saved,
+                'total_iterations_saved':sum(iterations_saved)}
+
@@ -5,7 +5,7 @@ import csdl_alpha as csdl
 
 from dataclasses import dataclass
 
-from lsdo_geo.core.geometry.geometry_functions import rotate
+from lsdo_geo.core.geometry.geometry_functions import compute_rotation_tensor
 
 
 @dataclass
@@ -162,6 +162,11 @@ class VolumeSectionalParameterization:
 
         self.linear_parameter_maps = {}
         self.rotational_axes = {}
+        self.rotation_axis_vectors = {}
+
+        # Flat indices of the points in each section. shape=(num_sections, num_points_per_section*num_physical_dimensions)
+        indices = np.arange(np.prod(self.parameterized_points_shape, dtype=int)).reshape(self.parameterized_points_shape)
+        self.section_indices = np.swapaxes(indices, 0, self.principal_parametric_dimension).reshape((self.num_sections, -1))
 
         self.updated_points = self.parameterized_points # NOTE: Removing .copy() here because csdl doesn't have one.
 
@@ -176,7 +181,7 @@ class VolumeSectionalParameterization:
         map : sps.csc_matrix
             The map from the parameter vector to deltas in the parameterized points.
         """
-        self.linear_parameter_maps[name] = map
+        self.linear_parameter_maps[name] = sps.csc_matrix(map)
 
     def add_sectional_translation(self, name: str, axis: int):
         """
@@ -252,95 +257,54 @@ class VolumeSectionalParameterization:
                             + "You probably either want to fix your principal axis or instead translate along this axis.")
 
         num_outputs = np.prod(self.parameterized_points_shape)
-
-        parameter_map_list = []
-        for i in range(self.num_sections):
-            parameter_section_map = sps.lil_matrix((num_outputs, 1))
-
-            if axis == self.principal_parametric_dimension:
-                raise Exception(
-                    "Can't stretch along the principal parametric dimension because sections have no thickness to stretch."
-                    + "Use a linear distributions of translations instead"
-                )
-
-            parametric_coordinate = (
-                np.ones((len(self.parameterized_points_shape[:-1]))) * 0.5
-            )
-            parametric_coordinate[self.principal_parametric_dimension] = (
-                self.sectional_principal_parametric_coordinate[i].reshape((1, -1))
-            )
-            parametric_derivative_order = np.zeros(
-                (len(self.parameterized_points_shape[:-1]))
-            )
-            parametric_derivative_order[axis] = 1
-            parametric_derivative_order = tuple(parametric_derivative_order)
-            stretch_axis = self.helpful_b_spline.evaluate(
-                parametric_coordinates=parametric_coordinate,
-                parametric_derivative_orders=parametric_derivative_order,
-                non_csdl=True
-            )
-            stretch_axis /= np.linalg.norm(stretch_axis)
-            section_middle = self.helpful_b_spline.evaluate(
-                parametric_coordinates=parametric_coordinate,
-                parametric_derivative_orders=(0,),
-                non_csdl=True
-            )
-
-            section_axis_end_parametric_coordinate = parametric_coordinate.copy()
-            section_axis_end_parametric_coordinate[axis] = 1.0
-            section_axis_beginning_parametric_coordinate = parametric_coordinate.copy()
-            section_axis_beginning_parametric_coordinate[axis] = 0.0
-
-            section_axis_end = self.helpful_b_spline.evaluate(
-                parametric_coordinates=section_axis_end_parametric_coordinate,
-                parametric_derivative_orders=(0,),
-                non_csdl=True
-            )
-            section_axis_beginning = self.helpful_b_spline.evaluate(
-                parametric_coordinates=section_axis_beginning_parametric_coordinate,
-                parametric_derivative_orders=(0,),
-                non_csdl=True
-            )
-            section_length = (section_axis_end - section_axis_beginning).dot(
-                stretch_axis
-            )
-
-            indices = np.arange(np.prod(self.parameterized_points_shape, dtype=int))
-            indices = indices.reshape(self.parameterized_points_shape)
-            indices = np.moveaxis(indices, self.principal_parametric_dimension, 0)
-            indices = indices.reshape(
-                (
-                    self.num_sections,
-                    self.num_points_per_section,
-                    self.num_physical_dimensions,
-                )
-            )
-
-            for j in range(self.num_points_per_section):
-                point_indices_full_shape = _get_indices_in_shape(
-                    shape=self.parameterized_points_shape[:-1],
-                    total_index=j,
-                    section_axis=self.principal_parametric_dimension,
-                    section_axis_index=i,
-                )
-                displacement = (
-                    self.parameterized_points.value.reshape(
-                        self.parameterized_points_shape
-                    )[point_indices_full_shape]
-                    - section_middle
-                )
-                distance_along_axis = np.dot(displacement, stretch_axis)
-
-                point_indices = indices[i, j, :].reshape((-1,))
-                parameter_section_map[point_indices] = (
-                    distance_along_axis
-                    / section_length
-                    * stretch_axis.reshape((self.num_physical_dimensions, 1))
-                )
-
-            parameter_map_list.append(parameter_section_map)
-
-        parameter_map = sps.hstack(parameter_map_list).tocsc()
+        num_parametric_dimensions = len(self.parameterized_points_shape[:-1])
+
+        # Evaluate the axis, middle, and extents of every section at once
+        parametric_coordinates = np.ones((self.num_sections, num_parametric_dimensions)) * 0.5
+        parametric_coordinates[:, self.principal_parametric_dimension] = self.sectional_principal_parametric_coordinate.reshape((-1,))
+        parametric_derivative_order = np.zeros((num_parametric_dimensions), dtype=int)
+        parametric_derivative_order[axis] = 1
+        stretch_axes = self.helpful_b_spline.evaluate(
+            parametric_coordinates=parametric_coordinates,
+            parametric_derivative_orders=tuple(parametric_derivative_order),
+            non_csdl=True
+        ).reshape((self.num_sections, self.num_physical_dimensions))
+        stretch_axes = stretch_axes / np.linalg.norm(stretch_axes, axis=1, keepdims=True)
+        section_middles = self.helpful_b_spline.evaluate(
+            parametric_coordinates=parametric_coordinates,
+            non_csdl=True
+        ).reshape((self.num_sections, self.num_physical_dimensions))
+
+        section_axis_end_parametric_coordinates = parametric_coordinates.copy()
+        section_axis_end_parametric_coordinates[:, axis] = 1.0
+        section_axis_beginning_parametric_coordinates = parametric_coordinates.copy()
+        section_axis_beginning_parametric_coordinates[:, axis] = 0.0
+        section_axis_ends = self.helpful_b_spline.evaluate(
+            parametric_coordinates=section_axis_end_parametric_coordinates,
+            non_csdl=True
+        ).reshape((self.num_sections, self.num_physical_dimensions))
+        section_axis_beginnings = self.helpful_b_spline.evaluate(
+            parametric_coordinates=section_axis_beginning_parametric_coordinates,
+            non_csdl=True
+        ).reshape((self.num_sections, self.num_physical_dimensions))
+        section_lengths = np.einsum('ki,ki->k', section_axis_ends - section_axis_beginnings, stretch_axes)
+
+        # Points and flat indices with the sections along the first axis. shape=(num_sections, num_points_per_section, num_physical_dimensions)
+        section_points = np.moveaxis(
+            self.parameterized_points.value.reshape(self.parameterized_points_shape), self.principal_parametric_dimension, 0
+        ).reshape((self.num_sections, self.num_points_per_section, self.num_physical_dimensions))
+        indices = np.arange(num_outputs).reshape(self.parameterized_points_shape)
+        indices = np.moveaxis(indices, self.principal_parametric_dimension, 0).reshape(section_points.shape)
+
+        distances_along_axes = np.einsum('kpi,ki->kp', section_points - section_middles[:,np.newaxis,:], stretch_axes)
+        map_values = distances_along_axes[:,:,np.newaxis] / section_lengths[:,np.newaxis,np.newaxis] * stretch_axes[:,np.newaxis,:]
+        map_columns = np.broadcast_to(np.arange(self.num_sections)[:,np.newaxis,np.newaxis], section_points.shape)
+
+        parameter_map = sps.coo_matrix(
+            (map_values.reshape((-1,)), (indices.reshape((-1,)), map_columns.reshape((-1,)))),
+            shape=(num_outputs, self.num_sections)
+        ).tocsc()
+        parameter_map.eliminate_zeros()
 
         self.add_parameter(name=name, map=parameter_map)
 
@@ -361,6 +325,19 @@ class VolumeSectionalParameterization:
 
         self.rotational_axes[name] = axis
 
+        # Static axes: one per section, evaluated at the middle of the section
+        parametric_coordinates = np.ones((self.num_sections, len(self.parameterized_points_shape[:-1]))) * 0.5
+        parametric_coordinates[:, self.principal_parametric_dimension] = self.sectional_principal_parametric_coordinate.reshape((-1,))
+        parametric_derivative_order = np.zeros((len(self.parameterized_points_shape[:-1])), dtype=int)
+        parametric_derivative_order[axis] = 1
+        rotation_axis_vectors = self.helpful_b_spline.evaluate(
+            parametric_coordinates=parametric_coordinates,
+            parametric_derivative_orders=tuple(parametric_derivative_order),
+            non_csdl=True
+        ).reshape((self.num_sections, self.num_physical_dimensions))
+        rotation_axis_vectors = rotation_axis_vectors / np.linalg.norm(rotation_axis_vectors, axis=1, keepdims=True)
+        self.rotation_axis_vectors[name] = rotation_axis_vectors
+
     # def evaluate(self, sectional_parameters:dict[str,csdl.Variable], plot:bool=False) -> csdl.Variable:
     def evaluate(
         self,
@@ -385,16 +362,20 @@ class VolumeSectionalParameterization:
         # # Assemble linear maps
         # self.assemble()
 
-        # Add parameters that are found.
+        # Add parameters that are found. The maps only depend on the parameter type and axis, so they are built the first time
+        # a parameter is seen and reused afterwards.
         for axis, parameter in sectional_parameters.stretches.items():
             auto_generated_name = f"stretch_{axis}"
-            self.add_sectional_stretch(name=auto_generated_name, axis=axis)
+            if auto_generated_name not in self.linear_parameter_maps:
+                self.add_sectional_stretch(name=auto_generated_name, axis=axis)
         for axis, parameter in sectional_parameters.translations.items():
             auto_generated_name = f"translation_{axis}"
-            self.add_sectional_translation(name=auto_generated_name, axis=axis)
+            if auto_generated_name not in self.linear_parameter_maps:
+                self.add_sectional_translation(name=auto_generated_name, axis=axis)
         for axis, parameter in sectional_parameters.rotations.items():
             auto_generated_name = f"rotation_{axis}"
-            self.add_sectional_rotation(name=auto_generated_name, axis=axis)
+            if auto_generated_name not in self.rotational_axes:
+                self.add_sectional_rotation(name=auto_generated_name, axis=axis)
 
         # Perform update
         # updated_points = self.parameterized_points.reshape((-1,))
@@ -457,56 +438,22 @@ class VolumeSectionalParameterization:
                     + f"Expected: shape=(num_sections,) ({self.num_sections},), got: {parameter_variable.shape}"
                 )
 
-            # # Use points to create a B-spline to help with getting axes
             # NOTE: Going to use static axes for now unless if popular demand justifies this.
-            # fitting_points = self.parameterized_points.value.reshape(self.parameterized_points_shape)
-            # import lsdo_geo.splines.b_splines.b_spline_functions as bsp
-            # self.helpful_b_spline = bsp.fit_b_spline(fitting_points=fitting_points, order=(2,),
-            #                                             num_coefficients=(self.num_sections,),
-            #                                             name='helpful_b_spline')
-            for i in range(self.num_sections):
-                parametric_coordinate = (
-                    np.ones((len(self.parameterized_points_shape[:-1]))) * 0.5
-                )
-                parametric_coordinate[self.principal_parametric_dimension] = (
-                    self.sectional_principal_parametric_coordinate[i]
-                )
-                parametric_derivative_order = np.zeros(
-                    (len(self.parameterized_points_shape[:-1])), dtype=int
-                )
-                parametric_derivative_order[axis] = 1
-                parametric_derivative_order = tuple(parametric_derivative_order)
-                rotation_axis = self.helpful_b_spline.evaluate(
-                    parametric_coordinates=parametric_coordinate,
-                    parametric_derivative_orders=parametric_derivative_order,
-                ).value
-                rotation_axis /= np.linalg.norm(rotation_axis)
-
-                angle = parameter_variable[i]
-                indices = np.arange(np.prod(self.parameterized_points_shape, dtype=int))
-                indices = indices.reshape(self.parameterized_points_shape)
-                indices = np.swapaxes(indices, 0, self.principal_parametric_dimension)
-                indices = indices[i].reshape((-1,))
-
-                section_updated_points = updated_points[list(indices)].reshape(
-                    (len(indices)//self.num_physical_dimensions, self.num_physical_dimensions)
-                )
+            # All sections are rotated at once: gather, rotate with one rotation tensor, and scatter.
+            flat_indices = self.section_indices.reshape((-1,))
+            section_points = updated_points[list(flat_indices)].reshape(
+                (self.num_sections, self.num_points_per_section, self.num_physical_dimensions)
+            )
+            section_averages = csdl.sum(section_points, axes=(1,)) / self.num_points_per_section
+            section_averages_expanded = csdl.expand(section_averages, section_points.shape, 'ki->kpi')
 
-                section_updated_points_sum = csdl.sum(section_updated_points, axes=(0,))
-                number_of_points = csdl.Variable(
-                    name="number_of_section_points",
-                    shape=(self.num_physical_dimensions,),
-                    value=np.ones((self.num_physical_dimensions,))
-                    * self.num_points_per_section,
-                )
-                section_average = section_updated_points_sum / number_of_points
+            rotation_tensor = compute_rotation_tensor(
+                axis_vector=self.rotation_axis_vectors[parameter_name], angles=parameter_variable
+            )
+            rotated_section_points = csdl.einsum(section_points - section_averages_expanded, rotation_tensor, action='kpj,kij->kpi')
+            rotated_section_points = rotated_section_points + section_averages_expanded
 
-                updated_points = updated_points.set(csdl.slice[[indices]], rotate(
-                    points=section_updated_points,
-                    axis_origin=section_average,
-                    axis_vector=rotation_axis,
-                    angles=angle,
-                ).reshape((updated_points[list(indices)].size,)))
+            updated_points = updated_points.set(csdl.slice[[flat_indices]], rotated_section_points.reshape((flat_indices.size,)))
 
         updated_points = updated_points.reshape(self.parameterized_points_shape)
 
@@ -591,27 +538,5 @@ def _get_parametric_coordinate(
     return parametric_coordinate.reshape((1, -1))
 
 
-def _get_indices_in_shape(
-    shape: tuple, total_index: int, section_axis: int, section_axis_index: int
-):
-    indices = []
-    remainder = total_index
-    for i in range(len(shape)):
-        if i == section_axis:
-            continue
-        # axis_index = int(total_index//np.prod(shape[i+1:]))
-        if i < section_axis:
-            axis_index, remainder = np.divmod(
-                remainder, (np.prod(shape[i + 1 :]) / shape[section_axis])
-            )
-        else:
-            axis_index, remainder = np.divmod(remainder, np.prod(shape[i + 1 :]))
-        indices.append(int(axis_index))
-
-    indices = np.array(indices)
-    indices = np.insert(indices, section_axis, section_axis_index)
-    return tuple(indices)
-
-
 if __name__ == "__main__":
     pass
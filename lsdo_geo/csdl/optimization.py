@@ -1,5 +1,9 @@
 import csdl_alpha as csdl
 import numpy as np
+import scipy.linalg
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsl
+import warnings
 
 from typing import Union
 from dataclasses import dataclass
@@ -23,15 +27,26 @@ class Optimization:
             self.state_residual_pairs = []
 
         self.design_variable_initial_values = []
+        self.objective_hessian_sparsity_pattern = None
+        self.constraint_jacobian_sparsity_patterns = []
 
 
-    def add_objective(self, objective:csdl.Variable):
+    def add_objective(self, objective:csdl.Variable, hessian_sparsity_pattern:sps.spmatrix=None):
         '''
         Add the objective variable to the optimization problem.
+
+        Parameters
+        ----------
+        objective : csdl.Variable
+            The (scalar) objective.
+        hessian_sparsity_pattern : sps.spmatrix = None
+            The sparsity pattern of the hessian of the objective wrt the design variables (concatenated in the order they are added).
+            This is used to compute the hessian of the lagrangian sparsely (see compute_kkt_blocks). If None, it is assumed to be dense.
         '''
         if objective.size != 1:
             raise ValueError('Objective must be a scalar variable.')
         self.objective = objective
+        self.objective_hessian_sparsity_pattern = hessian_sparsity_pattern
 
 
     def add_design_variable(self, design_variable:csdl.Variable, initial_value:Union[csdl.Variable,float,np.ndarray]=None):
@@ -47,7 +62,8 @@ class Optimization:
                 design_variable.set_value(initial_value)
 
 
-    def add_constraint(self, constraint:csdl.Variable, penalty:Union[float,np.ndarray,csdl.Variable]=None):
+    def add_constraint(self, constraint:csdl.Variable, penalty:Union[float,np.ndarray,csdl.Variable]=None,
+                       jacobian_sparsity_pattern:sps.spmatrix=None):
         '''
         Add a constraint to the optimization problem.
 
@@ -58,9 +74,13 @@ class Optimization:
         penalty : Union[float,np.ndarray,csdl.Variable], optional
             The penalty for the constraint, by default None. If None, the penalty is treated as a lagrange multiplier.
             If a penalty is given, it is used as the penalty scaling factor for a quadratic constraint penalty.
+        jacobian_sparsity_pattern : sps.spmatrix = None
+            The sparsity pattern of the jacobian of the constraint wrt the design variables (concatenated in the order they are added).
+            This is used to compute the KKT matrix sparsely (see compute_kkt_blocks). If None, it is assumed to be dense.
         '''
         self.constraints.append(constraint)
         self.constraint_penalties.append(penalty)
+        self.constraint_jacobian_sparsity_patterns.append(jacobian_sparsity_pattern)
 
 
     def compute_lagrangian(self):
@@ -145,33 +165,718 @@ class Optimization:
                 self.state_residual_pairs.append((design_variable, residual))
 
 
+    def get_states_and_residuals(self) -> tuple[list[csdl.Variable], list[csdl.Variable]]:
+        '''
+        Returns the states and residuals of the implicit model (in the order they are added to the solver).
+        '''
+        states = []
+        residuals = []
+        for state, residual in self.state_residual_pairs:
+            if isinstance(state, tuple):
+                state = state[0]
+            states.append(state)
+            residuals.append(residual)
+        return states, residuals
+
+
+    def compute_kkt_blocks(self) -> list[csdl.Variable]:
+        '''
+        Constructs the CSDL variables that the KKT matrix is assembled from (see assemble_kkt_matrix). The KKT matrix is
+        [[0, J], [J^T, H]], where J is the jacobian of the constraints (with lagrange multipliers) wrt the design variables and H is the
+        hessian of the lagrangian wrt the design variables. The blocks wrt the lagrange multipliers are not differentiated since they
+        are known exactly (0 and J^T).
+
+        J and H are computed from their sparsity patterns: rows that do not share a column in the pattern are given the same color, and
+        the rows of each color are summed before differentiating, so each block takes one reverse sweep per color (instead of one per
+        row) and is stored as a (num_colors x num_design_variables) matrix. The pattern of J is the jacobian sparsity pattern of each
+        constraint (see add_constraint). The pattern of H is the hessian sparsity pattern of the objective (see add_objective) plus the
+        curvature of the constraints, which can only couple the design variables that a constraint depends on (J^T J).
+        NOTE: Patterns that are not given are assumed to be dense, so the blocks are exact but not compressed.
+
+        Returns
+        -------
+        list[csdl.Variable]
+            The compressed jacobian blocks (for each design variable, if any constraint has lagrange multipliers) followed by the
+            compressed hessian blocks (for each design variable).
+        '''
+        num_design_variables = sum(design_variable.size for design_variable in self.design_variables)
+
+        jacobian_patterns = []
+        for constraint, jacobian_sparsity_pattern in zip(self.constraints, self.constraint_jacobian_sparsity_patterns):
+            if jacobian_sparsity_pattern is None:
+                jacobian_pattern = sps.csr_matrix(np.ones((constraint.size, num_design_variables)))
+            else:
+                jacobian_pattern = sps.csr_matrix(jacobian_sparsity_pattern, dtype=float)
+                if jacobian_pattern.shape != (constraint.size, num_design_variables):
+                    raise ValueError(f'The jacobian sparsity pattern of a constraint has shape {jacobian_pattern.shape}, but it should be ' +
+                                     f'{(constraint.size, num_design_variables)}.')
+            jacobian_patterns.append(sps.csr_matrix(jacobian_pattern != 0, dtype=float))
+
+        if self.objective_hessian_sparsity_pattern is None:
+            objective_hessian_pattern = sps.csr_matrix(np.ones((num_design_variables, num_design_variables)))
+        else:
+            objective_hessian_pattern = sps.csr_matrix(self.objective_hessian_sparsity_pattern, dtype=float)
+            if objective_hessian_pattern.shape != (num_design_variables, num_design_variables):
+                raise ValueError(f'The objective hessian sparsity pattern has shape {objective_hessian_pattern.shape}, but there are ' +
+                                 f'{num_design_variables} design variables.')
+        hessian_pattern = abs(objective_hessian_pattern) + sps.identity(num_design_variables, format='csr')
+        for jacobian_pattern in jacobian_patterns:
+            hessian_pattern = hessian_pattern + jacobian_pattern.T @ jacobian_pattern
+        self.hessian_sparsity_pattern = sps.csr_matrix(hessian_pattern != 0)
+
+        self.kkt_blocks = []
+        multiplier_constraints = [constraint for constraint, constraint_lagrange_multipliers
+                                  in zip(self.constraints, self.lagrange_multipliers) if constraint_lagrange_multipliers is not None]
+        if len(multiplier_constraints) > 0:
+            self.jacobian_sparsity_pattern = sps.csr_matrix(sps.vstack(
+                [jacobian_pattern for jacobian_pattern, constraint_lagrange_multipliers
+                 in zip(jacobian_patterns, self.lagrange_multipliers) if constraint_lagrange_multipliers is not None]) != 0)
+            self.jacobian_colors, compressed_jacobian = _compute_compressed_jacobian(multiplier_constraints, self.design_variables,
+                                                                                     self.jacobian_sparsity_pattern)
+            self.kkt_blocks.extend(compressed_jacobian[design_variable] for design_variable in self.design_variables)
+
+        gradients = [self.dL_dx[design_variable] for design_variable in self.design_variables]
+        self.hessian_colors, compressed_hessian = _compute_compressed_jacobian(gradients, self.design_variables,
+                                                                               self.hessian_sparsity_pattern)
+        self.kkt_blocks.extend(compressed_hessian[design_variable] for design_variable in self.design_variables)
+        return self.kkt_blocks
+
+
+    def assemble_kkt_matrix(self, kkt_block_values:list[np.ndarray]) -> sps.csc_matrix:
+        '''
+        Assembles the sparse KKT matrix (the jacobian of the residuals wrt the states) from the values of the KKT blocks
+        (see compute_kkt_blocks).
+        '''
+        num_blocks = len(self.design_variables)
+        hessian = _decompress_rows(kkt_block_values[-num_blocks:], self.design_variables, self.hessian_colors,
+                                   self.hessian_sparsity_pattern)
+        if len(kkt_block_values) == num_blocks:
+            kkt_matrix = sps.csc_matrix(hessian)
+        else:
+            jacobian = _decompress_rows(kkt_block_values[:num_blocks], self.design_variables, self.jacobian_colors,
+                                        self.jacobian_sparsity_pattern)
+            num_constraints = jacobian.shape[0]
+            kkt_matrix = sps.bmat([[sps.csr_matrix((num_constraints, num_constraints)), jacobian], [jacobian.T, hessian]],
+                                  format='csc')
+        kkt_matrix.eliminate_zeros()
+        return kkt_matrix
+
+
+    def evaluate_kkt_matrix(self, sparse:bool=True, simulator=None) -> Union[sps.csc_matrix,np.ndarray]:
+        '''
+        Assembles the KKT matrix (the jacobian of the residuals wrt the states) at the current values of the states.
+
+        NOTE: The values of the KKT blocks are used, so this requires the recorder to be run inline (or a simulator).
+
+        Parameters
+        ----------
+        sparse : bool = True
+            If True, the KKT matrix is assembled as a sparse (csc) matrix. If False, a dense array is returned.
+        simulator : csdl.experimental.PySimulator = None
+            If given, the values of the KKT blocks are read from the simulator instead of the (inline) variable values.
+        '''
+        if not hasattr(self, 'kkt_blocks'):
+            self.compute_kkt_blocks()
+
+        kkt_block_values = []
+        for block in self.kkt_blocks:
+            block_value = simulator[block] if simulator is not None else block.value
+            if block_value is None:
+                raise ValueError('The KKT matrix can only be evaluated when the recorder is run inline.')
+            kkt_block_values.append(block_value)
+
+        kkt_matrix = self.assemble_kkt_matrix(kkt_block_values)
+        if not sparse:
+            return kkt_matrix.toarray()
+        return kkt_matrix
+
+
+    def check_constant_kkt_matrix(self, kkt_matrix:Union[sps.spmatrix,np.ndarray]=None, perturbation_size:float=1.e-2,
+                                  tolerance:float=1.e-8) -> bool:
+        '''
+        Checks whether the KKT matrix is constant (the constraints are affine in the design variables and the objective is quadratic)
+        with a finite difference of two KKT evaluations: the KKT matrix at the current states is compared to the KKT matrix at randomly
+        perturbed states. Nothing is added to the graph. The model is run (with a simulator) at the perturbed states and then again at the
+        original states so that the values of every variable are restored.
+        NOTE: This runs the whole model twice, so NewtonOptimizer only calls it when check_constant_kkt_matrix is True.
+
+        Parameters
+        ----------
+        kkt_matrix : Union[sps.spmatrix, np.ndarray] = None
+            The KKT matrix at the current states. If None, it is evaluated.
+        perturbation_size : float = 1.e-2
+            The size of the random perturbation of the states (relative to the size of the states).
+        tolerance : float = 1.e-8
+            The (relative) tolerance on the change in the KKT matrix.
+        '''
+        if kkt_matrix is None:
+            kkt_matrix = self.evaluate_kkt_matrix()
+        states, _ = self.get_states_and_residuals()
+
+        random_number_generator = np.random.default_rng(0)
+        original_state_values = [np.array(state.value) for state in states]
+        simulator = csdl.experimental.PySimulator(csdl.get_current_recorder())
+        try:
+            for state, state_value in zip(states, original_state_values):
+                scale = max(np.linalg.norm(state_value)/np.sqrt(max(state_value.size, 1)), 1.)
+                simulator[state] = state_value + perturbation_size*scale*random_number_generator.standard_normal(state_value.shape)
+            simulator.run()
+            perturbed_kkt_matrix = self.evaluate_kkt_matrix(simulator=simulator)
+        finally:
+            for state, state_value in zip(states, original_state_values):
+                simulator[state] = state_value
+            simulator.run()
+
+        kkt_matrix_change = abs(sps.csc_matrix(perturbed_kkt_matrix) - sps.csc_matrix(kkt_matrix))
+        kkt_matrix_size = abs(sps.csc_matrix(kkt_matrix)).max() if kkt_matrix.shape[0] > 0 else 0.
+        if kkt_matrix_change.nnz == 0:
+            return True
+        return kkt_matrix_change.max() <= tolerance*max(kkt_matrix_size, 1.)
+
+
+class KKTSolveOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    Applies the inverse of a factorized KKT matrix to the residuals. The factorization is computed once and reused every time the
+    operation is evaluated (across nonlinear iterations and across evaluations of the model). Sparse KKT matrices are factorized with a
+    sparse direct solver (SuperLU) and dense ones with LAPACK. The derivatives are computed as vector-jacobian products with the
+    transposed solve of the same factorization (see KKTSolveOperationVJP), so the inverse is never formed.
+    '''
+    def __init__(self, kkt_matrix:Union[sps.spmatrix,np.ndarray]) -> None:
+        super().__init__()
+        self.factorize(kkt_matrix)
+
+    def factorize(self, kkt_matrix:Union[sps.spmatrix,np.ndarray]):
+        '''
+        Factorizes the KKT matrix (with SuperLU if it is sparse and with LAPACK if it is dense).
+        '''
+        if sps.issparse(kkt_matrix):
+            self.kkt_matrix_factorization = spsl.splu(sps.csc_matrix(kkt_matrix))
+        else:
+            self.kkt_matrix_factorization = scipy.linalg.lu_factor(kkt_matrix)
+
+    def solve(self, right_hand_side:np.ndarray, transpose:bool=False) -> np.ndarray:
+        '''
+        Solves K x = right_hand_side (or K^T x = right_hand_side if transpose is True) with the factorization.
+        '''
+        if isinstance(self.kkt_matrix_factorization, spsl.SuperLU):
+            return self.kkt_matrix_factorization.solve(right_hand_side, trans='T' if transpose else 'N')
+        return scipy.linalg.lu_solve(self.kkt_matrix_factorization, right_hand_side, trans=1 if transpose else 0)
+
+    def evaluate(self, residuals:list[csdl.Variable], states:list[csdl.Variable]) -> list[csdl.Variable]:
+        '''
+        Creates the steps (one per state) that solve the KKT system with the given residuals as the right hand side.
+        '''
+        self.residual_shapes = [residual.shape for residual in residuals]
+        self.residual_sizes = [residual.size for residual in residuals]
+        self.state_sizes = [state.size for state in states]
+        for i, residual in enumerate(residuals):
+            self.declare_input(f'residual_{i}', residual)
+        steps = []
+        for i, state in enumerate(states):
+            steps.append(self.create_output(f'step_{i}', state.shape))
+        self.declare_vjp_function(KKTSolveOperationVJP, kkt_solve_operation=self)
+        return steps
+
+    def compute(self, inputs, outputs):
+        residual = np.concatenate([np.asarray(inputs[f'residual_{i}']).reshape((-1,)) for i in range(len(self.residual_sizes))])
+        step = self.solve(residual)
+        state_offsets = np.cumsum([0] + self.state_sizes)
+        for i in range(len(self.state_sizes)):
+            outputs[f'step_{i}'] = step[state_offsets[i]:state_offsets[i+1]]
+
+
+class KKTSolveOperationVJP(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    The vector-jacobian product of KKTSolveOperation: since step = K^-1 residual, d_residual = K^-T d_step, which is one transposed solve
+    with the factorization of the forward operation.
+    '''
+    def __init__(self, kkt_solve_operation:KKTSolveOperation) -> None:
+        super().__init__()
+        self.kkt_solve_operation = kkt_solve_operation
+
+    def evaluate(self, inputs, d_outputs):
+        kkt_solve_operation = self.kkt_solve_operation
+        for i in range(len(kkt_solve_operation.state_sizes)):
+            self.declare_input(f'd_step_{i}', d_outputs[f'step_{i}'])
+        d_inputs = {}
+        for i, residual_shape in enumerate(kkt_solve_operation.residual_shapes):
+            d_inputs[f'residual_{i}'] = self.create_output(f'd_residual_{i}', residual_shape)
+        return d_inputs
+
+    def compute(self, inputs, outputs):
+        kkt_solve_operation = self.kkt_solve_operation
+        d_step = np.concatenate([np.asarray(inputs[f'd_step_{i}']).reshape((-1,)) for i in range(len(kkt_solve_operation.state_sizes))])
+        d_residual = kkt_solve_operation.solve(d_step, transpose=True)
+        residual_offsets = np.cumsum([0] + kkt_solve_operation.residual_sizes)
+        for i, residual_shape in enumerate(kkt_solve_operation.residual_shapes):
+            outputs[f'd_residual_{i}'] = d_residual[residual_offsets[i]:residual_offsets[i+1]].reshape(residual_shape)
+
+
+class KKTNewtonStepOperation(KKTSolveOperation):
+    '''
+    Computes the Newton step K^-1 residual, where the KKT matrix K is assembled sparsely from the KKT blocks at the current states
+    (see Optimization.compute_kkt_blocks) and factorized with SuperLU. The factorization is only recomputed when the KKT matrix changes
+    (by more than round-off), so a quadratic program (constant KKT matrix) is only factorized once.
+    NOTE: The step is only used to update the states, so no derivatives are declared. The derivatives of the solution come from the
+    residuals.
+    '''
+    def __init__(self, optimization:Optimization) -> None:
+        csdl.experimental.CustomExplicitOperationBeta.__init__(self)
+        self.optimization = optimization
+        self.kkt_matrix = None
+        self.num_factorizations = 0
+
+    def evaluate(self, residuals:list[csdl.Variable], states:list[csdl.Variable], kkt_blocks:list[csdl.Variable]) -> list[csdl.Variable]:
+        '''
+        Creates the Newton steps (one per state) for the given residuals and KKT blocks.
+        '''
+        self.residual_sizes = [residual.size for residual in residuals]
+        self.state_sizes = [state.size for state in states]
+        self.num_kkt_blocks = len(kkt_blocks)
+        for i, residual in enumerate(residuals):
+            self.declare_input(f'residual_{i}', residual)
+        for i, kkt_block in enumerate(kkt_blocks):
+            self.declare_input(f'kkt_block_{i}', kkt_block)
+        steps = []
+        for i, state in enumerate(states):
+            steps.append(self.create_output(f'step_{i}', state.shape))
+        return steps
+
+    def compute(self, inputs, outputs):
+        kkt_matrix = self.optimization.assemble_kkt_matrix([inputs[f'kkt_block_{i}'] for i in range(self.num_kkt_blocks)])
+        if self.kkt_matrix is None or abs(kkt_matrix - self.kkt_matrix).max() > 1.e-10*abs(self.kkt_matrix).max():
+            self.kkt_matrix = kkt_matrix
+            self.factorize(kkt_matrix)
+            self.num_factorizations += 1
+        residual = np.concatenate([np.asarray(inputs[f'residual_{i}']).reshape((-1,)) for i in range(len(self.residual_sizes))])
+        step = self.solve(residual)
+        state_offsets = np.cumsum([0] + self.state_sizes)
+        for i in range(len(self.state_sizes)):
+            outputs[f'step_{i}'] = step[state_offsets[i]:state_offsets[i+1]]
+
+
+class WarmStartHistory:
+    '''
+    The last two converged states of a solver together with the inputs (for instance the desired values of a parameterization problem)
+    that they were solved for. It is shared by the operations that seed and record the states (WarmStartInitialGuessOperation and
+    SolveRecordOperation), so warm starting happens every time the model is evaluated (including by an outer optimizer or a simulator).
+
+    Parameters
+    ----------
+    default_initial_guess : list[np.ndarray]
+        The initial values of the states used until a solution is recorded.
+    extrapolate : bool = False
+        If True and two solutions are recorded, the initial guess is extrapolated from them (see get_initial_guess).
+    '''
+    def __init__(self, default_initial_guess:list[np.ndarray], extrapolate:bool=False) -> None:
+        self.default_initial_guess = default_initial_guess
+        self.extrapolate = extrapolate
+        self.solutions = []
+
+    def get_initial_guess(self, inputs:np.ndarray) -> list[np.ndarray]:
+        '''
+        Returns the initial guess of the states for the given inputs: the last recorded solution or, if extrapolate is True and two
+        solutions are recorded, x_1 + alpha*(x_1 - x_0), where alpha is the projection of the change in the inputs since the last solve
+        onto the change between the last two solves (a secant predictor).
+        '''
+        if len(self.solutions) == 0:
+            return self.default_initial_guess
+
+        last_states, last_inputs = self.solutions[-1]
+        if self.extrapolate and len(self.solutions) == 2:
+            previous_states, previous_inputs = self.solutions[0]
+            previous_change = last_inputs - previous_inputs
+            previous_change_norm_squared = previous_change.dot(previous_change)
+            if previous_change_norm_squared > 0.:
+                alpha = (inputs - last_inputs).dot(previous_change)/previous_change_norm_squared
+                return [last_state + alpha*(last_state - previous_state)
+                        for last_state, previous_state in zip(last_states, previous_states)]
+        return last_states
+
+    def store_solution(self, states:list[np.ndarray], inputs:np.ndarray):
+        '''
+        Records a converged solution (only the last two are kept since they are all that is needed for extrapolation).
+        '''
+        self.solutions = self.solutions[-1:] + [(states, inputs)]
+
+
+class WarmStartInitialGuessOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    Computes the initial values of the states of a solver from the warm start history. The outputs are given to the solver as the
+    initial values of the states, so they are evaluated before every solve. The initial values do not affect the converged states,
+    so the derivatives of this operation are 0.
+    '''
+    def __init__(self, warm_start_history:WarmStartHistory) -> None:
+        super().__init__()
+        self.warm_start_history = warm_start_history
+
+    def evaluate(self, inputs:list[csdl.Variable], states:list[csdl.Variable]) -> list[csdl.Variable]:
+        self.num_inputs = len(inputs)
+        self.state_shapes = [state.shape for state in states]
+        for i, input in enumerate(inputs):
+            self.declare_input(f'input_{i}', input)
+        initial_guesses = [self.create_output(f'initial_guess_{i}', state.shape) for i, state in enumerate(states)]
+        self.declare_vjp_function(ZeroVJPOperation, input_shapes={f'input_{i}':input.shape for i, input in enumerate(inputs)})
+        return initial_guesses
+
+    def compute(self, inputs, outputs):
+        inputs_vector = _concatenate_values([inputs[f'input_{i}'] for i in range(self.num_inputs)])
+        initial_guess = self.warm_start_history.get_initial_guess(inputs_vector)
+        for i, state_shape in enumerate(self.state_shapes):
+            outputs[f'initial_guess_{i}'] = np.asarray(initial_guess[i]).reshape(state_shape)
+
+
+class ResidualEvaluationCounterOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    Passes a residual through unchanged and counts how many times it is evaluated. A solver evaluates its residuals once per iteration
+    and once more to confirm convergence, so the number of iterations of a solve is the number of evaluations during the solve minus
+    one (see start_solve and record_solve). This does not depend on what the solver reports.
+    '''
+    def __init__(self) -> None:
+        super().__init__()
+        self.num_evaluations = 0
+        self.num_evaluations_at_solve_start = 0
+        self.iteration_counts = []
+
+    def evaluate(self, residual:csdl.Variable) -> csdl.Variable:
+        self.declare_input('residual', residual)
+        counted_residual = self.create_output('counted_residual', residual.shape)
+        self.declare_vjp_function(PassThroughVJPOperation, output_name='counted_residual', input_name='residual',
+                                  shape=residual.shape)
+        return counted_residual
+
+    def compute(self, inputs, outputs):
+        self.num_evaluations += 1
+        outputs['counted_residual'] = inputs['residual']
+
+    def start_solve(self):
+        '''
+        Marks the start of a solve so that evaluations outside of the solver (like the inline evaluation when the graph is built) are
+        not counted.
+        '''
+        self.num_evaluations_at_solve_start = self.num_evaluations
+
+    def record_solve(self) -> int:
+        '''
+        Records and returns the number of iterations since the last solve (or start_solve).
+        '''
+        iteration_count = max(self.num_evaluations - self.num_evaluations_at_solve_start - 1, 0)
+        self.num_evaluations_at_solve_start = self.num_evaluations
+        self.iteration_counts.append(iteration_count)
+        return iteration_count
+
+
+class SolveRecordOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    Runs after every solve (every time the model is evaluated) to record the converged states (and the inputs they were solved for) in
+    the warm start history and the number of iterations from the residual evaluation counter. Its output is the number of iterations
+    of the solve (NaN if iterations are not counted).
+    '''
+    def __init__(self, warm_start_history:WarmStartHistory=None, iteration_counter:ResidualEvaluationCounterOperation=None) -> None:
+        super().__init__()
+        self.warm_start_history = warm_start_history
+        self.iteration_counter = iteration_counter
+
+    def evaluate(self, states:list[csdl.Variable], inputs:list[csdl.Variable]) -> csdl.Variable:
+        self.num_states = len(states)
+        self.num_inputs = len(inputs)
+        input_shapes = {}
+        for i, state in enumerate(states):
+            self.declare_input(f'state_{i}', state)
+            input_shapes[f'state_{i}'] = state.shape
+        for i, input in enumerate(inputs):
+            self.declare_input(f'input_{i}', input)
+            input_shapes[f'input_{i}'] = input.shape
+        iteration_count = self.create_output('iteration_count', (1,))
+        self.declare_vjp_function(ZeroVJPOperation, input_shapes=input_shapes)
+        return iteration_count
+
+    def compute(self, inputs, outputs):
+        if self.warm_start_history is not None:
+            self.warm_start_history.store_solution(states=[np.array(inputs[f'state_{i}']) for i in range(self.num_states)],
+                                                   inputs=_concatenate_values([inputs[f'input_{i}'] for i in range(self.num_inputs)]))
+        iteration_count = np.nan
+        if self.iteration_counter is not None:
+            iteration_count = self.iteration_counter.record_solve()
+        outputs['iteration_count'] = np.array([iteration_count], dtype=float)
+
+
+class PassThroughVJPOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    The vector-jacobian product of an operation whose output is its input.
+    '''
+    def __init__(self, output_name:str, input_name:str, shape:tuple) -> None:
+        super().__init__()
+        self.output_name = output_name
+        self.input_name = input_name
+        self.shape = shape
+
+    def evaluate(self, inputs, d_outputs):
+        self.declare_input(f'd_{self.output_name}', d_outputs[self.output_name])
+        return {self.input_name:self.create_output(f'd_{self.input_name}', self.shape)}
+
+    def compute(self, inputs, outputs):
+        outputs[f'd_{self.input_name}'] = inputs[f'd_{self.output_name}']
+
+
+class ZeroVJPOperation(csdl.experimental.CustomExplicitOperationBeta):
+    '''
+    The vector-jacobian product of an operation whose outputs do not depend (differentiably) on its inputs.
+    '''
+    def __init__(self, input_shapes:dict[str,tuple]) -> None:
+        super().__init__()
+        self.input_shapes = input_shapes
+
+    def evaluate(self, inputs, d_outputs):
+        for name, d_output in d_outputs.items():
+            self.declare_input(f'd_{name}', d_output)
+        return {name:self.create_output(f'd_{name}', shape) for name, shape in self.input_shapes.items()}
+
+    def compute(self, inputs, outputs):
+        for name, shape in self.input_shapes.items():
+            outputs[f'd_{name}'] = np.zeros(shape)
+
+
+def _color_rows(sparsity_pattern:sps.spmatrix) -> np.ndarray:
+    '''
+    Greedily colors the rows of a sparsity pattern so that no two rows of the same color have an entry in the same column. The rows of a
+    matrix with this pattern can then be recovered from the sums of the rows of each color.
+    '''
+    sparsity_pattern = sps.csr_matrix(sparsity_pattern != 0, dtype=float)
+    num_rows, num_columns = sparsity_pattern.shape
+    if sparsity_pattern.nnz == num_rows*num_columns:
+        return np.arange(num_rows)
+
+    row_conflicts = sps.csr_matrix(sparsity_pattern @ sparsity_pattern.T)
+    colors = np.full((num_rows,), -1, dtype=np.int64)
+    for row in range(num_rows):
+        conflicting_colors = colors[row_conflicts.indices[row_conflicts.indptr[row]:row_conflicts.indptr[row+1]]]
+        conflicting_colors = conflicting_colors[conflicting_colors >= 0]
+        used_colors = np.zeros((conflicting_colors.size + 1,), dtype=bool)
+        used_colors[conflicting_colors[conflicting_colors <= conflicting_colors.size]] = True
+        colors[row] = np.argmin(used_colors)
+    return colors
+
+
+def _compute_compressed_jacobian(ofs:list[csdl.Variable], wrts:list[csdl.Variable],
+                                 sparsity_pattern:sps.spmatrix) -> tuple[np.ndarray,dict[csdl.Variable,csdl.Variable]]:
+    '''
+    Computes the jacobian of the (concatenated) ofs wrt the wrts with one reverse sweep per row color (see _color_rows): the rows of each
+    color are summed before differentiating. Returns the row colors and the compressed jacobian (num_colors x wrt.size) for each wrt.
+    '''
+    colors = _color_rows(sparsity_pattern)
+    num_colors = int(colors.max()) + 1
+    compression_matrix = sps.csr_matrix((np.ones(colors.size), (colors, np.arange(colors.size))), shape=(num_colors, colors.size))
+
+    compressed_of = None
+    offset = 0
+    for of in ofs:
+        compressed_term = csdl.sparse.matvec(compression_matrix[:, offset:offset+of.size], of.reshape((of.size, 1)))
+        compressed_of = compressed_term if compressed_of is None else compressed_of + compressed_term
+        offset += of.size
+    return colors, csdl.derivative(compressed_of.reshape((num_colors,)), wrts, loop=True)
+
+
+def _decompress_rows(compressed_block_values:list[np.ndarray], wrts:list[csdl.Variable], colors:np.ndarray,
+                     sparsity_pattern:sps.spmatrix) -> sps.csr_matrix:
+    '''
+    Recovers the (sparse) jacobian from the values of the compressed jacobian blocks (see _compute_compressed_jacobian).
+    '''
+    compressed_jacobian = np.hstack([np.asarray(block_value).reshape((-1, wrt.size))
+                                     for block_value, wrt in zip(compressed_block_values, wrts)])
+    rows, columns = sparsity_pattern.nonzero()
+    return sps.csr_matrix((compressed_jacobian[colors[rows], columns], (rows, columns)), shape=sparsity_pattern.shape)
+
+
+def _concatenate_values(values:list[np.ndarray]) -> np.ndarray:
+    if len(values) == 0:
+        return np.zeros((0,))
+    return np.concatenate([np.asarray(value, dtype=float).reshape((-1,)) for value in values])
+
 
 class NewtonOptimizer:
     '''
     A Newton Optimizer class.
 
+    By default, every Newton iteration assembles the sparse KKT matrix at the current states (the hessian of the lagrangian is computed
+    from its sparsity pattern, see Optimization.compute_kkt_blocks) and solves it with a sparse direct solver (SuperLU).
+
     NOTE: This is a temporary implementation until integration with the CSDL solvers is done
         (the CSDL solvers need the add_optimization functionality)
     '''
-    def __init__(self) -> None:
-        # self.solver = csdl.nonlinear_solvers.Newton()
-        self.solver = csdl.nonlinear_solvers.Newton(residual_jac_kwargs={"loop": True, "concatenate_ofs": True})
+    def __init__(self, reuse_jacobian:bool=False, direct_qp_solve:bool=False, warm_start:bool=False, extrapolate:bool=False,
+                 count_iterations:bool=False, check_constant_kkt_matrix:bool=False) -> None:
+        '''
+        Parameters
+        ----------
+        reuse_jacobian : bool = False
+            If True, the KKT matrix is assembled and factorized once and the factorization is reused for every iteration (chord Newton)
+            and every evaluation of the model. If the KKT matrix is constant (affine constraints and a quadratic objective), this converges
+            in a single step. Otherwise, it falls back to the linearly convergent chord iteration.
+            NOTE: The KKT matrix is factorized at the initial point (the values of the states and inputs when setup is called) and is
+            never refactorized, so the chord iteration converges more slowly (or not at all) the further the solution moves from it.
+            NOTE: This requires the recorder to be run inline.
+        direct_qp_solve : bool = False
+            If True, the problem is assumed to be an equality constrained quadratic program (constant KKT matrix), so the solution is
+            computed with a single factorization of the KKT matrix at the initial point and a single update (see setup_factorized_solve).
+            If the problem is not a quadratic program, this is still correct, but converges like the chord iteration.
+            NOTE: This requires the recorder to be run inline.
+        warm_start : bool = False
+            If True, every solve (every evaluation of the model, including by an outer optimizer or a simulator) starts from the last
+            converged states instead of the initial values. This is done in the graph: an operation before the solver computes the initial
+            values of the states from the warm start history, and an operation after the solver records the converged states (see
+            add_warm_start_inputs and warm_start_history).
+        extrapolate : bool = False
+            If True (and warm_start is True), the initial guess is extrapolated from the last two solutions along the change in the warm
+            start inputs instead of reusing the last solution.
+        count_iterations : bool = False
+            If True, the number of iterations of every solve is recorded (see iteration_counts and iteration_count). It is counted from
+            the evaluations of the residuals (see ResidualEvaluationCounterOperation).
+        check_constant_kkt_matrix : bool = False
+            If True (and direct_qp_solve is True), the KKT matrix is checked for being constant before it is used for the direct solve
+            (see Optimization.check_constant_kkt_matrix). If it is not, the regular Newton solver (or the chord iteration if
+            reuse_jacobian is True) is used instead.
+            NOTE: The check runs the whole model twice (with a simulator) during setup, so it is off by default.
+        '''
+        self.reuse_jacobian = reuse_jacobian
+        self.direct_qp_solve = direct_qp_solve
+        self.check_constant_kkt_matrix = check_constant_kkt_matrix
+        self.warm_start = warm_start
+        self.extrapolate = extrapolate
+        self.warm_start_inputs = []
+        self.warm_start_history = None
+        self.iteration_counter = ResidualEvaluationCounterOperation() if count_iterations else None
+        self.iteration_count = None
+        # NOTE: Every mode computes its own (Newton, chord, or direct) step with a sparse factorization of the KKT matrix, so the solver
+        #   only applies the steps (state_update = state - step).
+        self.solver = csdl.nonlinear_solvers.Jacobi()
         self.has_been_setup = False
 
+    @property
+    def iteration_counts(self) -> list[int]:
+        '''
+        The number of iterations of each solve (recorded when count_iterations is True).
+        '''
+        if self.iteration_counter is None:
+            return []
+        return self.iteration_counter.iteration_counts
+
     def add_optimization(self, optimization:Optimization):
         '''
         Add an optimization problem to the optimizer.
         '''
         self.optimization = optimization
 
+    def add_warm_start_inputs(self, inputs:list[csdl.Variable]):
+        '''
+        Adds the inputs that the solution depends on (for instance the desired values of a parameterization problem). The change in these
+        inputs is used to extrapolate the initial guess, and they make sure that the warm start is recomputed whenever they change.
+        '''
+        self.warm_start_inputs.extend(inputs)
+
     def setup(self):
         self.optimization.setup()
-        for state, residual in self.optimization.state_residual_pairs:
+        if self.warm_start:
+            self.setup_warm_start()
+
+        if self.reuse_jacobian or self.direct_qp_solve:
+            self.setup_factorized_solve()
+        else:
+            self.setup_newton_solve()
+        self.has_been_setup = True
+
+    def setup_warm_start(self):
+        '''
+        Creates the operation that computes the initial values of the states from the warm start history. Its outputs replace the initial
+        values of the states (given initial values are only used for the first solve).
+        '''
+        states, _ = self.optimization.get_states_and_residuals()
+        default_initial_guess = []
+        for state, _ in self.optimization.state_residual_pairs:
+            initial_value = state[1] if isinstance(state, tuple) else None
+            state = state[0] if isinstance(state, tuple) else state
+            if isinstance(initial_value, csdl.Variable):
+                initial_value = initial_value.value
+            if initial_value is None:
+                initial_value = state.value
+            default_initial_guess.append(np.array(np.broadcast_to(initial_value, state.shape), dtype=float))
+        self.warm_start_history = WarmStartHistory(default_initial_guess, extrapolate=self.extrapolate)
+
+        if len(self.warm_start_inputs) == 0:
+            warnings.warn('Warm starting without any warm start inputs: the initial guess is only updated when the solver is run, ' +
+                          'so re-evaluating the model reuses the first initial guess. Add the inputs with add_warm_start_inputs.')
+            return
+        initial_guess_operation = WarmStartInitialGuessOperation(self.warm_start_history)
+        initial_guesses = initial_guess_operation.evaluate(self.warm_start_inputs, states)
+        self.optimization.state_residual_pairs = [((state, initial_guess), residual) for state, initial_guess, (_, residual)
+                                                  in zip(states, initial_guesses, self.optimization.state_residual_pairs)]
+
+    def add_states(self, steps:list[csdl.Variable], residuals:list[csdl.Variable]=None):
+        '''
+        Adds the states and residuals of the optimization problem to the solver with the update state - step.
+
+        Parameters
+        ----------
+        steps : list[csdl.Variable]
+            The step for each state.
+        residuals : list[csdl.Variable] = None
+            The residual for each state. If None, the residuals of the optimization problem are used.
+        '''
+        if residuals is None:
+            _, residuals = self.optimization.get_states_and_residuals()
+        if self.iteration_counter is not None and len(residuals) > 0:
+            # NOTE: The residuals are all evaluated together, so counting the evaluations of one of them is enough.
+            residuals = [self.iteration_counter.evaluate(residuals[0])] + list(residuals[1:])
+        for (state, _), residual, step in zip(self.optimization.state_residual_pairs, residuals, steps):
             if isinstance(state, tuple):
-                self.solver.add_state(state[0], residual, initial_value=state[1])
+                self.solver.add_state(state[0], residual, state_update=state[0] - step, initial_value=state[1])
             else:
-                self.solver.add_state(state, residual)
-        self.has_been_setup = True
+                self.solver.add_state(state, residual, state_update=state - step)
+
+    def setup_newton_solve(self):
+        '''
+        Sets up the Newton iteration: every iteration assembles the sparse KKT matrix at the current states (see
+        Optimization.compute_kkt_blocks) and solves it with SuperLU (see KKTNewtonStepOperation).
+        '''
+        states, residuals = self.optimization.get_states_and_residuals()
+        if hasattr(self.optimization, 'kkt_blocks'):
+            kkt_blocks = self.optimization.kkt_blocks
+        else:
+            kkt_blocks = self.optimization.compute_kkt_blocks()
+        self.newton_step_operation = KKTNewtonStepOperation(self.optimization)
+        steps = self.newton_step_operation.evaluate(residuals, states, kkt_blocks)
+        self.add_states(steps)
+
+    def setup_factorized_solve(self):
+        '''
+        Factorizes the KKT matrix once (at the initial point: the current values of the states and inputs) and adds the states to the
+        solver with the update state - K^-1 residual.
+
+        For the chord iteration (reuse_jacobian), the residual given to the solver is the original residual. For the direct solve
+        (direct_qp_solve), it is the preconditioned residual K^-1 residual, which has the same solution. If the KKT matrix is constant
+        (quadratic program), the solution is reached in a single update.
+        NOTE: The derivatives of the solution wrt the inputs are computed by CSDL from the residual given to the solver (the implicit
+            function theorem), not with this factorization. Only the vector-jacobian products through K^-1 use it (see
+            KKTSolveOperationVJP).
+        '''
+        kkt_matrix = self.optimization.evaluate_kkt_matrix()
+        direct_solve = self.direct_qp_solve
+        if direct_solve and self.check_constant_kkt_matrix:
+            direct_solve = self.optimization.check_constant_kkt_matrix(kkt_matrix)
+            if not direct_solve:
+                warnings.warn('direct_qp_solve was requested, but the KKT matrix is not constant (the problem is not a quadratic ' +
+                              'program), so the regular Newton solver (or the chord iteration if reuse_jacobian is True) is used instead.')
+                if not self.reuse_jacobian:
+                    self.setup_newton_solve()
+                    return
+
+        self.kkt_solve_operation = KKTSolveOperation(kkt_matrix)
+        states, residuals = self.optimization.get_states_and_residuals()
+        steps = self.kkt_solve_operation.evaluate(residuals, states)
+        if direct_solve:
+            self.add_states(steps, residuals=steps)
+        else:
+            self.add_states(steps)
 
     def run(self):
         '''
@@ -181,4 +886,10 @@ class NewtonOptimizer:
         '''
         if not self.has_been_setup:
             self.setup()
-        self.solver.run()
\ No newline at end of file
+        if self.iteration_counter is not None:
+            self.iteration_counter.start_solve()
+        self.solver.run()
+        if self.warm_start or self.iteration_counter is not None:
+            states, _ = self.optimization.get_states_and_residuals()
+            self.solve_record_operation = SolveRecordOperation(self.warm_start_history, self.iteration_counter)
+            self.iteration_count = self.solve_record_operation.evaluate(states, self.warm_start_inputs if self.warm_start else [])
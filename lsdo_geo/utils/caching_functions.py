@@ -0,0 +1,217 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+
+_cache_statistics = {}
+
+
+def hash_file(file_name:str, chunk_size:int=2**20) -> str:
+    '''
+    Computes a hash of the contents of a file.
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the file (with path) to hash.
+    chunk_size : int = 2**20
+        The number of bytes read at a time.
+    '''
+    hasher = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_data(*data) -> str:
+    '''
+    Computes a hash of arbitrarily nested arrays, numbers, strings, lists, tuples, and dictionaries.
+
+    Parameters
+    ----------
+    data
+        The data to hash.
+    '''
+    hasher = hashlib.sha256()
+    _update_hash(hasher, data)
+    return hasher.hexdigest()
+
+
+def _update_hash(hasher, data):
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data)
+        hasher.update(b'ndarray' + str(data.dtype).encode() + str(data.shape).encode())
+        hasher.update(data.tobytes())
+    elif isinstance(data, dict):
+        hasher.update(b'dict' + str(len(data)).encode())
+        for key, value in data.items():
+            _update_hash(hasher, key)
+            _update_hash(hasher, value)
+    elif isinstance(data, (list, tuple)):
+        hasher.update(type(data).__name__.encode() + str(len(data)).encode())
+        for item in data:
+            _update_hash(hasher, item)
+    elif data is None or isinstance(data, (bool, int, float, complex, str, bytes, np.generic)):
+        hasher.update(type(data).__name__.encode() + repr(data).encode())
+    else:
+        raise TypeError(f'Can not hash data of type {type(data).__name__} for a cache key. ' +
+                        'Only arrays, numbers, strings, lists, tuples, and dictionaries are supported.')
+
+
+def record_cache_access(cache_name:str, hit:bool):
+    '''
+    Records a cache hit or miss.
+
+    Parameters
+    ----------
+    cache_name : str
+        The name of the cache (for example 'imports').
+    hit : bool
+        Whether the access was a hit (True) or a miss (False).
+    '''
+    statistics = _cache_statistics.setdefault(cache_name, {'hits':0, 'misses':0, 'evictions':0})
+    if hit:
+        statistics['hits'] += 1
+    else:
+        statistics['misses'] += 1
+
+
+def get_cache_statistics(cache_name:str=None) -> dict:
+    '''
+    Returns the number of hits, misses, and evictions of the on-disk caches.
+
+    Parameters
+    ----------
+    cache_name : str = None
+        The name of the cache. If None, the statistics of every cache are returned.
+    '''
+    if cache_name is None:
+        return {name:statistics.copy() for name, statistics in _cache_statistics.items()}
+    return _cache_statistics.get(cache_name, {'hits':0, 'misses':0, 'evictions':0}).copy()
+
+
+def reset_cache_statistics(cache_name:str=None):
+    '''
+    Resets the hit/miss/eviction counters.
+
+    Parameters
+    ----------
+    cache_name : str = None
+        The name of the cache. If None, the statistics of every cache are reset.
+    '''
+    if cache_name is None:
+        _cache_statistics.clear()
+    else:
+        _cache_statistics.pop(cache_name, None)
+
+
+def save_pickle(file_path:Path, data):
+    '''
+    Pickles data to a file, creating the parent folder if needed. The file is written to a temporary file first so that
+    readers never see a partially written entry.
+    '''
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = file_path.with_name(file_path.name + '.tmp')
+    with open(temporary_path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, file_path)
+
+
+def load_pickle(file_path:Path):
+    '''
+    Loads pickled data from a file. Returns None if the file does not exist or can not be read.
+    '''
+    file_path = Path(file_path)
+    if not file_path.is_file():
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    touch_cache_entry(file_path)
+    return data
+
+
+def save_array(file_path:Path, array:np.ndarray):
+    '''
+    Saves an array in .npy format (which can be memory-mapped when loaded).
+    '''
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = file_path.with_name(file_path.name + '.tmp')
+    with open(temporary_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(temporary_path, file_path)
+
+
+def load_array(file_path:Path, mmap:bool=True) -> np.ndarray:
+    '''
+    Loads an array saved by save_array. Returns None if the file does not exist or can not be read.
+    '''
+    file_path = Path(file_path)
+    if not file_path.is_file():
+        return None
+    try:
+        array = np.load(file_path, mmap_mode='r' if mmap else None)
+    except (OSError, ValueError):
+        return None
+    touch_cache_entry(file_path)
+    return array
+
+
+def touch_cache_entry(file_path:Path):
+    '''
+    Updates the modification time of a cache file so that recently used entries are evicted last.
+    '''
+    try:
+        os.utime(file_path)
+    except OSError:
+        pass
+
+
+def evict_cache_entries(folder:Path, max_size:int, cache_name:str=None):
+    '''
+    Deletes the least recently used entries of a cache folder until its total size is below max_size. Files are grouped
+    into entries by the part of their name before the first underscore (the cache key).
+
+    Parameters
+    ----------
+    folder : Path
+        The cache folder.
+    max_size : int
+        The maximum total size of the folder in bytes.
+    cache_name : str = None
+        The name of the cache used for the eviction statistics.
+    '''
+    folder = Path(folder)
+    if max_size is None or not folder.is_dir():
+        return
+
+    entries = {}
+    for file_path in folder.iterdir():
+        if not file_path.is_file():
+            continue
+        stat = file_path.stat()
+        key = file_path.name.split('_')[0].split('.')[0]
+        size, last_used, file_paths = entries.get(key, (0, 0., []))
+        entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime), file_paths + [file_path])
+
+    total_size = sum(entry[0] for entry in entries.values())
+    for key, (size, _, file_paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if total_size <= max_size:
+            break
+        for file_path in file_paths:
+            try:
+                file_path.unlink()
+            except OSError:
+                pass
+        total_size -= size
+        if cache_name is not None:
+            statistics = _cache_statistics.setdefault(cache_name, {'hits':0, 'misses':0, 'evictions':0})
+            statistics['evictions'] += 1
@@ -0,0 +1,33 @@
+import pytest
+import numpy as np
+
+
+@pytest.fixture
+def recorder():
+    '''
+    Starts an inline CSDL recorder for the duration of a test.
+    '''
+    csdl = pytest.importorskip('csdl_alpha')
+    recorder = csdl.Recorder(inline=True)
+    recorder.start()
+    yield recorder
+    recorder.stop()
+
+
+@pytest.fixture
+def simple_geometry(recorder):
+    '''
+    A geometry with two curved B-spline surfaces that have different degrees.
+    '''
+    csdl = pytest.importorskip('csdl_alpha')
+    lfs = pytest.importorskip('lsdo_function_spaces')
+    import lsdo_geo
+
+    functions = {}
+    for i, (degree, coefficients_shape) in enumerate([((2, 3), (5, 6)), ((1, 2), (4, 4))]):
+        space = lfs.BSplineSpace(num_parametric_dimensions=2, degree=degree, coefficients_shape=coefficients_shape)
+        u, v = np.meshgrid(np.linspace(0., 1., coefficients_shape[0]), np.linspace(0., 1., coefficients_shape[1]), indexing='ij')
+        coefficients = np.stack((u + i, 2*v, 0.3*np.sin(3*u + i)*np.cos(2*v)), axis=-1)
+        functions[i] = lfs.Function(space=space, coefficients=csdl.Variable(value=coefficients), name=f'surface_{i}')
+    return lsdo_geo.Geometry(functions=functions, function_names={i:function.name for i, function in functions.items()},
+                             name='simple_geometry')
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _get_trilinear_corners(seed=0):
+    rng = np.random.default_rng(seed)
+    u, v, w = np.meshgrid([0., 1.], [0., 1.], [0., 1.], indexing='ij')
+    corners = np.stack((3*u, 2*v, w), axis=-1)
+    return corners + 0.2*rng.standard_normal(corners.shape)     # Not affine, so the trilinear inverse is used
+
+
+def _evaluate_trilinear_map(corners, parametric_coordinates):
+    u, v, w = (parametric_coordinates[:,i] for i in range(3))
+    basis = [(1. - u, u), (1. - v, v), (1. - w, w)]
+    points = np.zeros((parametric_coordinates.shape[0], 3))
+    for i in range(2):
+        for j in range(2):
+            for k in range(2):
+                points += (basis[0][i]*basis[1][j]*basis[2][k])[:,np.newaxis]*corners[i,j,k]
+    return points
+
+
+def test_invert_trilinear_map_matches_forward_evaluation():
+    '''
+    Test description: inverting the trilinear map recovers the parametric coordinates that the forward map was evaluated at,
+    and points outside of the block are flagged as not converged.
+    '''
+    from lsdo_geo.core.parameterization.ffd_block import _invert_trilinear_map
+
+    corners = _get_trilinear_corners()
+    parametric_coordinates = np.random.default_rng(1).random((500, 3))
+    points = _evaluate_trilinear_map(corners, parametric_coordinates)
+
+    inverted_parametric_coordinates, converged = _invert_trilinear_map(corners=corners, points=points)
+    assert np.all(converged)
+    np.testing.assert_allclose(inverted_parametric_coordinates, parametric_coordinates, atol=1e-10)
+    np.testing.assert_allclose(_evaluate_trilinear_map(corners, inverted_parametric_coordinates), points, atol=1e-10)
+
+    outside_points = _evaluate_trilinear_map(corners, np.array([[1.5, 0.5, 0.5], [0.5, -0.5, 0.5]]))
+    _, converged = _invert_trilinear_map(corners=corners, points=outside_points)
+    assert not np.any(converged)
+
+
+def test_trilinear_ffd_block_embeds_points(recorder):
+    '''
+    Test description: points embedded in a trilinear FFD block are reproduced by evaluating the block, and a single embedded point keeps
+    the (1, num_physical_dimensions) shape of the lfs evaluation.
+    '''
+    import csdl_alpha as csdl
+    import lsdo_function_spaces as lfs
+    from lsdo_geo.core.parameterization.ffd_block import FFDBlock
+
+    corners = _get_trilinear_corners()
+    points = _evaluate_trilinear_map(corners, np.random.default_rng(2).random((50, 3)))
+    single_point = _evaluate_trilinear_map(corners, np.array([[0.3, 0.4, 0.5]]))
+
+    space = lfs.BSplineSpace(num_parametric_dimensions=3, degree=(1, 1, 1), coefficients_shape=(2, 2, 2))
+    ffd_block = FFDBlock(space=space, coefficients=csdl.Variable(value=corners), embedded_entities=[points, single_point])
+    assert ffd_block._linear_inverse_map[0] == 'trilinear'
+
+    embedded_points, embedded_single_point = ffd_block.evaluate()
+    np.testing.assert_allclose(embedded_points.value, points, atol=1e-10)
+    assert embedded_single_point.shape == (1, 3)
+    np.testing.assert_allclose(embedded_single_point.value, single_point, atol=1e-10)
+
+    np.testing.assert_allclose(ffd_block.evaluate(parametric_coordinates=ffd_block.embed_points(points), non_csdl=True), points,
+                               atol=1e-10)
+
+
+def test_batched_projections_match_unbatched(simple_geometry):
+    '''
+    Test description: embedding several entities (points, a variable, a function, and a geometry) in one batched projection gives the same
+    parametric coordinates as embedding each point set separately, including for points outside of the block.
+    '''
+    import csdl_alpha as csdl
+    import lsdo_function_spaces as lfs
+    from lsdo_geo.core.parameterization.ffd_block import FFDBlock
+
+    corners = _get_trilinear_corners()
+    corners[...,0] = 1.5*corners[...,0] - 1.
+    corners[...,1] = 1.5*corners[...,1] - 0.5
+    corners[...,2] = 2*corners[...,2] - 1.
+    points = np.vstack((_evaluate_trilinear_map(corners, np.random.default_rng(3).random((20, 3))),
+                        _evaluate_trilinear_map(corners, np.array([[1.2, 0.5, 0.5], [0.5, 0.5, -0.3]]))))
+    variable_points = csdl.Variable(value=_evaluate_trilinear_map(corners, np.random.default_rng(4).random((7, 3))))
+
+    space = lfs.BSplineSpace(num_parametric_dimensions=3, degree=(1, 1, 1), coefficients_shape=(2, 2, 2))
+    embedded_parametric_coordinates = []
+    for batch_projections in [True, False]:
+        embedded_entities = [points, variable_points, simple_geometry.functions[1], simple_geometry]
+        ffd_block = FFDBlock(space=space, coefficients=csdl.Variable(value=corners), embedded_entities=embedded_entities,
+                             batch_projections=batch_projections)
+        embedded_parametric_coordinates.append(ffd_block.embedded_entity_parametric_coordinates)
+
+    batched_parametric_coordinates, unbatched_parametric_coordinates = embedded_parametric_coordinates
+    assert len(batched_parametric_coordinates) == len(unbatched_parametric_coordinates) == 4
+    for batched_entity_coordinates, unbatched_entity_coordinates in zip(batched_parametric_coordinates[:3],
+                                                                        unbatched_parametric_coordinates[:3]):
+        np.testing.assert_allclose(batched_entity_coordinates, unbatched_entity_coordinates, atol=1e-10)
+
+    # The geometry has one set of parametric coordinates per function.
+    assert len(batched_parametric_coordinates[3]) == len(unbatched_parametric_coordinates[3]) == len(simple_geometry.functions)
+    for batched_function_coordinates, unbatched_function_coordinates in zip(batched_parametric_coordinates[3],
+                                                                            unbatched_parametric_coordinates[3]):
+        np.testing.assert_allclose(batched_function_coordinates, unbatched_function_coordinates, atol=1e-10)
@@ -0,0 +1,70 @@
+import pytest
+import copy
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def test_search_and_ignore():
+    '''
+    Test description: a search finds the functions whose names contain any of the search strings (in function order), excluding the
+    ones whose names contain an ignore name. Short queries (without a full trigram) and unnamed functions are handled.
+    '''
+    from lsdo_geo.core.geometry.function_name_index import FunctionNameIndex, FunctionNames
+
+    function_names = FunctionNames({3:'tail_upper', 0:'wing_upper', 1:'wing_lower', 2:'fuselage', 4:None, 5:'wi'})
+    function_name_index = FunctionNameIndex(function_names)
+
+    assert function_name_index.search(['wing']) == [0, 1]
+    assert function_name_index.search(['upper'], ignore_names=['tail']) == [0]
+    assert function_name_index.search(['lower', 'tail']) == [3, 1]
+    assert function_name_index.search(['wi']) == [0, 1, 5]
+    assert function_name_index.search(['wing', 'fuselage'], ignore_names=['lower', 'fuse']) == [0]
+    assert function_name_index.search(['nacelle']) == []
+    # Memoized results are copies, so modifying a result doesn't change later searches.
+    function_name_index.search(['wing']).append(2)
+    assert function_name_index.search(['wing']) == [0, 1]
+
+
+def test_rename_invalidates_index():
+    '''
+    Test description: writing to the function names (renaming, adding, or removing a function) invalidates an index built over them,
+    while reads do not.
+    '''
+    from lsdo_geo.core.geometry.function_name_index import FunctionNameIndex, FunctionNames
+
+    function_names = FunctionNames({0:'wing_upper', 1:'wing_lower'})
+    function_name_index = FunctionNameIndex(function_names)
+    function_names.get(0)
+    assert function_name_index.is_valid_for(function_names)
+    assert not function_name_index.is_valid_for(FunctionNames(function_names))
+
+    function_names[1] = 'tail_lower'
+    assert not function_name_index.is_valid_for(function_names)
+    function_name_index = FunctionNameIndex(function_names)
+    assert function_name_index.search(['tail']) == [1]
+
+    del function_names[1]
+    assert not function_name_index.is_valid_for(function_names)
+
+
+def test_declare_component_handle(simple_geometry):
+    '''
+    Test description: declaring the same component again returns the same geometry, renaming a function is picked up by the next
+    search, and replacing a function gives a new component that points to the new function.
+    '''
+    component = simple_geometry.declare_component(function_search_names=['surface_1'], name='component')
+    assert list(component.functions) == [1]
+    assert component.functions[1] is simple_geometry.functions[1]
+    assert simple_geometry.declare_component(function_search_names=['surface_1'], name='component') is component
+
+    simple_geometry.function_names[1] = 'tail'
+    assert simple_geometry.search_for_function_indices(['surface']) == [0]
+    assert list(simple_geometry.declare_component(function_search_names=['tail'], name='component').functions) == [1]
+
+    simple_geometry.functions[1] = copy.copy(simple_geometry.functions[1])
+    new_component = simple_geometry.declare_component(function_search_names=['tail'], name='component')
+    assert new_component is not component
+    assert new_component.functions[1] is simple_geometry.functions[1]
+
+    assert list(simple_geometry.declare_component(function_search_names=['surface', 'tail'], ignore_names=['tail']).functions) == [0]
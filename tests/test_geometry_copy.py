@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _coefficient_values(geometry) -> dict:
+    return {i:function.coefficients.value.copy() for i, function in geometry.functions.items()}
+
+
+def test_rotate_copy(simple_geometry):
+    '''
+    Test description: rotating a copy of a geometry leaves the original geometry unchanged.
+    '''
+    import csdl_alpha as csdl
+
+    original_coefficients = _coefficient_values(simple_geometry)
+    geometry_copy = simple_geometry.copy()
+    geometry_copy.rotate(np.array([0., 0., 0.]), np.array([0., 0., 1.]), csdl.Variable(value=np.array([0.5])))
+
+    for i, function in simple_geometry.functions.items():
+        np.testing.assert_array_equal(function.coefficients.value, original_coefficients[i])
+        assert not np.allclose(geometry_copy.functions[i].coefficients.value, original_coefficients[i])
+
+
+def test_set_coefficients_copy(simple_geometry):
+    '''
+    Test description: setting the coefficients of (some of) the functions of a copy leaves the original geometry unchanged.
+    '''
+    import csdl_alpha as csdl
+
+    original_coefficients = _coefficient_values(simple_geometry)
+    geometry_copy = simple_geometry.copy()
+    geometry_copy.set_coefficients([csdl.Variable(value=original_coefficients[1] + 1.)], function_indices=[1])
+
+    for i, function in simple_geometry.functions.items():
+        np.testing.assert_array_equal(function.coefficients.value, original_coefficients[i])
+    np.testing.assert_array_equal(geometry_copy.functions[1].coefficients.value, original_coefficients[1] + 1.)
+
+
+def test_assign_coefficients_copy(simple_geometry):
+    '''
+    Test description: assigning new coefficients to a function of a copy leaves the original geometry unchanged, while writing to the
+    value of a shared coefficient variable is only isolated by copy_coefficients=True.
+    '''
+    import csdl_alpha as csdl
+
+    original_coefficients = _coefficient_values(simple_geometry)
+    geometry_copy = simple_geometry.copy()
+    geometry_copy.functions[0].coefficients = csdl.Variable(value=original_coefficients[0]*2.)
+    np.testing.assert_array_equal(simple_geometry.functions[0].coefficients.value, original_coefficients[0])
+    np.testing.assert_array_equal(geometry_copy.functions[0].coefficients.value, original_coefficients[0]*2.)
+
+    deep_geometry_copy = simple_geometry.copy(copy_coefficients=True)
+    deep_geometry_copy.functions[1].coefficients.set_value(original_coefficients[1]*2.)
+    np.testing.assert_array_equal(simple_geometry.functions[1].coefficients.value, original_coefficients[1])
+
+    # NOTE: A shallow copy shares the coefficient variables, so an in place write changes both geometries (see Geometry.copy).
+    assert geometry_copy.functions[1].coefficients is simple_geometry.functions[1].coefficients
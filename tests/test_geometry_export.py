@@ -0,0 +1,198 @@
+import types
+
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _reference_export_iges(functions, file_name):
+    '''
+    The original exporter (one formatted write per value), kept as the reference for the output format.
+    '''
+    f = open(file_name, 'w')
+    f.write('                                                                        S      1\n')
+    f.write('1H,,1H;,7H128-000,11H128-000.IGS,9H{unknown},9H{unknown},16,6,15,13,15, G      1\n')
+    f.write('7H128-000,1.,6,1HM,8,0.016,15H19970830.165254, 0.0001,0.,               G      2\n')
+    f.write('21Hdennette@wiz-worx.com,23HLegacy PDD AP Committee,11,3,               G      3\n')
+    f.write('13H920717.080000,23HMIL-PRF-28000B0,CLASS 1;                            G      4\n')
+    Dcount = 1
+    Pcount = 1
+    for surf in functions.values():
+        space = surf.space
+        paraEntries = 13 + (len(space.knot_indices[0])) + (len(space.knot_indices[1])) + space.coefficients_shape[0] * space.coefficients_shape[1] + 3 * space.coefficients_shape[0] * space.coefficients_shape[1] + 1
+        paraLines = (paraEntries - 10) // 3 + 2
+        if np.mod(paraEntries - 10, 3) != 0:
+            paraLines += 1
+        f.write("     128%8d       0       0       1       0       0       000000001D%7d\n" % (Pcount, Dcount))
+        f.write(
+        "     128       0       2%8d       0                               0D%7d\n" % (paraLines, Dcount + 1)
+        )
+        Dcount += 2
+        Pcount += paraLines
+    Pcount  = 1
+    counter = 1
+    for surf in functions.values():
+        space = surf.space
+        f.write(
+            "%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n"
+            % (128, space.coefficients_shape[0] - 1, space.coefficients_shape[1] - 1, space.degree[0], space.degree[1], Pcount, counter)
+        )
+        counter += 1
+        f.write("%10d,%10d,%10d,%10d,%10d,          %7dP%7d\n" % (0, 0, 1, 0, 0, Pcount, counter))
+
+        counter += 1
+        pos_counter = 0
+        knots_u = space.knots[space.knot_indices[0]]
+        knots_v = space.knots[space.knot_indices[1]]
+        for i in range(len(knots_u)):
+            pos_counter += 1
+            f.write("%20.12g," % (np.real(knots_u[i])))
+            if np.mod(pos_counter, 3) == 0:
+                f.write("  %7dP%7d\n" % (Pcount, counter))
+                counter += 1
+                pos_counter = 0
+
+        for i in range(len(knots_v)):
+            pos_counter += 1
+            f.write("%20.12g," % (np.real(knots_v[i])))
+            if np.mod(pos_counter, 3) == 0:
+                f.write("  %7dP%7d\n" % (Pcount, counter))
+                counter += 1
+                pos_counter = 0
+
+        for i in range(space.coefficients_shape[0] * space.coefficients_shape[1]):
+            pos_counter += 1
+            f.write("%20.12g," % (1.0))
+            if np.mod(pos_counter, 3) == 0:
+                f.write("  %7dP%7d\n" % (Pcount, counter))
+                counter += 1
+                pos_counter = 0
+
+        for j in range(space.coefficients_shape[1]):
+            for i in range(space.coefficients_shape[0]):
+                for idim in range(3):
+                    pos_counter += 1
+                    cntrl_pts = np.reshape(surf.coefficients, (space.coefficients_shape[0], space.coefficients_shape[1],3))
+                    f.write("%20.12g," % (np.real(cntrl_pts[i, j, idim])))
+                    if np.mod(pos_counter, 3) == 0:
+                        f.write("  %7dP%7d\n" % (Pcount, counter))
+                        counter += 1
+                        pos_counter = 0
+
+        for i in range(4):
+            pos_counter += 1
+            if i == 0:
+                f.write("%20.12g," % (np.real(knots_u[0])))
+            if i == 1:
+                f.write("%20.12g," % (np.real(knots_u[1])))
+            if i == 2:
+                f.write("%20.12g," % (np.real(knots_v[0])))
+            if i == 3:
+                f.write("%20.12g;" % (np.real(knots_v[1])))
+            if np.mod(pos_counter, 3) == 0:
+                f.write("  %7dP%7d\n" % (Pcount, counter))
+                counter += 1
+                pos_counter = 0
+            else:  
+                if i == 3:
+                    for j in range(3 - pos_counter):
+                        f.write("%21s" % (" "))
+                    pos_counter = 0
+                    f.write("  %7dP%7d\n" % (Pcount, counter))
+                    counter += 1
+
+        Pcount += 2
+    f.write('S%7dG%7dD%7dP%7d%40sT%6s1\n'%(1, 4, Dcount-1, counter-1, ' ', ' '))
+    f.close()
+
+
+def _get_sample_functions(num_functions=25, seed=0):
+    rng = np.random.default_rng(seed)
+    functions = {}
+    for i in range(num_functions):
+        coefficients_shape = tuple(int(size) for size in rng.integers(2, 12, 2))
+        degree = tuple(min(3, size - 1) for size in coefficients_shape)
+        knot_vectors = [np.concatenate((np.zeros(degree[k]), np.linspace(0., 1., coefficients_shape[k] - degree[k] + 1),
+                                        np.ones(degree[k]))) for k in range(2)]
+        space = types.SimpleNamespace(knots=np.concatenate(knot_vectors), degree=degree, coefficients_shape=coefficients_shape,
+                                      knot_indices=[np.arange(knot_vectors[0].size), knot_vectors[0].size + np.arange(knot_vectors[1].size)])
+        coefficients = rng.standard_normal(coefficients_shape + (3,))*10.**float(rng.integers(-8, 8))
+        functions[i] = types.SimpleNamespace(space=space, coefficients=coefficients)
+    return functions
+
+
+def test_export_iges_matches_reference(tmp_path):
+    '''
+    Test description: the buffered, vectorized IGES exporter writes the same bytes as the original per-value exporter.
+    '''
+    import lsdo_geo
+
+    functions = _get_sample_functions()
+    lsdo_geo.Geometry.export_iges(types.SimpleNamespace(functions=functions), tmp_path / 'exported.igs')
+    _reference_export_iges(functions, tmp_path / 'reference.igs')
+
+    assert (tmp_path / 'exported.igs').read_bytes() == (tmp_path / 'reference.igs').read_bytes()
+
+
+def _read_obj(file_name):
+    '''
+    Reads the vertices, and the faces (1-based vertex indices) of each group of an OBJ file.
+    '''
+    vertices = []
+    groups = {}
+    group_name = None
+    with open(file_name) as f:
+        for line in f:
+            entries = line.split()
+            if not entries or entries[0] == '#':
+                continue
+            if entries[0] == 'v':
+                vertices.append([float(entry) for entry in entries[1:]])
+            elif entries[0] == 'g':
+                group_name = entries[1]
+                groups[group_name] = []
+            elif entries[0] == 'f':
+                groups[group_name].append([int(entry) for entry in entries[1:]])
+    return np.array(vertices), {name:np.array(faces) for name, faces in groups.items()}
+
+
+@pytest.mark.parametrize('triangulate', [False, True])
+def test_export_obj(simple_geometry, tmp_path, triangulate):
+    '''
+    Test description: the OBJ export of a two surface geometry has one group per surface (named after the function), the expected
+    vertex and face counts, vertices on the surfaces, and 1-based face indices that stay correct across chunk boundaries.
+    '''
+    grid_resolution = (4, 3)
+    num_grid_points = grid_resolution[0]*grid_resolution[1]
+    num_faces_per_surface = (grid_resolution[0] - 1)*(grid_resolution[1] - 1)*(2 if triangulate else 1)
+
+    # One surface per chunk, and all of the surfaces in one chunk
+    simple_geometry.export_obj(tmp_path / 'chunked.obj', grid_resolution=grid_resolution, triangulate=triangulate,
+                               max_vertices_per_chunk=num_grid_points)
+    simple_geometry.export_obj(tmp_path / 'exported.obj', grid_resolution=grid_resolution, triangulate=triangulate)
+    assert (tmp_path / 'chunked.obj').read_bytes() == (tmp_path / 'exported.obj').read_bytes()
+
+    vertices, groups = _read_obj(tmp_path / 'chunked.obj')
+    assert vertices.shape == (2*num_grid_points, 3)
+    assert list(groups) == ['surface_0', 'surface_1']
+
+    mesh_grid_u, mesh_grid_v = np.meshgrid(np.linspace(0., 1., grid_resolution[0]), np.linspace(0., 1., grid_resolution[1]),
+                                           indexing='ij')
+    grid_parametric_coordinates = np.column_stack((mesh_grid_u.reshape((-1,)), mesh_grid_v.reshape((-1,))))
+    for i, (group_name, faces) in enumerate(groups.items()):
+        assert faces.shape == (num_faces_per_surface, 3 if triangulate else 4)
+        # The faces of each surface only use (every one of) its own vertices
+        np.testing.assert_array_equal(np.unique(faces), np.arange(1, num_grid_points + 1) + i*num_grid_points)
+        surface_vertices = simple_geometry.functions[i].evaluate(grid_parametric_coordinates, non_csdl=True).reshape((-1, 3))
+        np.testing.assert_allclose(vertices[i*num_grid_points:(i+1)*num_grid_points], surface_vertices, rtol=1e-10, atol=1e-12)
+
+    # The first grid cell of the second surface (vertex (0,0) of the surface is vertex num_grid_points + 1)
+    first_quad = num_grid_points + 1 + np.array([0, grid_resolution[1], grid_resolution[1] + 1, 1])
+    if triangulate:
+        num_quads = num_faces_per_surface//2
+        np.testing.assert_array_equal(groups['surface_1'][0], first_quad[[0,1,2]])
+        np.testing.assert_array_equal(groups['surface_1'][num_quads], first_quad[[0,2,3]])
+    else:
+        np.testing.assert_array_equal(groups['surface_1'][0], first_quad)
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import os
+from pathlib import Path
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+example_file_name = str(Path(__file__).parents[1] / 'examples' / 'example_geometries' / 'long_box.stp')
+
+
+@pytest.fixture
+def import_folder(tmp_path, monkeypatch):
+    import lsdo_geo
+    from lsdo_geo.utils import caching_functions
+
+    monkeypatch.setattr(lsdo_geo, 'IMPORT_FOLDER', tmp_path / 'imports')
+    caching_functions.reset_cache_statistics('imports')
+    return tmp_path / 'imports'
+
+
+def _assert_same_geometry(geometry, other_geometry):
+    assert list(geometry.functions) == list(other_geometry.functions)
+    assert dict(geometry.function_names) == dict(other_geometry.function_names)
+    for i, function in geometry.functions.items():
+        other_function = other_geometry.functions[i]
+        assert function.name == other_function.name
+        assert tuple(function.space.degree) == tuple(other_function.space.degree)
+        assert tuple(function.space.coefficients_shape) == tuple(other_function.space.coefficients_shape)
+        np.testing.assert_array_equal(np.hstack(function.space.knots), np.hstack(other_function.space.knots))
+        np.testing.assert_array_equal(function.coefficients.value, other_function.coefficients.value)
+
+
+def test_cached_import_round_trip(simple_geometry, import_folder):
+    '''
+    Test description: loading a missing entry returns None, and a stored geometry is loaded with identical coefficients, knots (including
+    non-uniform knots), and names.
+    '''
+    import lsdo_function_spaces as lfs
+    from lsdo_geo.core.geometry.geometry_functions import _store_cached_import, _load_cached_import
+
+    space = simple_geometry.functions[0].space
+    knots = (np.array([0., 0., 0., 0.2, 0.6, 1., 1., 1.]), np.array([0., 0., 0., 0., 0.3, 0.5, 1., 1., 1., 1.]))
+    simple_geometry.functions[0].space = lfs.BSplineSpace(num_parametric_dimensions=2, degree=space.degree,
+                                                          coefficients_shape=space.coefficients_shape, knots=knots)
+
+    assert _load_cached_import('round_trip', name='loaded_geometry') is None
+    _store_cached_import('round_trip', simple_geometry)
+    loaded_geometry = _load_cached_import('round_trip', name='loaded_geometry')
+    assert loaded_geometry.name == 'loaded_geometry'
+    _assert_same_geometry(loaded_geometry, simple_geometry)
+    np.testing.assert_array_equal(loaded_geometry.functions[0].space.knots[0], knots[0])
+    np.testing.assert_array_equal(loaded_geometry.functions[0].space.knots[1], knots[1])
+
+
+def test_import_geometry_cache(recorder, import_folder):
+    '''
+    Test description: the first import misses the cache, re-importing the file hits the cache and gives the same geometry, and importing
+    with a different scale past max_cache_size evicts the least recently used entry (which then misses again).
+    '''
+    from lsdo_geo.core.geometry.geometry_functions import import_geometry
+    from lsdo_geo.utils import caching_functions
+
+    geometry = import_geometry(example_file_name)
+    assert caching_functions.get_cache_statistics('imports') == {'hits':0, 'misses':1, 'evictions':0}
+    _assert_same_geometry(import_geometry(example_file_name), geometry)
+    assert caching_functions.get_cache_statistics('imports') == {'hits':1, 'misses':1, 'evictions':0}
+
+    entry_size = sum(file_path.stat().st_size for file_path in import_folder.iterdir())
+    for file_path in import_folder.iterdir():   # Makes the first entry the least recently used one
+        os.utime(file_path, (0., 0.))
+    scaled_geometry = import_geometry(example_file_name, scale=2., max_cache_size=int(1.5*entry_size))
+    assert caching_functions.get_cache_statistics('imports') == {'hits':1, 'misses':2, 'evictions':1}
+    for i, function in scaled_geometry.functions.items():
+        np.testing.assert_allclose(function.coefficients.value, 2*geometry.functions[i].coefficients.value)
+
+    import_geometry(example_file_name, scale=2.)
+    import_geometry(example_file_name)
+    assert caching_functions.get_cache_statistics('imports') == {'hits':2, 'misses':3, 'evictions':1}
@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+@pytest.mark.parametrize('num_points_u, num_points_v', [(2, 2), (3, 5), (6, 4)])
+def test_grid_quad_faces_match_reference(num_points_u, num_points_v):
+    '''
+    Test description: the vectorized mesh faces are the same (and in the same order) as the faces built one vertex at a time.
+    '''
+    from lsdo_geo.core.geometry.geometry import _compute_grid_quad_faces
+
+    reference_faces = []
+    for u_index in range(num_points_u):
+        for v_index in range(num_points_v):
+            if u_index != 0 and v_index != 0:
+                reference_faces.append(((u_index-1)*num_points_v+(v_index-1), (u_index-1)*num_points_v+(v_index),
+                                        (u_index)*num_points_v+(v_index), (u_index)*num_points_v+(v_index-1)))
+
+    np.testing.assert_array_equal(_compute_grid_quad_faces(num_points_u, num_points_v), np.array(reference_faces))
+
+
+def test_plot_meshes_screenshot(simple_geometry, tmp_path):
+    '''
+    Test description: plotting a mesh as a surface and a wireframe offscreen saves a screenshot, and both plotting meshes have every face.
+    '''
+    vedo = pytest.importorskip('vedo')
+
+    mesh_grid_u, mesh_grid_v = np.meshgrid(np.linspace(0., 1., 5), np.linspace(0., 1., 4), indexing='ij')
+    parametric_coordinates = [(0, np.array([u, v])) for u, v in zip(mesh_grid_u.reshape((-1,)), mesh_grid_v.reshape((-1,)))]
+    mesh = simple_geometry.evaluate(parametric_coordinates, non_csdl=True).reshape((5, 4, 3))
+
+    screenshot = tmp_path / 'meshes.png'
+    plotting_elements = simple_geometry.plot_meshes([mesh], mesh_plot_types=['surface', 'wireframe'], show=False, offscreen=True,
+                                                    screenshot=str(screenshot))
+    assert screenshot.is_file() and screenshot.stat().st_size > 0
+
+    plotting_meshes = plotting_elements[-2:]
+    assert all(isinstance(plotting_mesh, vedo.Mesh) for plotting_mesh in plotting_meshes)
+    assert plotting_meshes[0] is not plotting_meshes[1]
+    for plotting_mesh in plotting_meshes:
+        assert plotting_mesh.ncells == 4*3
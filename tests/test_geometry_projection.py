@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+@pytest.fixture
+def projections_folder(tmp_path, monkeypatch):
+    import lsdo_geo
+    from lsdo_geo.utils import caching_functions
+
+    monkeypatch.setattr(lsdo_geo, 'PROJECTIONS_FOLDER', tmp_path / 'projections')
+    caching_functions.reset_cache_statistics('projections')
+    return tmp_path / 'projections'
+
+
+points = np.array([[0.5, 1., 1.], [1.5, 0.4, -1.], [0.2, 1.8, 0.5]])
+
+
+def _assert_same_projection(parametric_coordinates, other_parametric_coordinates):
+    assert len(parametric_coordinates) == len(other_parametric_coordinates)
+    for (function_index, coordinates), (other_function_index, other_coordinates) in zip(parametric_coordinates,
+                                                                                          other_parametric_coordinates):
+        assert function_index == other_function_index
+        np.testing.assert_allclose(coordinates, other_coordinates, atol=1e-12)
+
+
+def test_project_cache_hit_and_miss(simple_geometry, projections_folder):
+    '''
+    Test description: the first projection misses the cache, repeating it hits the cache and gives the same parametric coordinates, and
+    changing the points or the projection parameters misses the cache.
+    '''
+    from lsdo_geo.utils import caching_functions
+
+    parametric_coordinates = simple_geometry.project(points)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':0, 'misses':1, 'evictions':0}
+
+    _assert_same_projection(simple_geometry.project(points), parametric_coordinates)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':1, 'misses':1, 'evictions':0}
+
+    simple_geometry.project(points[:2])
+    simple_geometry.project(points, grid_search_density_parameter=2)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':1, 'misses':3, 'evictions':0}
+
+
+def test_project_cache_invalidation(simple_geometry, projections_folder):
+    '''
+    Test description: changing the coefficients or the knots of a function misses the cache.
+    '''
+    import csdl_alpha as csdl
+    import lsdo_function_spaces as lfs
+    from lsdo_geo.utils import caching_functions
+
+    simple_geometry.project(points)
+
+    coefficients_geometry = simple_geometry.copy()
+    coefficients_geometry.functions[1].coefficients = csdl.Variable(value=coefficients_geometry.functions[1].coefficients.value + 0.1)
+    coefficients_geometry.project(points)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':0, 'misses':2, 'evictions':0}
+
+    knots_geometry = simple_geometry.copy()
+    space = knots_geometry.functions[0].space
+    knots = (np.array([0., 0., 0., 0.2, 0.6, 1., 1., 1.]), np.array([0., 0., 0., 0., 0.3, 0.5, 1., 1., 1., 1.]))
+    new_space = lfs.BSplineSpace(num_parametric_dimensions=2, degree=space.degree, coefficients_shape=space.coefficients_shape,
+                                 knots=knots)
+    knots_geometry.functions[0].space = new_space
+    knots_geometry.space.spaces[0] = new_space
+    knots_geometry.project(points)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':0, 'misses':3, 'evictions':0}
+
+    simple_geometry.project(points)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':1, 'misses':3, 'evictions':0}
+
+
+def test_project_force_reproject_and_use_cache(simple_geometry, projections_folder):
+    '''
+    Test description: force_reproject ignores (and replaces) a stored projection, and use_cache=False neither loads nor stores one. Both
+    give the same parametric coordinates as the cached projection.
+    '''
+    from lsdo_geo.utils import caching_functions
+
+    parametric_coordinates = simple_geometry.project(points)
+    _assert_same_projection(simple_geometry.project(points, force_reproject=True), parametric_coordinates)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':0, 'misses':2, 'evictions':0}
+
+    num_stored_projections = len(list(projections_folder.iterdir()))
+    _assert_same_projection(simple_geometry.project(points, use_cache=False), parametric_coordinates)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':0, 'misses':2, 'evictions':0}
+    assert len(list(projections_folder.iterdir())) == num_stored_projections
+
+    simple_geometry.project(points)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':1, 'misses':2, 'evictions':0}
+
+
+def test_project_direction_variable(simple_geometry, projections_folder):
+    '''
+    Test description: a projection direction given as a CSDL variable is hashed by its value, so it shares the cache entry of the same
+    direction given as an array.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.utils import caching_functions
+
+    direction = np.array([0., 0., -1.])
+    parametric_coordinates = simple_geometry.project(points, direction=csdl.Variable(value=direction))
+    _assert_same_projection(simple_geometry.project(points, direction=direction), parametric_coordinates)
+    assert caching_functions.get_cache_statistics('projections') == {'hits':1, 'misses':1, 'evictions':0}
@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+@pytest.fixture
+def refit_folder(tmp_path, monkeypatch):
+    import lsdo_geo
+    from lsdo_geo.utils import caching_functions
+
+    monkeypatch.setattr(lsdo_geo, 'REFIT_FOLDER', tmp_path / 'refits')
+    caching_functions.reset_cache_statistics('refits')
+    return tmp_path / 'refits'
+
+
+def test_refit_in_place_cache_hit_and_miss(simple_geometry, refit_folder):
+    '''
+    Test description: the first refit misses the cache for every function, refitting an identical geometry hits the cache for every
+    function, and changing one function only misses its own entry. Refitting keeps the shape of the geometry.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.utils import caching_functions
+
+    parametric_coordinates = np.array([[0.25, 0.5], [0.75, 0.1]])
+    original_values = {i:function.evaluate(parametric_coordinates, non_csdl=True) for i, function in simple_geometry.functions.items()}
+    refit_parameters = {'fit_resolution':(30,30), 'num_coefficients':(12,12), 'degree':(3,3)}
+
+    first_geometry = simple_geometry.copy()
+    first_geometry.refit_in_place(**refit_parameters)
+    assert caching_functions.get_cache_statistics('refits') == {'hits':0, 'misses':2, 'evictions':0}
+    for i, function in first_geometry.functions.items():
+        assert tuple(function.space.coefficients_shape) == (12,12)
+        np.testing.assert_allclose(function.evaluate(parametric_coordinates, non_csdl=True), original_values[i], atol=1e-2)
+    for i, function in simple_geometry.functions.items():   # The refit geometry was a copy, so the original is unchanged
+        np.testing.assert_array_equal(function.evaluate(parametric_coordinates, non_csdl=True), original_values[i])
+
+    second_geometry = simple_geometry.copy()
+    second_geometry.refit_in_place(**refit_parameters, parallelize=True)
+    assert caching_functions.get_cache_statistics('refits') == {'hits':2, 'misses':2, 'evictions':0}
+    for i, function in second_geometry.functions.items():
+        np.testing.assert_array_equal(function.coefficients.value, first_geometry.functions[i].coefficients.value)
+
+    third_geometry = simple_geometry.copy()
+    third_geometry.functions[1].coefficients = csdl.Variable(value=third_geometry.functions[1].coefficients.value*2.)
+    third_geometry.refit_in_place(**refit_parameters)
+    assert caching_functions.get_cache_statistics('refits') == {'hits':3, 'misses':3, 'evictions':0}
+
+
+def test_refit_in_place_rejects_mismatched_dimensions(simple_geometry, refit_folder):
+    '''
+    Test description: refit parameters with the wrong number of parametric dimensions raise a clear error.
+    '''
+    with pytest.raises(ValueError):
+        simple_geometry.refit_in_place(fit_resolution=(10,10,10), num_coefficients=(5,5,5), degree=(2,2,2), use_cache=False)
+    with pytest.raises(ValueError):
+        simple_geometry.refit_in_place(num_coefficients={3:(5,5,5)}, use_cache=False)
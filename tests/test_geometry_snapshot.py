@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_save_load_round_trip(simple_geometry, tmp_path, mmap):
+    '''
+    Test description: a saved geometry is loaded with the same names, spaces, and coefficients, and every array in the file is aligned.
+    '''
+    import lsdo_geo
+    from lsdo_geo.core.geometry.geometry_snapshot import MemoryMappedFunction
+
+    file_name = tmp_path / 'simple_geometry.lsdogeo'
+    simple_geometry.save(file_name)
+    geometry = lsdo_geo.Geometry.load(file_name, mmap=mmap)
+
+    assert geometry.name == simple_geometry.name
+    assert geometry.function_names == simple_geometry.function_names
+    for i, function in simple_geometry.functions.items():
+        loaded_function = geometry.functions[i]
+        assert isinstance(loaded_function, MemoryMappedFunction) == mmap
+        assert tuple(loaded_function.space.degree) == tuple(function.space.degree)
+        assert tuple(loaded_function.space.coefficients_shape) == tuple(function.space.coefficients_shape)
+        if mmap:
+            assert not loaded_function.is_materialized
+            assert loaded_function.coefficients_data.ctypes.data % 64 == 0
+        np.testing.assert_array_equal(loaded_function.coefficients.value, function.coefficients.value)
+        parametric_coordinates = np.array([[0.3, 0.6], [1., 0.]])
+        np.testing.assert_allclose(loaded_function.evaluate(parametric_coordinates, non_csdl=True),
+                                   function.evaluate(parametric_coordinates, non_csdl=True), atol=1e-12)
+
+    assert not any(path.suffix == '.tmp' for path in tmp_path.iterdir())
+
+
+def test_memory_mapped_function_materialization(simple_geometry, tmp_path):
+    '''
+    Test description: a memory-mapped function becomes a regular function (with every attribute lfs.Function.__init__ sets) when its
+    coefficients or another of those attributes are first accessed, or when new coefficients are assigned, and a shallow copy of a
+    function that is not materialized stays lazy.
+    '''
+    import copy
+    import csdl_alpha as csdl
+    import lsdo_geo
+
+    file_name = tmp_path / 'simple_geometry.lsdogeo'
+    simple_geometry.save(file_name)
+    geometry = lsdo_geo.Geometry.load(file_name, mmap=True)
+
+    function_copy = copy.copy(geometry.functions[0])
+    assert not function_copy.is_materialized and not geometry.functions[0].is_materialized
+
+    assert geometry.functions[0].num_physical_dimensions == 3
+    assert geometry.functions[0].is_materialized
+    assert geometry.functions[0].triangulation is None
+    np.testing.assert_array_equal(geometry.functions[0].coefficients.value, simple_geometry.functions[0].coefficients.value)
+    assert not function_copy.is_materialized
+
+    new_coefficients = csdl.Variable(value=simple_geometry.functions[1].coefficients.value*2.)
+    geometry.functions[1].coefficients = new_coefficients
+    assert geometry.functions[1].is_materialized
+    assert geometry.functions[1].coefficients is new_coefficients
+    assert geometry.functions[1].num_physical_dimensions == 3
+
+
+def test_save_load_empty_geometry(recorder, tmp_path):
+    '''
+    Test description: a geometry without functions can be saved and loaded.
+    '''
+    import lsdo_geo
+
+    file_name = tmp_path / 'empty_geometry.lsdogeo'
+    lsdo_geo.Geometry(functions={}, function_names={}, name='empty').save(file_name)
+    geometry = lsdo_geo.Geometry.load(file_name)
+    assert geometry.name == 'empty'
+    assert len(geometry.functions) == 0
+
+
+def test_load_rejects_other_files(recorder, tmp_path):
+    '''
+    Test description: loading a file that is not a geometry snapshot raises an error.
+    '''
+    import lsdo_geo
+
+    file_name = tmp_path / 'not_a_snapshot.lsdogeo'
+    file_name.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        lsdo_geo.Geometry.load(file_name)
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _evaluate_with_functions(geometry, parametric_coordinates):
+    return np.vstack([geometry.functions[function_index].evaluate(np.asarray(coordinate).reshape((1,-1)), non_csdl=True)
+                      for function_index, coordinate in parametric_coordinates])
+
+
+def test_cached_evaluation_matrix_matches_function_evaluate(simple_geometry):
+    '''
+    Test description: the mesh evaluation matrix gives the same points as evaluating each function, it is reused while the parametric
+    coordinates are unchanged, and it is reassembled when they are reassigned, modified in place (and invalidated), or when a function
+    they lie on is given a new space.
+    '''
+    import lsdo_geo
+    import lsdo_function_spaces as lfs
+
+    parametric_coordinates = [(1, np.array([0.2, 0.3])), (0, np.array([0.5, 0.5])), (1, np.array([0.9, 0.1])),
+                              (0, np.array([0., 1.]))]
+    mesh = lsdo_geo.Mesh(geometry=simple_geometry, parametric_coordinates=parametric_coordinates)
+
+    values = mesh.evaluate(simple_geometry).value
+    np.testing.assert_allclose(values, _evaluate_with_functions(simple_geometry, parametric_coordinates), atol=1e-12)
+
+    evaluation_matrix = mesh.evaluation_matrix
+    mesh.evaluate(simple_geometry)
+    assert mesh.evaluation_matrix is evaluation_matrix
+
+    new_parametric_coordinates = lsdo_geo.ParametricCoordinates.from_list(parametric_coordinates[:3])
+    mesh.parametric_coordinates = new_parametric_coordinates
+    values = mesh.evaluate(simple_geometry).value
+    assert mesh.evaluation_matrix is not evaluation_matrix
+    np.testing.assert_allclose(values, _evaluate_with_functions(simple_geometry, new_parametric_coordinates), atol=1e-12)
+
+    evaluation_matrix = mesh.evaluation_matrix
+    new_parametric_coordinates.parametric_coordinates[0] = [0.7, 0.7]
+    mesh.invalidate_evaluation_matrix()
+    values = mesh.evaluate(simple_geometry).value
+    assert mesh.evaluation_matrix is not evaluation_matrix
+    np.testing.assert_allclose(values, _evaluate_with_functions(simple_geometry, new_parametric_coordinates), atol=1e-12)
+
+    evaluation_matrix = mesh.evaluation_matrix
+    mesh.evaluate(simple_geometry.copy())     # A shallow copy shares the spaces, so the matrix is reused
+    assert mesh.evaluation_matrix is evaluation_matrix
+
+    space = simple_geometry.functions[1].space
+    knots = (np.array([0., 0., 0.3, 0.6, 1., 1.]), np.array([0., 0., 0., 0.4, 1., 1., 1.]))
+    simple_geometry.functions[1].space = lfs.BSplineSpace(num_parametric_dimensions=2, degree=space.degree,
+                                                          coefficients_shape=space.coefficients_shape, knots=knots)
+    values = mesh.evaluate(simple_geometry).value
+    assert mesh.evaluation_matrix is not evaluation_matrix
+    np.testing.assert_allclose(values, _evaluate_with_functions(simple_geometry, new_parametric_coordinates), atol=1e-12)
+
+
+def test_batched_evaluate_representations(simple_geometry):
+    '''
+    Test description: evaluating meshes in a batch (with their stacked evaluation matrices) gives the same points as evaluating each mesh.
+    '''
+    import lsdo_geo
+
+    meshes = [lsdo_geo.Mesh(geometry=simple_geometry, parametric_coordinates=[(1, np.array([0.2, 0.3])), (1, np.array([0.4, 0.1]))]),
+              lsdo_geo.Mesh(geometry=simple_geometry, parametric_coordinates=[(0, np.array([0.5, 0.5]))]),
+              lsdo_geo.Mesh(geometry=simple_geometry, parametric_coordinates=[(0, np.array([0.1, 0.9])), (1, np.array([1., 0.]))])]
+
+    batched_values = simple_geometry.evaluate_representations(meshes, batched=True)
+    for mesh, values in zip(meshes, batched_values):
+        assert values.shape == mesh.evaluate(simple_geometry).shape
+        np.testing.assert_allclose(values.value.reshape((-1, 3)),
+                                   _evaluate_with_functions(simple_geometry, mesh.parametric_coordinates), atol=1e-12)
@@ -0,0 +1,171 @@
+import pytest
+import numpy as np
+import scipy.sparse as sps
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _add_sectional_problem(num_parameters:int=8, nonlinear:bool=True):
+    '''
+    A parameterization problem where each constraint only depends on two neighboring parameters (like a parameter that only affects a
+    few sections).
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.parameterization.parameterization_solver import ParameterizationSolver, GeometricVariables
+
+    parameters = csdl.Variable(shape=(num_parameters,), value=0., name='parameters')
+    desired_values = csdl.Variable(shape=(num_parameters - 1,), value=np.linspace(0.1, 0.4, num_parameters - 1), name='desired_values')
+    if nonlinear:
+        computed_values = parameters[:-1]*parameters[1:] + parameters[:-1] + 0.5*parameters[1:]
+    else:
+        computed_values = parameters[:-1] + 0.5*parameters[1:]
+
+    # NOTE: The known pattern, so it does not matter if a derivative happens to be 0 at the current values.
+    jacobian_sparsity_pattern = sps.diags([np.ones(num_parameters - 1), np.ones(num_parameters - 1)], [0, 1],
+                                          shape=(num_parameters - 1, num_parameters))
+    geometric_variables = GeometricVariables()
+    geometric_variables.add_variable(computed_values, desired_values, jacobian_sparsity_pattern=jacobian_sparsity_pattern)
+    return ParameterizationSolver, geometric_variables, parameters, computed_values, desired_values
+
+
+def test_color_rows():
+    '''
+    Test description: rows of the same color never share a column, so the rows can be recovered from the sums of each color.
+    '''
+    from lsdo_geo.csdl.optimization import _color_rows
+
+    pattern = sps.diags([np.ones(19), np.ones(20), np.ones(19)], [-1, 0, 1], format='csr')
+    colors = _color_rows(pattern)
+    assert colors.max() + 1 == 3
+    for color in range(colors.max() + 1):
+        columns = pattern[colors == color].nonzero()[1]
+        assert len(columns) == len(set(columns))
+
+    np.testing.assert_array_equal(_color_rows(np.ones((4, 4))), np.arange(4))
+
+
+def test_sparse_kkt_matrix_matches_dense_derivative(recorder):
+    '''
+    Test description: the KKT matrix assembled from the row-compressed constraint jacobian and hessian of the lagrangian matches the
+    dense jacobian of the residuals wrt the states (including where a derivative is 0 at the current values), and both take fewer
+    reverse sweeps than they have rows.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.csdl.optimization import Optimization
+
+    _, geometric_variables, parameters, computed_values, desired_values = _add_sectional_problem()
+    parameters.set_value(np.linspace(-0.5, 0.5, parameters.size))
+
+    optimization = Optimization()
+    optimization.add_objective(csdl.vdot(parameters, parameters), hessian_sparsity_pattern=sps.identity(parameters.size))
+    optimization.add_design_variable(parameters)
+    optimization.add_constraint(computed_values - desired_values,
+                                jacobian_sparsity_pattern=geometric_variables.jacobian_sparsity_patterns[0])
+    optimization.setup()
+    states, residuals = optimization.get_states_and_residuals()
+    # NOTE: Nonzero lagrange multipliers so that the curvature of the constraints is part of the hessian.
+    states[0].set_value(np.linspace(1., 2., states[0].size))
+
+    kkt_matrix = optimization.evaluate_kkt_matrix()
+    dense_kkt_blocks = csdl.derivative(residuals, states)
+    dense_kkt_matrix = np.block([[dense_kkt_blocks[residual, state].value for state in states] for residual in residuals])
+
+    assert sps.issparse(kkt_matrix)
+    np.testing.assert_allclose(kkt_matrix.toarray(), dense_kkt_matrix, atol=1.e-8)
+    assert optimization.jacobian_colors.max() + 1 == 2
+    assert optimization.hessian_colors.max() + 1 == 3
+
+
+@pytest.mark.parametrize('nonlinear', [False, True])
+def test_newton_solve(recorder, nonlinear):
+    '''
+    Test description: the default Newton path drives the geometric variables to their desired values. A quadratic program (constant
+    KKT matrix) is only factorized once, while a nonlinear problem is refactorized as the KKT matrix changes.
+    '''
+    ParameterizationSolver, geometric_variables, parameters, computed_values, desired_values = _add_sectional_problem(nonlinear=nonlinear)
+
+    solver = ParameterizationSolver()
+    solver.add_parameter(parameters)
+    solver.evaluate(geometric_variables)
+
+    np.testing.assert_allclose(computed_values.value, desired_values.value, atol=1.e-8)
+    num_factorizations = solver.optimizer.newton_step_operation.num_factorizations
+    if nonlinear:
+        assert num_factorizations > 1
+    else:
+        assert num_factorizations == 1
+
+
+@pytest.mark.parametrize('nonlinear', [False, True])
+def test_chord_iteration_count(recorder, nonlinear):
+    '''
+    Test description: the chord iteration (KKT matrix factorized once) solves a quadratic program in a single step, while a nonlinear
+    problem takes several steps.
+    '''
+    ParameterizationSolver, geometric_variables, parameters, computed_values, desired_values = _add_sectional_problem(nonlinear=nonlinear)
+
+    solver = ParameterizationSolver(reuse_jacobian=True, count_iterations=True)
+    solver.add_parameter(parameters)
+    solver.evaluate(geometric_variables)
+
+    np.testing.assert_allclose(computed_values.value, desired_values.value, atol=1.e-8)
+    iteration_count = solver.get_iteration_report()['iteration_counts'][0]
+    if nonlinear:
+        assert iteration_count > 1
+    else:
+        assert iteration_count == 1
+
+
+def test_constant_kkt_matrix_check_is_opt_in(recorder, monkeypatch):
+    '''
+    Test description: the direct solve does not run the (whole model) constant KKT matrix check unless it is requested.
+    '''
+    from lsdo_geo.csdl.optimization import Optimization
+
+    def check_constant_kkt_matrix(*args, **kwargs):
+        raise AssertionError('The constant KKT matrix check should not be run.')
+    monkeypatch.setattr(Optimization, 'check_constant_kkt_matrix', check_constant_kkt_matrix)
+
+    ParameterizationSolver, geometric_variables, parameters, computed_values, desired_values = _add_sectional_problem(nonlinear=False)
+    solver = ParameterizationSolver(direct_qp_solve=True, count_iterations=True)
+    solver.add_parameter(parameters)
+    solver.evaluate(geometric_variables)
+
+    np.testing.assert_allclose(computed_values.value, desired_values.value, atol=1.e-8)
+    assert solver.get_iteration_report()['iteration_counts'][0] == 1
+
+
+def test_direct_qp_solve_matches_newton(recorder):
+    '''
+    Test description: for a quadratic program, the direct solve gives the same parameters as the Newton solver, and the same derivatives
+    of the parameters wrt the desired values.
+    '''
+    import csdl_alpha as csdl
+
+    solutions = []
+    for solver_options in [{'direct_qp_solve':True}, {}]:
+        ParameterizationSolver, geometric_variables, parameters, _, desired_values = _add_sectional_problem(nonlinear=False)
+        solver = ParameterizationSolver(**solver_options)
+        solver.add_parameter(parameters)
+        solver.evaluate(geometric_variables)
+        solutions.append((parameters.value, csdl.derivative(parameters, desired_values).value))
+
+    (direct_parameters, direct_derivative), (newton_parameters, newton_derivative) = solutions
+    np.testing.assert_allclose(direct_parameters, newton_parameters, atol=1.e-8)
+    np.testing.assert_allclose(direct_derivative, newton_derivative, atol=1.e-6)
+
+
+def test_direct_qp_solve_falls_back_for_nonlinear_constraints(recorder):
+    '''
+    Test description: when the constant KKT matrix check is requested, a nonlinear constraint makes the direct solve fall back to the
+    Newton solver with a warning, which still solves the problem.
+    '''
+    ParameterizationSolver, geometric_variables, parameters, computed_values, desired_values = _add_sectional_problem(nonlinear=True)
+    solver = ParameterizationSolver(direct_qp_solve=True, check_constant_kkt_matrix=True)
+    solver.add_parameter(parameters)
+    with pytest.warns(UserWarning, match='not constant'):
+        solver.evaluate(geometric_variables)
+
+    np.testing.assert_allclose(computed_values.value, desired_values.value, atol=1.e-8)
+    assert not hasattr(solver.optimizer, 'kkt_solve_operation')
@@ -0,0 +1,99 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def test_warm_start_history_extrapolation():
+    '''
+    Test description: the initial guess is the default until a solution is recorded, then the last solution, and with extrapolation
+    it follows the secant through the last two solutions.
+    '''
+    from lsdo_geo.csdl.optimization import WarmStartHistory
+
+    history = WarmStartHistory(default_initial_guess=[np.zeros((2,))], extrapolate=True)
+    np.testing.assert_array_equal(history.get_initial_guess(np.array([1.]))[0], np.zeros((2,)))
+
+    history.store_solution([np.array([1., 2.])], np.array([1.]))
+    np.testing.assert_array_equal(history.get_initial_guess(np.array([2.]))[0], [1., 2.])
+
+    history.store_solution([np.array([2., 4.])], np.array([2.]))
+    np.testing.assert_allclose(history.get_initial_guess(np.array([3.]))[0], [3., 6.])
+
+
+def test_warm_start_reduces_iterations(recorder):
+    '''
+    Test description: with warm starting, re-evaluating the model (through a simulator, without calling the solver again) for a
+    slightly different desired value starts from the last solution and takes fewer iterations than the first (cold) solve.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.parameterization.parameterization_solver import ParameterizationSolver, GeometricVariables
+
+    parameter = csdl.Variable(shape=(1,), value=0., name='parameter')
+    desired_value = csdl.Variable(shape=(1,), value=0.5, name='desired_value')
+    computed_value = parameter**3 + parameter
+
+    solver = ParameterizationSolver(reuse_jacobian=True, warm_start=True, count_iterations=True)
+    solver.add_parameter(parameter)
+    geometric_variables = GeometricVariables()
+    geometric_variables.add_variable(computed_value, desired_value)
+    solver.evaluate(geometric_variables)
+    np.testing.assert_allclose(computed_value.value, 0.5, atol=1e-6)
+
+    simulator = csdl.experimental.PySimulator(recorder)
+    simulator[desired_value] = np.array([0.51])
+    simulator.run()
+    np.testing.assert_allclose(simulator[computed_value], 0.51, atol=1e-6)
+
+    iteration_counts = solver.get_iteration_report()['iteration_counts']
+    assert len(iteration_counts) == 2
+    assert iteration_counts[-1] < iteration_counts[0]
+
+
+def _add_cubic_problem(desired_value:float, **kwargs):
+    import csdl_alpha as csdl
+    from lsdo_geo.core.parameterization.parameterization_solver import ParameterizationSolver, GeometricVariables
+
+    parameter = csdl.Variable(shape=(1,), value=0., name='parameter')
+    desired_value = csdl.Variable(shape=(1,), value=desired_value, name='desired_value')
+    computed_value = parameter**3 + parameter
+
+    solver = ParameterizationSolver(count_iterations=True, **kwargs)
+    solver.add_parameter(parameter)
+    geometric_variables = GeometricVariables()
+    geometric_variables.add_variable(computed_value, desired_value)
+    solver.evaluate(geometric_variables)
+    return solver, desired_value, computed_value
+
+
+def test_warm_start_fewer_iterations_than_cold_start(recorder):
+    '''
+    Test description: re-solving the problem warm started from a nearby solution takes fewer (Newton) iterations than solving the same
+    problem from the initial values (the first solve of the cold solver).
+    '''
+    import csdl_alpha as csdl
+
+    cold_solver, _, cold_computed_value = _add_cubic_problem(0.51)
+    np.testing.assert_allclose(cold_computed_value.value, 0.51, atol=1e-6)
+    cold_iteration_count = cold_solver.get_iteration_report()['iteration_counts'][0]
+
+    warm_solver, warm_desired_value, warm_computed_value = _add_cubic_problem(0.5, warm_start=True)
+    simulator = csdl.experimental.PySimulator(recorder)
+    simulator[warm_desired_value] = np.array([0.51])
+    simulator.run()
+    np.testing.assert_allclose(simulator[warm_computed_value], 0.51, atol=1e-6)
+    warm_iteration_count = warm_solver.get_iteration_report()['iteration_counts'][-1]
+
+    assert 0 < warm_iteration_count < cold_iteration_count
+
+
+def test_warm_start_inputs_only_added_when_warm_starting(recorder):
+    '''
+    Test description: the desired values are only added as warm start inputs when warm starting.
+    '''
+    cold_solver, _, _ = _add_cubic_problem(0.5)
+    warm_solver, warm_desired_value, _ = _add_cubic_problem(0.5, warm_start=True)
+
+    assert cold_solver.optimizer.warm_start_inputs == []
+    assert warm_solver.optimizer.warm_start_inputs == [warm_desired_value]
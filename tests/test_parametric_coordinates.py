@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _get_sample_list():
+    return [(3, np.array([0.1, 0.2])), (0, np.array([0.3, 0.4])), (3, np.array([0.5, 0.6])), (1, np.array([0.7, 0.8]))]
+
+
+def test_from_list_to_list_round_trip():
+    '''
+    Test description: converting a list of (function_index, parametric_coordinate) tuples to the compact form and back
+    gives the same list.
+    '''
+    from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
+
+    parametric_coordinates_list = _get_sample_list()
+    parametric_coordinates = ParametricCoordinates.from_list(parametric_coordinates_list)
+
+    assert len(parametric_coordinates) == 4
+    assert parametric_coordinates.function_indices.dtype == np.int32
+    assert parametric_coordinates.parametric_coordinates.shape == (4, 2)
+    for (function_index, coordinate), (desired_index, desired_coordinate) in zip(parametric_coordinates.to_list(),
+                                                                                 parametric_coordinates_list):
+        assert function_index == desired_index
+        np.testing.assert_array_equal(coordinate, desired_coordinate)
+
+    single_point = ParametricCoordinates.from_list((2, np.array([0.5, 0.5])))
+    assert len(single_point) == 1
+    assert single_point[0][0] == 2
+
+
+def test_from_list_empty():
+    '''
+    Test description: an empty list needs the number of parametric dimensions, and mismatched dimensions are rejected.
+    '''
+    from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
+
+    empty = ParametricCoordinates.from_list([], num_parametric_dimensions=3)
+    assert len(empty) == 0
+    assert empty.parametric_coordinates.shape == (0, 3)
+
+    with pytest.raises(ValueError):
+        ParametricCoordinates.from_list([])
+    with pytest.raises(ValueError):
+        ParametricCoordinates.from_list(_get_sample_list(), num_parametric_dimensions=3)
+
+    parametric_coordinates = ParametricCoordinates.from_list(_get_sample_list())
+    assert len([] + parametric_coordinates) == 4
+    assert len(parametric_coordinates + []) == 4
+    assert len(parametric_coordinates + _get_sample_list()) == 8
+
+
+def test_group_by_function():
+    '''
+    Test description: the point indices are grouped by function, keeping the original order of the points within each function.
+    '''
+    from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
+
+    parametric_coordinates = ParametricCoordinates.from_list(_get_sample_list())
+    groups = parametric_coordinates.group_by_function()
+
+    assert list(groups) == [0, 1, 3]
+    np.testing.assert_array_equal(groups[0], [1])
+    np.testing.assert_array_equal(groups[1], [3])
+    np.testing.assert_array_equal(groups[3], [0, 2])
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_save_load(tmp_path, mmap):
+    '''
+    Test description: saved parametric coordinates are loaded back unchanged (read into memory or memory-mapped).
+    '''
+    from lsdo_geo.core.geometry.parametric_coordinates import ParametricCoordinates
+
+    parametric_coordinates = ParametricCoordinates.from_list(_get_sample_list())
+    file_name = tmp_path / 'parametric_coordinates.npz'
+    parametric_coordinates.save(file_name)
+
+    loaded = ParametricCoordinates.load(file_name, mmap=mmap)
+    if mmap:
+        assert not loaded.parametric_coordinates.flags.owndata
+    np.testing.assert_array_equal(loaded.function_indices, parametric_coordinates.function_indices)
+    np.testing.assert_array_equal(loaded.parametric_coordinates, parametric_coordinates.parametric_coordinates)
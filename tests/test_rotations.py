@@ -0,0 +1,199 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _rotate_reference(points:np.ndarray, axis_origin:np.ndarray, axis_vector:np.ndarray, angle:float) -> np.ndarray:
+    '''
+    Rotates points about an axis with Rodrigues' formula in NumPy (the axis vector is normalized).
+    '''
+    unit_axis_vector = axis_vector/np.linalg.norm(axis_vector)
+    points_wrt_axis = points - axis_origin
+    rotated_points = points_wrt_axis*np.cos(angle) + np.cross(unit_axis_vector, points_wrt_axis)*np.sin(angle) \
+        + np.outer(points_wrt_axis.dot(unit_axis_vector), unit_axis_vector)*(1 - np.cos(angle))
+    return rotated_points + axis_origin
+
+
+def _finite_difference(function, x:np.ndarray, step:float=1.e-6) -> np.ndarray:
+    '''
+    Central finite difference of a function of a flat array, as a (function.size, x.size) jacobian.
+    '''
+    columns = []
+    for i in range(x.size):
+        perturbation = np.zeros(x.size)
+        perturbation[i] = step
+        columns.append((function(x + perturbation) - function(x - perturbation)).reshape((-1,))/(2*step))
+    return np.stack(columns, axis=1)
+
+
+random_number_generator = np.random.default_rng(0)
+points_value = random_number_generator.random((6,3))
+axis_origin_value = np.array([0.5, -0.2, 0.1])
+unit_axis_vector_value = np.array([0.3, 0.5, 0.8])/np.linalg.norm([0.3, 0.5, 0.8])
+angles_value = np.array([0.1, 0.7, -1.2, 2.5])
+
+
+def test_batched_rotation_matches_quaternion(recorder):
+    '''
+    Test description: for a unit axis vector, the batched rotation (rotation tensor) and the quaternion product give the same points for
+    several angles, and they match the reference rotation.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    points = csdl.Variable(value=points_value)
+    axis_origin = csdl.Variable(value=axis_origin_value)
+    angles = csdl.Variable(value=angles_value)
+    batched_points = rotate(points, axis_origin, unit_axis_vector_value, angles, batched=True)
+    quaternion_points = rotate(points, axis_origin, unit_axis_vector_value, angles, batched=False)
+
+    reference_points = np.stack([_rotate_reference(points_value, axis_origin_value, unit_axis_vector_value, angle)
+                                 for angle in angles_value])
+    np.testing.assert_allclose(batched_points.value, reference_points, atol=1.e-12)
+    np.testing.assert_allclose(quaternion_points.value, reference_points, atol=1.e-12)
+
+
+def test_batched_rotation_multiple_axes(recorder):
+    '''
+    Test description: one batched call with an axis vector, origin, and angle per rotation matches the rotations applied one at a time,
+    including for axis vectors that are not unit vectors (which are normalized).
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    axis_vectors_value = np.array([[0., 0., 2.], [1., 1., 0.], [0.3, -0.5, 0.8]])
+    axis_origins_value = np.array([[0., 0., 0.], [1., 0., 0.], [0.5, 0.5, -0.5]])
+    rotation_angles_value = angles_value[:3]
+
+    rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origins_value),
+                            csdl.Variable(value=axis_vectors_value), csdl.Variable(value=rotation_angles_value))
+    assert rotated_points.shape == (3,) + points_value.shape
+    for i in range(3):
+        single_rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origins_value[i]),
+                                       axis_vectors_value[i]/np.linalg.norm(axis_vectors_value[i]),
+                                       csdl.Variable(value=rotation_angles_value[i:i+1]), batched=False)
+        np.testing.assert_allclose(rotated_points.value[i], single_rotated_points.value, atol=1.e-12)
+        np.testing.assert_allclose(rotated_points.value[i], _rotate_reference(points_value, axis_origins_value[i], axis_vectors_value[i],
+                                                                              rotation_angles_value[i]), atol=1.e-12)
+
+
+def test_batched_rotation_derivatives(recorder):
+    '''
+    Test description: the derivatives of the batched rotation wrt the points, angles, axis origin, and axis vector match the quaternion
+    product (points, angles, and origin) and finite differences of the reference rotation (axis vector) for several angles.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    weights = random_number_generator.random((angles_value.size,) + points_value.shape)
+    derivatives = []
+    for batched in [True, False]:
+        points = csdl.Variable(value=points_value)
+        axis_origin = csdl.Variable(value=axis_origin_value)
+        axis_vector = csdl.Variable(value=unit_axis_vector_value)
+        angles = csdl.Variable(value=angles_value)
+        rotated_points = rotate(points, axis_origin, axis_vector, angles, batched=batched)
+        objective = csdl.sum(rotated_points*weights)
+        derivative = csdl.derivative(objective, [points, angles, axis_origin, axis_vector])
+        derivatives.append([derivative[wrt].value for wrt in [points, angles, axis_origin, axis_vector]])
+
+    (d_points, d_angles, d_axis_origin, d_axis_vector), (quaternion_d_points, quaternion_d_angles, quaternion_d_axis_origin, _) = derivatives
+    np.testing.assert_allclose(d_points, quaternion_d_points, atol=1.e-10)
+    np.testing.assert_allclose(d_angles, quaternion_d_angles, atol=1.e-10)
+    np.testing.assert_allclose(d_axis_origin, quaternion_d_axis_origin, atol=1.e-10)
+
+    def reference_objective(axis_vector_value):
+        return np.array([np.sum(np.stack([_rotate_reference(points_value, axis_origin_value, axis_vector_value, angle)
+                                          for angle in angles_value])*weights)])
+    np.testing.assert_allclose(np.asarray(d_axis_vector).reshape((1, 3)), _finite_difference(reference_objective, unit_axis_vector_value),
+                               atol=1.e-6)
+
+
+def test_rotation_units(recorder):
+    '''
+    Test description: angles in degrees are converted on every path, including the axis-aligned rotation matrices.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    for axis_vector_value in [np.array([1., 0., 0.]), np.array([0., -1., 0.]), unit_axis_vector_value]:
+        for batched in [True, False]:
+            rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origin_value), axis_vector_value,
+                                    csdl.Variable(value=np.array([30.])), units='degrees', batched=batched)
+            np.testing.assert_allclose(rotated_points.value,
+                                       _rotate_reference(points_value, axis_origin_value, axis_vector_value, np.pi/6), atol=1.e-12)
+
+
+def test_geometry_rotate_several_rotations(simple_geometry):
+    '''
+    Test description: Geometry.rotate with one axis and angle per group of functions matches rotating each group on its own.
+    '''
+    import csdl_alpha as csdl
+
+    axis_origins_value = np.array([[0., 0., 0.], [1., 0., 0.]])
+    axis_vectors_value = np.array([[0., 0., 1.], [0.3, 0.5, 0.8]])
+    rotation_angles_value = np.array([0.4, -0.9])
+
+    reference_geometry = simple_geometry.copy()
+    for i in range(2):
+        reference_geometry.rotate(axis_origins_value[i], axis_vectors_value[i], csdl.Variable(value=rotation_angles_value[i:i+1]),
+                                  function_indices=[i])
+
+    simple_geometry.rotate(csdl.Variable(value=axis_origins_value), csdl.Variable(value=axis_vectors_value),
+                           csdl.Variable(value=rotation_angles_value), function_indices=[[0], [1]])
+    for i in range(2):
+        np.testing.assert_allclose(simple_geometry.functions[i].coefficients.value, reference_geometry.functions[i].coefficients.value,
+                                   atol=1.e-12)
+
+
+@pytest.mark.parametrize('axis_vector_value', [np.array([0., 0., -1.]), np.array([0., -1., 0.]), np.array([-1., 0., 0.])])
+def test_negative_axis_aligned_rotation(recorder, axis_vector_value):
+    '''
+    Test description: rotating about a negative coordinate axis (for instance [0,0,-1]) is the rotation by the opposite angle about the
+    positive axis.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origin_value), axis_vector_value,
+                            csdl.Variable(value=np.array([0.7])))
+    opposite_rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origin_value), -axis_vector_value,
+                                     csdl.Variable(value=np.array([-0.7])))
+    np.testing.assert_allclose(rotated_points.value, _rotate_reference(points_value, axis_origin_value, axis_vector_value, 0.7),
+                               atol=1.e-12)
+    np.testing.assert_allclose(rotated_points.value, opposite_rotated_points.value, atol=1.e-12)
+
+
+def test_rodrigues_matches_quaternion(recorder):
+    '''
+    Test description: for a random (unit) axis, the Rodrigues rotation matrix path and the quaternion product give the same points and
+    the same derivatives wrt the angle and the axis vector. Only the components of the axis derivative that keep the axis a unit vector
+    are compared, since the quaternion product also depends on the length of the axis vector (see rotate).
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+
+    random_axis_vector_value = random_number_generator.standard_normal((3,))
+    random_axis_vector_value = random_axis_vector_value/np.linalg.norm(random_axis_vector_value)
+    weights = random_number_generator.random(points_value.shape)
+
+    results = []
+    for batched in [True, False]:
+        axis_vector = csdl.Variable(value=random_axis_vector_value)
+        angle = csdl.Variable(value=np.array([0.9]))
+        rotated_points = rotate(csdl.Variable(value=points_value), csdl.Variable(value=axis_origin_value), axis_vector, angle,
+                                batched=batched)
+        derivative = csdl.derivative(csdl.sum(rotated_points*weights), [angle, axis_vector])
+        results.append((rotated_points.value, derivative[angle].value, np.asarray(derivative[axis_vector].value).reshape((3,))))
+
+    (rodrigues_points, rodrigues_d_angle, rodrigues_d_axis), (quaternion_points, quaternion_d_angle, quaternion_d_axis) = results
+    np.testing.assert_allclose(rodrigues_points, quaternion_points, atol=1.e-12)
+    np.testing.assert_allclose(rodrigues_points, _rotate_reference(points_value, axis_origin_value, random_axis_vector_value, 0.9),
+                               atol=1.e-12)
+    np.testing.assert_allclose(rodrigues_d_angle, quaternion_d_angle, atol=1.e-10)
+
+    tangent_projection = np.eye(3) - np.outer(random_axis_vector_value, random_axis_vector_value)
+    np.testing.assert_allclose(tangent_projection @ rodrigues_d_axis, tangent_projection @ quaternion_d_axis, atol=1.e-10)
+    np.testing.assert_allclose(random_axis_vector_value.dot(rodrigues_d_axis), 0., atol=1.e-10)
@@ -0,0 +1,168 @@
+import pytest
+import numpy as np
+import scipy.sparse as sps
+
+pytest.importorskip('csdl_alpha')
+pytest.importorskip('lsdo_function_spaces')
+
+
+def _get_points(shape:tuple=(4, 3, 2, 3)) -> np.ndarray:
+    '''
+    A small, twisted, and tapered block of points (so the axes and lengths differ between sections).
+    '''
+    u, v, w = np.meshgrid(*[np.linspace(0., 1., num_points) for num_points in shape[:-1]], indexing='ij')
+    twist = 0.3*u
+    chord = 2. - u
+    x = 4*u + 0.1*w
+    y = chord*(v*np.cos(twist) - 0.2*w*np.sin(twist))
+    z = chord*(v*np.sin(twist) + 0.2*w*np.cos(twist))
+    points = np.stack((x, y, z), axis=-1)
+    return points + 0.01*np.random.default_rng(0).standard_normal(points.shape)
+
+
+def _get_indices_in_shape(shape:tuple, total_index:int, section_axis:int, section_axis_index:int):
+    indices = []
+    remainder = total_index
+    for i in range(len(shape)):
+        if i == section_axis:
+            continue
+        if i < section_axis:
+            axis_index, remainder = np.divmod(remainder, (np.prod(shape[i + 1 :]) / shape[section_axis]))
+        else:
+            axis_index, remainder = np.divmod(remainder, np.prod(shape[i + 1 :]))
+        indices.append(int(axis_index))
+    indices = np.insert(np.array(indices), section_axis, section_axis_index)
+    return tuple(indices)
+
+
+def _get_reference_stretch_map(parameterization, axis:int) -> sps.csc_matrix:
+    '''
+    The stretch map assembled one section and one point at a time into lil matrices (the original implementation).
+    '''
+    points_shape = parameterization.parameterized_points_shape
+    num_parametric_dimensions = len(points_shape[:-1])
+    num_outputs = np.prod(points_shape)
+    parameter_map_list = []
+    for i in range(parameterization.num_sections):
+        parameter_section_map = sps.lil_matrix((num_outputs, 1))
+        parametric_coordinate = np.ones((num_parametric_dimensions,))*0.5
+        parametric_coordinate[parameterization.principal_parametric_dimension] = \
+            parameterization.sectional_principal_parametric_coordinate[i].reshape((1, -1))
+        parametric_derivative_order = np.zeros((num_parametric_dimensions,))
+        parametric_derivative_order[axis] = 1
+        stretch_axis = parameterization.helpful_b_spline.evaluate(parametric_coordinates=parametric_coordinate,
+                                                                  parametric_derivative_orders=tuple(parametric_derivative_order),
+                                                                  non_csdl=True).reshape((-1,))
+        stretch_axis /= np.linalg.norm(stretch_axis)
+        section_middle = parameterization.helpful_b_spline.evaluate(parametric_coordinates=parametric_coordinate,
+                                                                    non_csdl=True).reshape((-1,))
+        section_axis_end_parametric_coordinate = parametric_coordinate.copy()
+        section_axis_end_parametric_coordinate[axis] = 1.0
+        section_axis_beginning_parametric_coordinate = parametric_coordinate.copy()
+        section_axis_beginning_parametric_coordinate[axis] = 0.0
+        section_axis_end = parameterization.helpful_b_spline.evaluate(parametric_coordinates=section_axis_end_parametric_coordinate,
+                                                                      non_csdl=True).reshape((-1,))
+        section_axis_beginning = parameterization.helpful_b_spline.evaluate(
+            parametric_coordinates=section_axis_beginning_parametric_coordinate, non_csdl=True).reshape((-1,))
+        section_length = (section_axis_end - section_axis_beginning).dot(stretch_axis)
+
+        indices = np.arange(np.prod(points_shape, dtype=int)).reshape(points_shape)
+        indices = np.moveaxis(indices, parameterization.principal_parametric_dimension, 0)
+        indices = indices.reshape((parameterization.num_sections, parameterization.num_points_per_section,
+                                   parameterization.num_physical_dimensions))
+        for j in range(parameterization.num_points_per_section):
+            point_indices_full_shape = _get_indices_in_shape(shape=points_shape[:-1], total_index=j,
+                                                             section_axis=parameterization.principal_parametric_dimension,
+                                                             section_axis_index=i)
+            displacement = parameterization.parameterized_points.value.reshape(points_shape)[point_indices_full_shape] - section_middle
+            distance_along_axis = np.dot(displacement, stretch_axis)
+            parameter_section_map[indices[i, j, :].reshape((-1,))] = \
+                distance_along_axis/section_length*stretch_axis.reshape((parameterization.num_physical_dimensions, 1))
+        parameter_map_list.append(parameter_section_map)
+    return sps.hstack(parameter_map_list).tocsc()
+
+
+@pytest.mark.parametrize('principal_parametric_dimension, axis', [(0, 1), (0, 2), (1, 0), (1, 2)])
+def test_stretch_map_matches_reference(recorder, principal_parametric_dimension, axis):
+    '''
+    Test description: the vectorized stretch map matches the map assembled one point at a time.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.parameterization.volume_sectional_parameterization import VolumeSectionalParameterization
+
+    parameterization = VolumeSectionalParameterization(parameterized_points=csdl.Variable(value=_get_points()),
+                                                       principal_parametric_dimension=principal_parametric_dimension)
+    parameterization.add_sectional_stretch(name=f'stretch_{axis}', axis=axis)
+
+    reference_map = _get_reference_stretch_map(parameterization, axis)
+    np.testing.assert_allclose(parameterization.linear_parameter_maps[f'stretch_{axis}'].toarray(), reference_map.toarray(),
+                               atol=1e-12)
+
+
+@pytest.mark.parametrize('principal_parametric_dimension, axis', [(0, 0), (0, 2), (1, 1)])
+def test_rotation_matches_reference(recorder, principal_parametric_dimension, axis):
+    '''
+    Test description: rotating all of the sections at once gives the same points as rotating one section at a time about its average
+    point (the original implementation).
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.geometry.geometry_functions import rotate
+    from lsdo_geo.core.parameterization.volume_sectional_parameterization import (VolumeSectionalParameterization,
+                                                                                  VolumeSectionalParameterizationInputs)
+
+    points = _get_points()
+    parameterization = VolumeSectionalParameterization(parameterized_points=csdl.Variable(value=points),
+                                                       principal_parametric_dimension=principal_parametric_dimension)
+    angles_value = np.linspace(-0.4, 0.6, parameterization.num_sections)
+    parameterization_inputs = VolumeSectionalParameterizationInputs()
+    parameterization_inputs.add_sectional_rotation(axis=axis, rotation=csdl.Variable(value=angles_value))
+    rotated_points = parameterization.evaluate(parameterization_inputs)
+
+    num_parametric_dimensions = len(points.shape[:-1])
+    reference_points = np.moveaxis(points.copy(), principal_parametric_dimension, 0)
+    for i in range(parameterization.num_sections):
+        parametric_coordinate = np.ones((num_parametric_dimensions,))*0.5
+        parametric_coordinate[principal_parametric_dimension] = parameterization.sectional_principal_parametric_coordinate[i]
+        parametric_derivative_order = np.zeros((num_parametric_dimensions,), dtype=int)
+        parametric_derivative_order[axis] = 1
+        rotation_axis = parameterization.helpful_b_spline.evaluate(parametric_coordinates=parametric_coordinate,
+                                                                   parametric_derivative_orders=tuple(parametric_derivative_order),
+                                                                   non_csdl=True).reshape((-1,))
+        rotation_axis /= np.linalg.norm(rotation_axis)
+        section_points = reference_points[i].reshape((-1, 3))
+        reference_points[i] = rotate(points=csdl.Variable(value=section_points),
+                                     axis_origin=csdl.Variable(value=np.mean(section_points, axis=0)), axis_vector=rotation_axis,
+                                     angles=csdl.Variable(value=angles_value[i:i+1]), batched=False).value.reshape(reference_points[i].shape)
+    reference_points = np.moveaxis(reference_points, 0, principal_parametric_dimension)
+
+    np.testing.assert_allclose(rotated_points.value, reference_points, atol=1e-12)
+
+
+def test_parameter_maps_built_once(recorder):
+    '''
+    Test description: evaluating the parameterization again reuses the parameter maps and rotation axes built by the first evaluation.
+    '''
+    import csdl_alpha as csdl
+    from lsdo_geo.core.parameterization.volume_sectional_parameterization import (VolumeSectionalParameterization,
+                                                                                  VolumeSectionalParameterizationInputs)
+
+    parameterization = VolumeSectionalParameterization(parameterized_points=csdl.Variable(value=_get_points()))
+
+    def evaluate(value:float):
+        parameterization_inputs = VolumeSectionalParameterizationInputs()
+        parameterization_inputs.add_sectional_stretch(axis=1, stretch=csdl.Variable(value=np.full((4,), value)))
+        parameterization_inputs.add_sectional_translation(axis=2, translation=csdl.Variable(value=np.full((4,), value)))
+        parameterization_inputs.add_sectional_rotation(axis=0, rotation=csdl.Variable(value=np.full((4,), value)))
+        return parameterization.evaluate(parameterization_inputs)
+
+    evaluate(0.1)
+    linear_parameter_maps = dict(parameterization.linear_parameter_maps)
+    rotation_axis_vectors = dict(parameterization.rotation_axis_vectors)
+    assert set(linear_parameter_maps) == {'stretch_1', 'translation_2'}
+
+    second_points = evaluate(0.2)
+    assert parameterization.linear_parameter_maps.keys() == linear_parameter_maps.keys()
+    for name, parameter_map in parameterization.linear_parameter_maps.items():
+        assert parameter_map is linear_parameter_maps[name]
+    assert parameterization.rotation_axis_vectors['rotation_0'] is rotation_axis_vectors['rotation_0']
+    assert not np.allclose(second_points.value, parameterization.parameterized_points.value)